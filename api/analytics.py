@@ -0,0 +1,268 @@
+import numpy as np
+
+# VECTORIZED TRADE ANALYTICS. EVERY FUNCTION WORKS ON A CONTIGUOUS FLOAT64 ARRAY IN ONE PASS.
+# DEGENERATE INPUTS (TOO FEW TRADES, ZERO VARIANCE, NO LOSSES) RETURN 0 LIKE THE REST OF THE API INSTEAD OF RAISING.
+
+
+def asArray(values):
+
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def maxDrawdown(values):
+    """ METHOD RETURNS THE LARGEST PEAK TO TROUGH DROP, MEASURED AGAINST THE RUNNING PEAK
+    Args:
+        values ([list]): SERIES IN TIME ORDER
+    Returns:
+        [float]: MAX DRAWDOWN, 0 FOR AN EMPTY SERIES
+    """
+
+    values = asArray(values)
+
+    if values.size == 0:
+
+        return 0.0
+
+    return float((np.maximum.accumulate(values) - values).max())
+
+
+def sharpeRatio(returns):
+    """ METHOD RETURNS MEAN / SAMPLE STANDARD DEVIATION OF THE RETURNS """
+
+    returns = asArray(returns)
+
+    if returns.size < 2:
+
+        return 0.0
+
+    std = returns.std(ddof=1)
+
+    return float(returns.mean() / std) if std else 0.0
+
+
+def sortinoRatio(returns, target=0.0):
+    """ METHOD RETURNS (MEAN - TARGET) / DOWNSIDE DEVIATION OF THE RETURNS """
+
+    returns = asArray(returns)
+
+    if returns.size < 2:
+
+        return 0.0
+
+    downside = np.sqrt(np.mean(np.minimum(returns - target, 0.0) ** 2))
+
+    return float((returns.mean() - target) / downside) if downside else 0.0
+
+
+def profitFactor(returns):
+    """ METHOD RETURNS GROSS GAINS / GROSS LOSSES, 0 WHEN THERE ARE NO LOSSES """
+
+    returns = asArray(returns)
+
+    losses = -returns[returns < 0].sum()
+
+    return float(returns[returns > 0].sum() / losses) if losses else 0.0
+
+
+def winRate(returns):
+    """ METHOD RETURNS WINS / (WINS + LOSSES), FLAT TRADES ARE IGNORED """
+
+    returns = asArray(returns)
+
+    wins = np.count_nonzero(returns > 0)
+
+    decided = wins + np.count_nonzero(returns < 0)
+
+    return wins / decided if decided else 0.0
+
+
+def padSeries(series):
+    """ METHOD STACKS RAGGED SERIES INTO ONE NaN PADDED (STRATEGIES x MAX LENGTH) MATRIX """
+
+    length = max((len(values) for values in series), default=0)
+
+    matrix = np.full((len(series), length), np.nan)
+
+    for row, values in enumerate(series):
+
+        matrix[row, :len(values)] = values
+
+    return matrix
+
+
+def strategyMetrics(returns, drawdowns=None):
+    """ METHOD COMPUTES EVERY METRIC FOR ALL STRATEGIES OF AN ACCOUNT IN ONE BATCHED CALL
+    Args:
+        returns ([dict]): STRATEGY -> RETURNS IN TIME ORDER (ROV PER TRADE)
+        drawdowns ([dict]): OPTIONAL STRATEGY -> SERIES TO MEASURE DRAWDOWN ON, DEFAULTS TO returns
+    Returns:
+        [dict]: STRATEGY -> {Count, Mean, Std, SR, Sortino, PF, Win_Rate, MDD, Peak}
+    """
+
+    names = list(returns)
+
+    if not names:
+
+        return {}
+
+    if drawdowns is None:
+
+        drawdowns = returns
+
+    matrix = padSeries([returns[name] for name in names])
+
+    valid = ~np.isnan(matrix)
+
+    count = valid.sum(axis=1)
+
+    filled = np.where(valid, matrix, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+
+        mean = filled.sum(axis=1) / count
+
+        deviations = np.where(valid, matrix - mean[:, None], 0.0)
+
+        std = np.sqrt((deviations ** 2).sum(axis=1) / (count - 1))
+
+        downside = np.sqrt((np.minimum(filled, 0.0) ** 2).sum(axis=1) / count)
+
+        gains = np.where(filled > 0, filled, 0.0).sum(axis=1)
+
+        losses = -np.where(filled < 0, filled, 0.0).sum(axis=1)
+
+        wins = (filled > 0).sum(axis=1)
+
+        decided = wins + (filled < 0).sum(axis=1)
+
+        sharpe = np.where((count > 1) & (std > 0), mean / std, 0.0)
+
+        sortino = np.where((count > 1) & (downside > 0), mean / downside, 0.0)
+
+        profit_factor = np.where(losses > 0, gains / losses, 0.0)
+
+        win_rate = np.where(decided > 0, wins / decided, 0.0)
+
+    # fmax IGNORES THE NaN PADDING, SO THE RUNNING PEAK STAYS PER ROW
+    curves = padSeries([drawdowns[name] for name in names])
+
+    peaks = np.fmax.accumulate(curves, axis=1)
+
+    drops = np.where(np.isnan(curves), 0.0, peaks - curves)
+
+    mdd = drops.max(axis=1) if drops.size else np.zeros(len(names))
+
+    final_peak = peaks[:, -1] if peaks.size else np.full(len(names), np.nan)
+
+    return {name: {
+        "Count": int(count[row]),
+        "Mean": float(mean[row]) if count[row] else 0.0,
+        "Std": float(std[row]) if count[row] > 1 else 0.0,
+        "SR": float(sharpe[row]),
+        "Sortino": float(sortino[row]),
+        "PF": float(profit_factor[row]),
+        "Win_Rate": float(win_rate[row]),
+        "MDD": float(mdd[row]),
+        "Peak": None if np.isnan(final_peak[row]) else float(final_peak[row])
+    } for row, name in enumerate(names)}
+
+
+def lttbIndices(x, y, threshold):
+    """ METHOD PICKS threshold POINTS OF A SERIES WITH LARGEST-TRIANGLE-THREE-BUCKETS, KEEPING THE FIRST AND LAST POINT
+    Args:
+        x ([list]): X VALUES IN ASCENDING ORDER
+        y ([list]): Y VALUES
+        threshold ([int]): MAX NUMBER OF POINTS TO KEEP
+    Returns:
+        [ndarray]: INDICES OF THE KEPT POINTS IN ASCENDING ORDER
+    """
+
+    x = asArray(x)
+
+    y = asArray(y)
+
+    size = x.size
+
+    if threshold >= size:
+
+        return np.arange(size)
+
+    if threshold < 3:
+
+        return np.array([0, size - 1][:max(threshold, 0)], dtype=np.intp)
+
+    # INTERIOR POINTS ARE SPLIT INTO threshold - 2 BUCKETS, BUCKET i IS edges[i]:edges[i + 1]
+    every = (size - 2) / (threshold - 2)
+
+    edges = np.floor(np.arange(threshold - 1) * every).astype(np.intp) + 1
+
+    selected = np.empty(threshold, dtype=np.intp)
+
+    selected[0] = 0
+
+    selected[-1] = size - 1
+
+    previous = 0
+
+    for bucket in range(threshold - 2):
+
+        low, high = edges[bucket], edges[bucket + 1]
+
+        if bucket + 2 < edges.size:
+
+            next_x = x[edges[bucket + 1]:edges[bucket + 2]].mean()
+
+            next_y = y[edges[bucket + 1]:edges[bucket + 2]].mean()
+
+        else:
+
+            next_x, next_y = x[-1], y[-1]
+
+        areas = np.abs((x[previous] - next_x) * (y[low:high] - y[previous]) -
+                       (x[previous] - x[low:high]) * (next_y - y[previous]))
+
+        previous = low + int(areas.argmax())
+
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def bookMetrics(strategies, qty, buy_price, last_price):
+    """ METHOD VALUES A WHOLE BOOK OF OPEN POSITIONS IN ONE VECTORIZED PASS
+    Args:
+        strategies ([list]): STRATEGY OF EACH POSITION
+        qty ([list]): SHARES OF EACH POSITION
+        buy_price ([list]): ENTRY PRICE OF EACH POSITION
+        last_price ([list]): LAST QUOTE OF EACH POSITION, NaN WHEN THERE IS NO QUOTE (VALUED AT ENTRY)
+    Returns:
+        [tuple]: (PER POSITION {Exposure, Unrealized_PL, Weight} ARRAYS, STRATEGY -> {Exposure, Cost, Unrealized_PL, Weight})
+    """
+
+    qty = asArray(qty)
+
+    buy_price = asArray(buy_price)
+
+    last_price = asArray(last_price)
+
+    last_price = np.where(np.isnan(last_price), buy_price, last_price)
+
+    cost = qty * buy_price
+
+    exposure = qty * last_price
+
+    unrealized = exposure - cost
+
+    gross = np.abs(exposure).sum()
+
+    weight = exposure / gross if gross else np.zeros_like(exposure)
+
+    names, codes = np.unique(np.asarray(strategies, dtype=str), return_inverse=True)
+
+    totals = {field: np.bincount(codes, weights=values, minlength=names.size) for field, values in (
+        ("Exposure", exposure), ("Cost", cost), ("Unrealized_PL", unrealized), ("Weight", weight))}
+
+    positions = {"Exposure": exposure,
+                 "Unrealized_PL": unrealized, "Weight": weight}
+
+    return positions, {str(name): {field: float(values[row]) for field, values in totals.items()} for row, name in enumerate(names)}
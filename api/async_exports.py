@@ -0,0 +1,48 @@
+import asyncio
+
+from api.exports import EXPORT_BATCH_SIZE, EXPORT_CHUNK_ROWS, EXPORTS, exportProjection, exportQuery
+from extensions import async_mongo
+
+# ASYNC COUNTERPARTS OF api/exports.py FOR THE QUART APP. ENCODING A CHUNK IS CPU WORK, IT RUNS ON THE DEFAULT EXECUTOR
+# SO A BIG EXPORT DOESN'T STALL THE OTHER REQUESTS ON THE EVENT LOOP.
+
+
+def exportCursor(dataset, account_id, params):
+
+    spec = EXPORTS[dataset]
+
+    return async_mongo.db[spec["collection"]].find(
+        exportQuery(dataset, account_id, params), exportProjection(dataset),
+        batch_size=EXPORT_BATCH_SIZE).sort(spec["sort"])
+
+
+async def exportChunks(cursor, encoder):
+    """ METHOD YIELDS THE ENCODED EXPORT CHUNK BY CHUNK, SEE api.exports.exportChunks """
+
+    loop = asyncio.get_running_loop()
+
+    try:
+
+        yield encoder.start()
+
+        docs = []
+
+        async for doc in cursor:
+
+            docs.append(doc)
+
+            if len(docs) >= EXPORT_CHUNK_ROWS:
+
+                yield await loop.run_in_executor(None, encoder.chunk, docs)
+
+                docs = []
+
+        if docs:
+
+            yield await loop.run_in_executor(None, encoder.chunk, docs)
+
+        yield encoder.finish()
+
+    finally:
+
+        await cursor.close()
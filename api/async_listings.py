@@ -0,0 +1,47 @@
+from api.listings import DEFAULT_PAGE_SIZE, LISTINGS, STREAM_BATCH_SIZE, encodeCursor, listingQuery
+from extensions import async_mongo
+from extensions.json_provider import dumpJson
+
+# ASYNC COUNTERPARTS OF api/listings.py FOR THE QUART APP
+
+
+async def listingPage(listing, account_id, params):
+    """ METHOD READS ONE PAGE, SEE api.listings.listingPage """
+
+    spec = LISTINGS[listing]
+
+    limit = params["limit"] or DEFAULT_PAGE_SIZE
+
+    docs = await async_mongo.db[spec["collection"]].find(
+        listingQuery(listing, account_id, params), spec["projection"]).sort(spec["sort"]).limit(limit + 1).to_list(None)
+
+    if len(docs) <= limit:
+
+        return docs, None
+
+    return docs[:limit], encodeCursor(listing, docs[limit - 1])
+
+
+def listingCursor(listing, account_id, params):
+
+    spec = LISTINGS[listing]
+
+    cursor = async_mongo.db[spec["collection"]].find(
+        listingQuery(listing, account_id, params), spec["projection"],
+        batch_size=STREAM_BATCH_SIZE).sort(spec["sort"])
+
+    return cursor.limit(params["limit"]) if params["limit"] else cursor
+
+
+async def ndjsonLines(cursor):
+    """ METHOD YIELDS ONE JSON LINE PER DOCUMENT, SEE api.listings.ndjsonLines """
+
+    try:
+
+        async for doc in cursor:
+
+            yield dumpJson(doc) + b"\n"
+
+    finally:
+
+        await cursor.close()
@@ -0,0 +1,529 @@
+import asyncio
+from functools import partial, wraps
+from quart import Blueprint, Response, current_app, g, jsonify, make_response, request
+from bson.objectid import ObjectId
+
+from assets.logger import Logger
+from api import async_sections as sections
+from api import async_listings as listings
+from api import async_exports as exports
+from api.async_loaders import getAccount, getUser, invalidateUser
+from api.helpers import parseWindows
+from api.exports import EXPORT_FORMATS, exportEncoder, exportFilename, parseExportArgs
+from api.listings import parseListingArgs
+from api.versions import bumpUpdate, makeEtag, refreshCaches, resolveVersions, sectionNames, versionsQuery
+from auth.tokens import TokenError, requestToken, verifyToken
+from extensions import async_mongo, stream_hub
+
+logger = Logger()
+
+# ASYNC VARIANT OF api/routes.py, SAME URLS AND PAYLOADS, SERVED BY THE QUART APP IN asgi.py.
+# EVERY MONGO CALL IS AWAITED ON ONE EVENT LOOP, SO A WORKER HOLDS MANY IN-FLIGHT REQUESTS WITHOUT A THREAD EACH.
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+
+def token_required(f=None, query=False):
+    """ METHOD IS A DECORATOR THATS CHECKS IF TOKEN IS VALID, SEE auth.tokens.token_required
+    Args:
+        f ([function]): COROUTINE THAT IS BEING CALLED
+        query ([bool]): ALSO ACCEPT THE TOKEN AS ?token=
+    Returns:
+        [function]: COROUTINE THAT IS BEING CALLED
+    """
+
+    if f is None:
+
+        return partial(token_required, query=query)
+
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+
+        token = requestToken(request, query)
+
+        if not token:
+
+            return jsonify({"error": "Token Does Not Exist"}), 401
+
+        try:
+
+            claims = verifyToken(token, current_app.config["SECRET_KEY"])
+
+        except TokenError as e:
+
+            logger.WARNING(str(e))
+
+            return jsonify({"error": str(e)}), 401
+
+        g.current_user = claims["user"]
+
+        return await f(g.current_user, *args, **kwargs)
+
+    return decorated
+
+
+def exception_handler(func):
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+
+        account_id = kwargs["account_id"]
+
+        try:
+
+            return await func(*args, **kwargs)
+
+        except KeyError:
+
+            return jsonify({"error": f"Account ID {account_id} Not Found"}), 400
+
+        except ValueError as e:
+
+            return jsonify({"error": str(e)}), 400
+
+        except TypeError:
+
+            return jsonify({"error": "ERROR"}), 400
+
+        except Exception:
+
+            logger.ERROR(f"Async Route Failed - {request.path}")
+
+            return jsonify({"error": "ERROR"}), 500
+
+    return wrapper
+
+
+def conditional(*names):
+    """ METHOD IS A DECORATOR THAT ANSWERS 304 ON A MATCHING If-None-Match BEFORE THE ROUTE RUNS, SEE api.versions.conditional """
+
+    def decorator(f):
+
+        @wraps(f)
+        async def decorated(current_user, *args, **kwargs):
+
+            sections = sectionNames(names, request.args)
+
+            account_id = kwargs["account_id"]
+
+            if sections is None:
+
+                return await f(current_user, *args, **kwargs)
+
+            docs = await async_mongo.db.account_versions.find(versionsQuery(account_id)).to_list(None)
+
+            versions = resolveVersions(docs, account_id, current_app.config["VERSION_STALE_SECONDS"])
+
+            if versions is None:
+
+                return await f(current_user, *args, **kwargs)
+
+            refreshCaches(current_user, account_id, sections, versions)
+
+            etag = makeEtag(request.endpoint, sections, versions, request.query_string.decode())
+
+            if request.if_none_match.contains_weak(etag):
+
+                # KeyError (ACCOUNT NOT THE USER'S) IS ANSWERED BY exception_handler
+                await getAccount(current_user, account_id)
+
+                response = await make_response("", 304)
+
+            else:
+
+                response = await make_response(await f(current_user, *args, **kwargs))
+
+                if response.status_code != 200:
+
+                    return response
+
+            response.set_etag(etag, weak=True)
+
+            response.headers["Cache-Control"] = "private, no-cache"
+
+            return response
+
+        return decorated
+
+    return decorator
+
+
+def ndjsonResponse(cursor):
+
+    response = Response(listings.ndjsonLines(cursor), mimetype="application/x-ndjson")
+
+    # A FULL EXPORT CAN OUTLAST THE DEFAULT RESPONSE TIMEOUT
+    response.timeout = None
+
+    return response
+
+
+async def section(name, current_user, account_id):
+    """ METHOD BUILDS ONE SECTION ONCE THE ACCOUNT IS KNOWN TO BELONG TO THE USER (KeyError IF NOT), MATCHING THE SYNC ROUTES.
+        THE CHECK IS AWAITED FIRST SO NO SECTION QUERIES (OR WRITES) ANYTHING FOR SOMEONE ELSE'S ACCOUNT
+    """
+
+    account = await getAccount(current_user, account_id)
+
+    return await sections.SECTIONS[name](account, account_id, request.args)
+
+##########################################################
+## GET REQUESTS ##########################################
+
+
+@api.route("/account_status/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("account_status")
+async def fetch_account_status(current_user, account_id):
+
+    account_status = await section("account_status", current_user, account_id)
+
+    return jsonify({"account_status": account_status, "account_id": account_id}), 200
+
+
+@api.route("/account_balance/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("account_balance")
+async def fetch_account_balance(current_user, account_id):
+
+    account_balance = await section("account_balance", current_user, account_id)
+
+    return jsonify({"account_balance": account_balance, "account_id": account_id}), 200
+
+
+@api.route("/rate_of_return/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("rate_of_return", "rates_of_return")
+async def fetch_rate_of_return(current_user, account_id):
+
+    windows = parseWindows(request.args)
+
+    # 30d STAYS IN rate_of_return FOR OLDER CLIENTS, EVERY WINDOW IS RESOLVED BY THE SAME QUERY
+    rates = await sections.window_rates(await getAccount(current_user, account_id),
+                                        account_id, list(dict.fromkeys(windows + ["30d"])))
+
+    return jsonify({
+        "rate_of_return": rates["30d"]["rate_of_return"],
+        "rates_of_return": {window: rates[window] for window in windows},
+        "account_id": account_id}), 200
+
+
+@api.route("/number_of_holdings/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("number_of_holdings")
+async def fetch_number_of_holdings(current_user, account_id):
+
+    number_of_holdings = await section("number_of_holdings", current_user, account_id)
+
+    return jsonify({"number_of_holdings": number_of_holdings, "account_id": account_id}), 200
+
+
+@api.route("/account_balance_history/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("account_balance_history")
+async def fetch_account_balance_history(current_user, account_id):
+
+    account_balance_history = await section("account_balance_history", current_user, account_id)
+
+    return jsonify({"account_balance_history": account_balance_history, "account_id": account_id}), 200
+
+
+@api.route("/profit_loss_history/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("profit_loss_history")
+async def fetch_profit_loss_history(current_user, account_id):
+
+    profit_loss_history = await section("profit_loss_history", current_user, account_id)
+
+    return jsonify({"profit_loss_history": profit_loss_history, "account_id": account_id}), 200
+
+
+@api.route("/queued/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("queued")
+async def fetch_queued(current_user, account_id):
+    """ METHOD RETURNS THE ACCOUNT'S QUEUED ORDERS, SEE api.routes.fetch_queued """
+
+    params = parseListingArgs(request.args)
+
+    if not (params["limit"] or params["after"] or params["format"] == "ndjson"):
+
+        queued = await section("queued", current_user, account_id)
+
+        return jsonify({"queued": queued, "account_id": account_id}), 200
+
+    await getAccount(current_user, account_id)
+
+    if params["format"] == "ndjson":
+
+        return ndjsonResponse(listings.listingCursor("queued", account_id, params))
+
+    queued, cursor = await listings.listingPage("queued", account_id, params)
+
+    return jsonify({"queued": queued, "next": cursor, "account_id": account_id}), 200
+
+
+@api.route("/closed_positions/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("closed_positions")
+async def fetch_closed_positions(current_user, account_id):
+    """ METHOD PAGES THROUGH THE ACCOUNT'S CLOSED POSITIONS, SEE api.routes.fetch_closed_positions """
+
+    params = parseListingArgs(request.args)
+
+    await getAccount(current_user, account_id)
+
+    if params["format"] == "ndjson":
+
+        return ndjsonResponse(listings.listingCursor("closed_positions", account_id, params))
+
+    closed_positions, cursor = await listings.listingPage("closed_positions", account_id, params)
+
+    return jsonify({"closed_positions": closed_positions, "next": cursor, "account_id": account_id}), 200
+
+
+@api.route("/forbidden_symbols/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("forbidden_symbols")
+async def fetch_forbidden_symbols(current_user, account_id):
+
+    forbidden_symbols = await section("forbidden_symbols", current_user, account_id)
+
+    return jsonify({"forbidden_symbols": forbidden_symbols, "account_id": account_id}), 200
+
+
+@api.route("/best_performing_equities/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("best_performing_equities")
+async def fetch_best_performing_equities(current_user, account_id):
+
+    best_performing_equities = await section("best_performing_equities", current_user, account_id)
+
+    return jsonify({"best_performing_equities": best_performing_equities, "account_id": account_id}), 200
+
+
+@api.route("/worst_performing_equities/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("worst_performing_equities")
+async def fetch_worst_performing_equities(current_user, account_id):
+
+    worst_performing_equities = await section("worst_performing_equities", current_user, account_id)
+
+    return jsonify({"worst_performing_equities": worst_performing_equities, "account_id": account_id}), 200
+
+
+@api.route("/strategies/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("strategies")
+async def fetch_strategies(current_user, account_id):
+
+    strategies = await section("strategies", current_user, account_id)
+
+    return jsonify({"strategies": strategies, "account_id": account_id}), 200
+
+
+@api.route("/open_positions/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("open_positions")
+async def fetch_open_positions(current_user, account_id):
+
+    open_positions = await section("open_positions", current_user, account_id)
+
+    return jsonify({"open_positions": open_positions, "account_id": account_id}), 200
+
+##########################################################
+## COMPOSITE REQUESTS ####################################
+
+
+@api.route("/dashboard/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional()
+async def fetch_dashboard(current_user, account_id):
+    """ METHOD ASSEMBLES EVERY DASHBOARD WIDGET, ALL SECTIONS ARE AWAITED TOGETHER ONCE THE ACCOUNT IS LOADED
+    Query Params:
+        sections ([str]): OPTIONAL COMMA SEPARATED SECTION NAMES, DEFAULTS TO ALL SECTIONS
+    Returns:
+        [json]: ONE KEY PER SECTION, SAME PAYLOADS AS THE SINGLE WIDGET ROUTES
+    """
+
+    requested = request.args.get("sections")
+
+    if requested:
+
+        names = [name.strip() for name in requested.split(",") if name.strip()]
+
+    else:
+
+        names = list(sections.SECTIONS)
+
+    unknown = [name for name in names if name not in sections.SECTIONS]
+
+    if unknown:
+
+        return jsonify({"error": f"Unknown Sections {', '.join(unknown)}"}), 400
+
+    # ONE USERS LOOKUP SHARED BY EVERY SECTION, AWAITED FIRST SO AN UNKNOWN ACCOUNT FAILS BEFORE ANY SECTION STARTS
+    account = await getAccount(current_user, account_id)
+
+    results = await asyncio.gather(*[sections.SECTIONS[name](account, account_id, request.args) for name in names])
+
+    return jsonify({"dashboard": dict(zip(names, results)), "account_id": account_id}), 200
+
+##########################################################
+## EXPORTS ###############################################
+
+
+@api.route("/export/<account_id>/<dataset>", methods=["GET"])
+@exception_handler
+@token_required
+async def export_dataset(current_user, account_id, dataset):
+    """ METHOD STREAMS A WHOLE DATASET OF THE ACCOUNT AS A FILE, SEE api.routes.export_dataset """
+
+    await getAccount(current_user, account_id)
+
+    params = parseExportArgs(dataset, request.args)
+
+    response = Response(exports.exportChunks(exports.exportCursor(dataset, account_id, params), exportEncoder(dataset, params)),
+                        mimetype=EXPORT_FORMATS[params["format"]][0],
+                        headers={"Content-Disposition": f'attachment; filename="{exportFilename(dataset, account_id, params)}"'})
+
+    # MULTI-YEAR EXPORTS CAN OUTLAST THE DEFAULT RESPONSE TIMEOUT
+    response.timeout = None
+
+    return response
+
+##########################################################
+## STREAMS ###############################################
+
+
+@api.route("/stream/<account_id>", methods=["GET"])
+@exception_handler
+@token_required(query=True)
+async def stream_account(current_user, account_id):
+    """ METHOD STREAMS THE ACCOUNT'S CHANGES AS SERVER-SENT EVENTS, SEE api.routes.stream_account """
+
+    await getAccount(current_user, account_id)
+
+    subscriber = stream_hub.subscribe(account_id, asyncio.get_running_loop())
+
+    async def generate():
+
+        try:
+
+            async for message in stream_hub.messagesAsync(subscriber):
+
+                yield message
+
+        finally:
+
+            stream_hub.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    # THE STREAM IS OPEN FOR AS LONG AS THE CLIENT WANTS
+    response.timeout = None
+
+    return response
+
+##########################################################
+## PUT REQUESTS ##########################################
+
+
+@api.route("/change_account_status/<account_id>", methods=["PUT"])
+@exception_handler
+@token_required
+async def change_account_status(current_user, account_id):
+
+    await getAccount(current_user, account_id)
+
+    status = (await request.get_json())["account_status"]
+
+    status = status != "Active"
+
+    await async_mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
+        "$set": {f"Accounts.{account_id}.Active": status}})
+
+    await async_mongo.db.account_versions.update_one({"_id": account_id}, bumpUpdate(["users"]), upsert=True)
+
+    invalidateUser(current_user["id"]["$oid"])
+
+    return jsonify({"account_status": status, "account_id": account_id}), 201
+
+
+@api.route("/add_forbidden_symbol/<account_id>", methods=["PUT"])
+@exception_handler
+@token_required
+async def add_forbidden_symbol(current_user, account_id):
+
+    await getAccount(current_user, account_id)
+
+    symbol = (await request.get_json())["symbol"]
+
+    await async_mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
+        "$push": {f"Accounts.{account_id}.forbidden_symbols": symbol.upper()}})
+
+    await async_mongo.db.account_versions.update_one({"_id": account_id}, bumpUpdate(["users"]), upsert=True)
+
+    invalidateUser(current_user["id"]["$oid"])
+
+    return jsonify({"account_id": account_id}), 201
+
+
+@api.route("/update_strategy/<account_id>", methods=["PUT"])
+@exception_handler
+@token_required
+async def update_strategy(current_user, account_id):
+
+    await getAccount(current_user, account_id)
+
+    data = (await request.get_json())["data"]
+
+    strategy = data["Strategy"]
+
+    shares = data["Shares"]
+
+    status = data["Status"] == "Active"
+
+    await async_mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
+        "$set": {f"Accounts.{account_id}.Strategies.{strategy}": {"Active": status, "Shares": shares}}})
+
+    await async_mongo.db.account_versions.update_one({"_id": account_id}, bumpUpdate(["users"]), upsert=True)
+
+    invalidateUser(current_user["id"]["$oid"])
+
+    return jsonify({"account_id": account_id}), 201
+
+##########################################################
+## DELETE REQUESTS ##########################################
+
+
+@api.route("/remove_forbidden_symbol/<account_id>/<symbol>", methods=["DELETE"])
+@exception_handler
+@token_required
+async def remove_forbidden_symbol(current_user, account_id, symbol):
+
+    await getAccount(current_user, account_id)
+
+    await async_mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
+        "$pull": {f"Accounts.{account_id}.forbidden_symbols": symbol.upper()}})
+
+    await async_mongo.db.account_versions.update_one({"_id": account_id}, bumpUpdate(["users"]), upsert=True)
+
+    invalidateUser(current_user["id"]["$oid"])
+
+    return jsonify({"account_id": account_id}), 201
@@ -0,0 +1,213 @@
+import asyncio
+from api.helpers import parseWindows
+from api.rollups import HISTORY_VALUES, PERIODS, capRows, foldBuckets, mergeRollups, pendingRollupQuery, rollupName, rollupsQuery
+from api.sections import (BALANCE_PROJECTION, EQUITY_LOCK_STRIPES, HISTORY_PROJECTION, POSITION_PROJECTION, QUOTE_PROJECTION,
+                          downsampleHistory, equityPipeline, historyQuery, parseEquityArgs, parseHistoryArgs, positionsBook,
+                          quotesQuery, rankEquities, resolveWindowRates, strategyRows, windowRatesQuery)
+from api.strategy_stats import POSITION_FIELDS, aggregatedStats, foldPending, pendingQuery, strategyPipeline
+
+from extensions import async_mongo, equity_cache
+
+# ASYNC COUNTERPARTS OF api/sections.py FOR THE QUART APP. QUERIES AND MATH COME FROM THE SYNC MODULES, ONLY THE I/O IS AWAITED.
+# account IS THE ACCOUNT SUB-DOCUMENT, LOADED (AND ITS OWNERSHIP CHECKED) BY THE ROUTE BEFORE ANY SECTION STARTS.
+
+
+async def account_status(account, account_id, args):
+
+    return account["Active"]
+
+
+async def account_balance(account, account_id, args):
+
+    return account["Account_Balance"]
+
+
+async def window_rates(account, account_id, windows):
+    """ METHOD RESOLVES THE RATE OF RETURN FOR SEVERAL WINDOWS, SEE api.sections.window_rates """
+
+    today, starts, query = windowRatesQuery(account_id, windows)
+
+    history = await async_mongo.db.balance_history.find(query, BALANCE_PROJECTION).sort("Date", 1).to_list()
+
+    return resolveWindowRates(account["Account_Balance"], history, starts, today)
+
+
+async def rate_of_return(account, account_id, args):
+
+    return (await window_rates(account, account_id, ["30d"]))["30d"]["rate_of_return"]
+
+
+async def rates_of_return(account, account_id, args):
+
+    return await window_rates(account, account_id, parseWindows(args))
+
+
+async def number_of_holdings(account, account_id, args):
+
+    return await async_mongo.db.open_positions.count_documents({"Account_ID": int(account_id)})
+
+
+async def fetchRollups(collection, period, account_id, start, end):
+    """ METHOD RETURNS THE OHLC BUCKETS THAT OVERLAP [start, end], SEE api.rollups.fetchRollups """
+
+    value_field = HISTORY_VALUES[collection]
+
+    rollup = async_mongo.db[rollupName(collection, period)]
+
+    stored, latest = await asyncio.gather(
+        rollup.find(rollupsQuery(period, account_id, start, end), {"_id": 0}).sort("Period", 1).to_list(),
+        rollup.find_one({"Account_ID": account_id}, {"Last_Date": 1}, sort=[("Period", -1)]))
+
+    pending = await async_mongo.db[collection].find(pendingRollupQuery(
+        account_id, period, latest["Last_Date"] if latest else None, start, end),
+        {"_id": 0, "Date": 1, value_field: 1}).sort("Date", 1).to_list()
+
+    return mergeRollups(stored, foldBuckets(pending, period, value_field))
+
+
+async def history(collection, account_id, args):
+    """ METHOD RETURNS AN ACCOUNT'S HISTORY FOR THE REQUESTED DATE RANGE, SEE api.sections.history """
+
+    start, end, points, mode = parseHistoryArgs(args)
+
+    if mode in PERIODS:
+
+        buckets = await fetchRollups(collection, mode, int(account_id), start, end)
+
+        return capRows(buckets, points)
+
+    history = await async_mongo.db[collection].find(
+        historyQuery(account_id, start, end), HISTORY_PROJECTION).sort("Date", 1).to_list()
+
+    return downsampleHistory(collection, history, points)
+
+
+async def account_balance_history(account, account_id, args):
+
+    return await history("balance_history", account_id, args)
+
+
+async def profit_loss_history(account, account_id, args):
+
+    return await history("profit_loss_history", account_id, args)
+
+
+async def queued(account, account_id, args):
+
+    return await async_mongo.db.queue.find({"Account_ID": int(account_id)}).to_list()
+
+
+async def forbidden_symbols(account, account_id, args):
+
+    return account["forbidden_symbols"]
+
+
+# STRIPED LIKE api.sections.equity_locks
+equity_locks = [asyncio.Lock() for _ in range(EQUITY_LOCK_STRIPES)]
+
+
+async def symbol_performance(account_id, start, end):
+    """ METHOD SUMMARIZES CLOSED POSITIONS PER SYMBOL, SHARING equity_cache WITH THE SYNC APP, SEE api.sections.symbol_performance """
+
+    key = (int(account_id), start, end)
+
+    performance = equity_cache.get(key)
+
+    if performance is not None:
+
+        return performance
+
+    # CONCURRENT MISSES FOR THE SAME KEY (BEST AND WORST FROM ONE DASHBOARD) WAIT FOR ONE AGGREGATION
+    async with equity_locks[hash(key) % EQUITY_LOCK_STRIPES]:
+
+        performance = equity_cache.get(key)
+
+        if performance is not None:
+
+            return performance
+
+        cursor = await async_mongo.db.closed_positions.aggregate(
+            equityPipeline(account_id, start, end))
+
+        performance = {row.pop("_id"): row for row in await cursor.to_list()}
+
+        equity_cache.set(key, performance)
+
+    return performance
+
+
+async def ranked_equities(account_id, args, best):
+
+    k, field, start, end = parseEquityArgs(args)
+
+    return rankEquities(await symbol_performance(account_id, start, end), k, field, best)
+
+
+async def best_performing_equities(account, account_id, args):
+
+    return await ranked_equities(account_id, args, True)
+
+
+async def worst_performing_equities(account, account_id, args):
+
+    return await ranked_equities(account_id, args, False)
+
+
+async def fetchStrategyStats(account_id):
+    """ METHOD READS THE ACCOUNT'S ROLLUP AND FOLDS THE POSITIONS PAST ITS MARKS IN MEMORY, SEE api.strategy_stats.fetchStrategyStats """
+
+    account_id = int(account_id)
+
+    stats = {doc["Strategy"]: doc for doc in await async_mongo.db.strategy_stats.find(
+        {"Account_ID": account_id}).to_list()}
+
+    if not stats:
+
+        cursor = await async_mongo.db.closed_positions.aggregate(strategyPipeline(account_id), allowDiskUse=True)
+
+        return aggregatedStats(account_id, {row.pop("_id"): row for row in await cursor.to_list()})
+
+    async for position in async_mongo.db.closed_positions.find(pendingQuery(account_id, stats), POSITION_FIELDS).sort("_id", 1):
+
+        foldPending(stats, account_id, position)
+
+    return stats
+
+
+async def strategies(account, account_id, args):
+
+    return strategyRows(account, account_id, await fetchStrategyStats(account_id))
+
+
+async def open_positions(account, account_id, args):
+    """ METHOD VALUES THE ACCOUNT'S OPEN POSITIONS, SEE api.sections.open_positions """
+
+    positions = await async_mongo.db.open_positions.find(
+        {"Account_ID": int(account_id)}, POSITION_PROJECTION).to_list()
+
+    if not positions:
+
+        return []
+
+    quotes = {quote["Symbol"]: quote["Last_Price"] for quote in await async_mongo.db.quotes.find(
+        quotesQuery(positions), QUOTE_PROJECTION).to_list()}
+
+    return positionsBook(positions, quotes)
+
+
+# SECTION NAME -> BUILDER, SAME NAMES AS api.sections.SECTIONS
+SECTIONS = {
+    "account_status": account_status,
+    "account_balance": account_balance,
+    "rate_of_return": rate_of_return,
+    "rates_of_return": rates_of_return,
+    "number_of_holdings": number_of_holdings,
+    "account_balance_history": account_balance_history,
+    "profit_loss_history": profit_loss_history,
+    "queued": queued,
+    "forbidden_symbols": forbidden_symbols,
+    "best_performing_equities": best_performing_equities,
+    "worst_performing_equities": worst_performing_equities,
+    "strategies": strategies,
+    "open_positions": open_positions
+}
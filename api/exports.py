@@ -0,0 +1,333 @@
+import csv
+from datetime import date, datetime, timedelta
+import io
+
+from api.helpers import parseDate
+from extensions import mongo
+
+try:
+
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+except ImportError:
+
+    pyarrow = None
+
+# BULK EXPORTS OF ONE ACCOUNT'S DATASET AS csv, arrow (ARROW IPC STREAM) OR parquet (pyarrow IS NEEDED FOR THE LAST TWO).
+# THE CURSOR IS READ IN BATCHES OF EXPORT_BATCH_SIZE AND ENCODED EVERY EXPORT_CHUNK_ROWS ROWS, EACH CHUNK IS SENT AS SOON AS IT IS
+# ENCODED (ONE PARQUET ROW GROUP / ONE ARROW RECORD BATCH PER CHUNK), SO MEMORY STAYS AT ONE CHUNK WHATEVER THE DATE RANGE.
+
+# DATASET -> COLLECTION, DATE FIELD (datetime OR YYYY-MM-DD STRING), SORT, WHETHER ?strategy= APPLIES, COLUMNS (NAME, TYPE)
+# TYPES: string, float, datetime, date. MISSING FIELDS EXPORT AS EMPTY/NULL.
+EXPORTS = {
+    "closed_positions": {
+        "collection": "closed_positions",
+        "date_field": "Sell_Date",
+        "date_is_string": False,
+        "sort": [("Sell_Date", 1), ("_id", 1)],
+        "strategy": True,
+        "columns": [("Sell_Date", "datetime"), ("Strategy", "string"), ("Symbol", "string"), ("Qty", "float"),
+                    ("Buy_Price", "float"), ("Sell_Price", "float"), ("ROV", "float")]
+    },
+    "balance_history": {
+        "collection": "balance_history",
+        "date_field": "Date",
+        "date_is_string": True,
+        "sort": [("Date", 1)],
+        "strategy": False,
+        "columns": [("Date", "date"), ("Balance", "float")]
+    },
+    "profit_loss_history": {
+        "collection": "profit_loss_history",
+        "date_field": "Date",
+        "date_is_string": True,
+        "sort": [("Date", 1)],
+        "strategy": False,
+        "columns": [("Date", "date"), ("Profit_Loss", "float")]
+    }
+}
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet")
+}
+
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_CHUNK_ROWS = 10000
+
+
+def parseExportArgs(dataset, args):
+    """ METHOD VALIDATES THE DATASET AND READS format, start, end AND strategy, RAISES ValueError ON BAD INPUT
+    Returns:
+        [dict]: format, start, end (YYYY-MM-DD OR None), strategy (OR None)
+    """
+
+    if dataset not in EXPORTS:
+
+        raise ValueError(f"dataset Must Be One Of {', '.join(EXPORTS)}")
+
+    export_format = args.get("format", "csv")
+
+    if export_format not in EXPORT_FORMATS:
+
+        raise ValueError(f"format Must Be One Of {', '.join(EXPORT_FORMATS)}")
+
+    if export_format != "csv" and pyarrow is None:
+
+        raise ValueError(f"format {export_format} Needs pyarrow Installed")
+
+    if args.get("strategy") and not EXPORTS[dataset]["strategy"]:
+
+        raise ValueError(f"strategy Can't Filter {dataset}")
+
+    start = parseDate(args["start"]) if args.get("start") else None
+
+    end = parseDate(args["end"]) if args.get("end") else None
+
+    if start and end and start > end:
+
+        raise ValueError("start Must Be Before end")
+
+    return {"format": export_format, "start": start, "end": end, "strategy": args.get("strategy")}
+
+
+def exportQuery(dataset, account_id, params):
+    """ METHOD BUILDS THE FILTER OF AN EXPORT, end IS INCLUSIVE """
+
+    spec = EXPORTS[dataset]
+
+    query = {"Account_ID": int(account_id)}
+
+    if params["start"] or params["end"]:
+
+        condition = query[spec["date_field"]] = {}
+
+        if spec["date_is_string"]:
+
+            if params["start"]:
+
+                condition["$gte"] = params["start"]
+
+            if params["end"]:
+
+                condition["$lte"] = params["end"]
+
+        else:
+
+            if params["start"]:
+
+                condition["$gte"] = datetime.strptime(params["start"], "%Y-%m-%d")
+
+            if params["end"]:
+
+                condition["$lt"] = datetime.strptime(params["end"], "%Y-%m-%d") + timedelta(days=1)
+
+    if params["strategy"]:
+
+        query["Strategy"] = params["strategy"]
+
+    return query
+
+
+def exportProjection(dataset):
+
+    return {"_id": 0, **{name: 1 for name, _ in EXPORTS[dataset]["columns"]}}
+
+
+def exportFilename(dataset, account_id, params):
+
+    return f"{dataset}_{account_id}.{EXPORT_FORMATS[params['format']][1]}"
+
+
+def cellValue(value, column_type):
+    """ METHOD NORMALIZES ONE FIELD TO ITS COLUMN TYPE, None WHEN IT IS MISSING OR UNUSABLE """
+
+    if value is None:
+
+        return None
+
+    try:
+
+        if column_type == "float":
+
+            return float(value)
+
+        if column_type == "date":
+
+            return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+        if column_type == "datetime":
+
+            return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+    except (TypeError, ValueError):
+
+        return None
+
+    return str(value)
+
+
+class CsvEncoder:
+    """ CSV WITH A HEADER ROW, DATES AS ISO-8601 """
+
+    def __init__(self, columns):
+
+        self.columns = columns
+
+    def start(self):
+
+        return ",".join(name for name, _ in self.columns).encode() + b"\r\n"
+
+    def chunk(self, docs):
+
+        buffer = io.StringIO()
+
+        writer = csv.writer(buffer)
+
+        for doc in docs:
+
+            # NUMBERS AND STRINGS ARE WRITTEN AS STORED (Qty STAYS 3, NOT 3.0), ONLY DATES ARE NORMALIZED
+            row = [cellValue(doc.get(name), column_type) if column_type in ("date", "datetime") else doc.get(name)
+                   for name, column_type in self.columns]
+
+            writer.writerow(["" if value is None else value.isoformat() if isinstance(value, date) else value
+                             for value in row])
+
+        return buffer.getvalue().encode()
+
+    def finish(self):
+
+        return b""
+
+
+class ChunkSink:
+    """ WRITE-ONLY FILE THE ARROW WRITERS WRITE INTO, DRAINED AFTER EVERY CHUNK """
+
+    def __init__(self):
+
+        self.parts = []
+
+        self.closed = False
+
+    def write(self, data):
+
+        self.parts.append(bytes(data))
+
+        return len(data)
+
+    def flush(self):
+
+        pass
+
+    def close(self):
+
+        self.closed = True
+
+    def drain(self):
+
+        data = b"".join(self.parts)
+
+        self.parts = []
+
+        return data
+
+
+class ArrowEncoder:
+    """ ARROW IPC STREAM (ONE RECORD BATCH PER CHUNK) OR PARQUET (ONE ROW GROUP PER CHUNK) """
+
+    ARROW_TYPES = {
+        "string": lambda: pyarrow.string(),
+        "float": lambda: pyarrow.float64(),
+        "date": lambda: pyarrow.date32(),
+        "datetime": lambda: pyarrow.timestamp("ms")
+    }
+
+    def __init__(self, columns, parquet=False):
+
+        self.columns = columns
+
+        self.schema = pyarrow.schema([(name, self.ARROW_TYPES[column_type]()) for name, column_type in columns])
+
+        self.sink = ChunkSink()
+
+        if parquet:
+
+            self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+        else:
+
+            self.writer = pyarrow.ipc.new_stream(self.sink, self.schema)
+
+    def start(self):
+
+        return self.sink.drain()
+
+    def chunk(self, docs):
+
+        batch = pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array([cellValue(doc.get(name), column_type) for doc in docs], type=self.schema.field(name).type)
+             for name, column_type in self.columns], schema=self.schema)
+
+        self.writer.write_batch(batch)
+
+        return self.sink.drain()
+
+    def finish(self):
+
+        self.writer.close()
+
+        return self.sink.drain()
+
+
+def exportEncoder(dataset, params):
+
+    columns = EXPORTS[dataset]["columns"]
+
+    if params["format"] == "csv":
+
+        return CsvEncoder(columns)
+
+    return ArrowEncoder(columns, parquet=params["format"] == "parquet")
+
+
+def exportCursor(dataset, account_id, params):
+
+    spec = EXPORTS[dataset]
+
+    return mongo.db[spec["collection"]].find(
+        exportQuery(dataset, account_id, params), exportProjection(dataset),
+        batch_size=EXPORT_BATCH_SIZE).sort(spec["sort"])
+
+
+def exportChunks(cursor, encoder):
+    """ METHOD YIELDS THE ENCODED EXPORT CHUNK BY CHUNK, CLOSING THE CURSOR IF THE CLIENT GOES AWAY """
+
+    try:
+
+        yield encoder.start()
+
+        docs = []
+
+        for doc in cursor:
+
+            docs.append(doc)
+
+            if len(docs) >= EXPORT_CHUNK_ROWS:
+
+                yield encoder.chunk(docs)
+
+                docs = []
+
+        if docs:
+
+            yield encoder.chunk(docs)
+
+        yield encoder.finish()
+
+    finally:
+
+        cursor.close()
@@ -1,37 +1,136 @@
-import statistics
+from datetime import datetime, timedelta
 
+# RANGE QUERY PARAM -> NUMBER OF DAYS, None MEANS NO LOWER BOUND
+DATE_RANGES = {
+    "7d": 7,
+    "30d": 30,
+    "90d": 90,
+    "1y": 365,
+    "all": None
+}
 
-def maxDrawDown(value):
 
-    try:
+# RATE OF RETURN WINDOW -> NUMBER OF DAYS, None MEANS YEAR TO DATE
+RETURN_WINDOWS = {
+    "1d": 1,
+    "7d": 7,
+    "30d": 30,
+    "90d": 90,
+    "ytd": None,
+    "1y": 365
+}
 
-        # FIND MAX VALUE IN LIST
-        max_value = max(value["Drawdowns"])
 
-        # GET INDEX OF THAT VALUE
-        max_index = value["Drawdowns"].index(max_value)
+def parseDate(value):
+    """ METHOD VALIDATES A YYYY-MM-DD QUERY PARAM, RAISES ValueError IF IT IS MALFORMED """
 
-        # SEARCH FOR THE MIN FROM MAX INDEX TO THE END OF LIST
-        min_value = min(value["Drawdowns"][max_index:])
+    return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
 
-        return round(
-            max_value - min_value, 2)
 
-    except:
+def parseDateRange(args, default="7d"):
+    """ METHOD READS start/end OR range FROM THE QUERY PARAMS
+    Args:
+        args ([dict]): REQUEST ARGS. start AND end ARE YYYY-MM-DD, range IS ONE OF DATE_RANGES
+        default ([str]): RANGE USED WHEN NOTHING IS PASSED
+    Returns:
+        [tuple]: (START, END) AS YYYY-MM-DD STRINGS, EITHER CAN BE None FOR AN OPEN BOUND
+    """
 
-        return 0
+    if args.get("start") or args.get("end"):
 
+        start = parseDate(args["start"]) if args.get("start") else None
 
-def sharpeRatio(value):
+        end = parseDate(args["end"]) if args.get("end") else None
 
-    try:
+        if start and end and start > end:
 
-        standard_dev = statistics.stdev(value["Avg_ROV"])
+            raise ValueError("start Must Be Before end")
 
-        avg_trade_returns = statistics.mean(value["Avg_ROV"])
+        return start, end
 
-        return round(avg_trade_returns / standard_dev, 2)
+    date_range = args.get("range", default)
 
-    except:
+    if date_range not in DATE_RANGES:
 
-        return 0
+        raise ValueError(
+            f"range Must Be One Of {', '.join(DATE_RANGES)}")
+
+    days = DATE_RANGES[date_range]
+
+    if days is None:
+
+        return None, None
+
+    return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"), None
+
+
+def dateQuery(start, end):
+    """ METHOD BUILDS THE Date CONDITION FOR A (START, END) RANGE, None WHEN THE RANGE IS UNBOUNDED """
+
+    condition = {}
+
+    if start:
+
+        condition["$gte"] = start
+
+    if end:
+
+        condition["$lte"] = end
+
+    return condition or None
+
+
+def parsePositiveInt(args, name, default=None):
+    """ METHOD READS AN OPTIONAL INTEGER QUERY PARAM, RAISES ValueError UNLESS IT IS A POSITIVE INTEGER """
+
+    value = args.get(name)
+
+    if value in (None, ""):
+
+        return default
+
+    if not str(value).isdigit() or int(value) < 1:
+
+        raise ValueError(f"{name} Must Be A Positive Integer")
+
+    return int(value)
+
+
+def parsePoints(args):
+    """ METHOD READS THE OPTIONAL points QUERY PARAM """
+
+    return parsePositiveInt(args, "points")
+
+
+def parseWindows(args):
+    """ METHOD READS THE OPTIONAL COMMA SEPARATED windows QUERY PARAM, DEFAULTS TO EVERY WINDOW IN RETURN_WINDOWS """
+
+    windows = args.get("windows")
+
+    if not windows:
+
+        return list(RETURN_WINDOWS)
+
+    windows = [window.strip().lower()
+               for window in windows.split(",") if window.strip()]
+
+    unknown = [window for window in windows if window not in RETURN_WINDOWS]
+
+    if unknown:
+
+        raise ValueError(
+            f"windows Must Be Some Of {', '.join(RETURN_WINDOWS)}")
+
+    return windows
+
+
+def windowStart(window, today):
+    """ METHOD RETURNS THE DATE A RATE OF RETURN WINDOW STARTS ON """
+
+    days = RETURN_WINDOWS[window]
+
+    if days is None:
+
+        return today.replace(month=1, day=1)
+
+    return today - timedelta(days=days)
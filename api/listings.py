@@ -0,0 +1,186 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+from bson import json_util
+from bson.errors import InvalidId
+
+from api.helpers import parseDate, parsePositiveInt
+from extensions import mongo
+from extensions.json_provider import dumpJson
+
+# KEYSET (CURSOR) PAGINATION OVER ONE ACCOUNT'S DOCUMENTS. A PAGE IS limit DOCUMENTS IN THE LISTING'S SORT ORDER,
+# next IS AN OPAQUE CURSOR HOLDING THE SORT KEYS OF THE LAST ONE, PASSED BACK AS ?after=. EVERY PAGE IS ONE INDEXED RANGE SCAN,
+# HOWEVER DEEP, UNLIKE skip(). format=ndjson STREAMS EVERY MATCHING DOCUMENT (FROM after, UP TO limit IF GIVEN) ONE PER LINE
+# AS THE CURSOR YIELDS THEM, SO A FULL EXPORT RUNS IN CONSTANT MEMORY.
+
+# LISTING -> COLLECTION, SORT (THE LAST KEY IS ALWAYS _id SO THE ORDER IS TOTAL), PROJECTION AND OPTIONAL DATE FIELD FOR start/end
+LISTINGS = {
+    "queued": {
+        "collection": "queue",
+        "sort": [("_id", 1)],
+        "projection": {"Trader": 0, "Account_ID": 0},
+        "date_field": None
+    },
+    "closed_positions": {
+        "collection": "closed_positions",
+        "sort": [("Sell_Date", -1), ("_id", -1)],
+        "projection": {"Trader": 0, "Account_ID": 0},
+        "date_field": "Sell_Date"
+    }
+}
+
+DEFAULT_PAGE_SIZE = 100
+
+MAX_PAGE_SIZE = 1000
+
+# DOCUMENTS PER getMore WHEN STREAMING, BIG ENOUGH TO AMORTIZE THE ROUND TRIP, SMALL ENOUGH TO KEEP THE FIRST LINE QUICK
+STREAM_BATCH_SIZE = 500
+
+FORMATS = ("json", "ndjson")
+
+
+def encodeCursor(listing, doc):
+    """ METHOD PACKS THE SORT KEYS OF A DOCUMENT INTO AN URL SAFE CURSOR """
+
+    values = [doc.get(field) for field, _ in LISTINGS[listing]["sort"]]
+
+    return base64.urlsafe_b64encode(dumpJson(values)).decode().rstrip("=")
+
+
+def decodeCursor(listing, cursor):
+    """ METHOD UNPACKS A CURSOR FROM encodeCursor, RAISES ValueError IF IT IS MALFORMED """
+
+    try:
+
+        values = json_util.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+    except (ValueError, TypeError, binascii.Error, InvalidId):
+
+        raise ValueError("Invalid after Cursor")
+
+    if not isinstance(values, list) or len(values) != len(LISTINGS[listing]["sort"]):
+
+        raise ValueError("Invalid after Cursor")
+
+    return values
+
+
+def parseListingArgs(args):
+    """ METHOD READS limit, after, format, start AND end
+    Returns:
+        [dict]: limit (None = EVERYTHING, ONLY FOR ndjson AND THE LEGACY queued LIST), after, format, start, end
+    """
+
+    listing_format = args.get("format", "json")
+
+    if listing_format not in FORMATS:
+
+        raise ValueError(f"format Must Be One Of {', '.join(FORMATS)}")
+
+    limit = parsePositiveInt(args, "limit")
+
+    if limit and limit > MAX_PAGE_SIZE and listing_format == "json":
+
+        raise ValueError(f"limit Must Be At Most {MAX_PAGE_SIZE}")
+
+    start = parseDate(args["start"]) if args.get("start") else None
+
+    end = parseDate(args["end"]) if args.get("end") else None
+
+    return {"limit": limit, "after": args.get("after"), "format": listing_format, "start": start, "end": end}
+
+
+def keysetCondition(sort, values):
+    """ METHOD BUILDS THE "STRICTLY AFTER values IN sort ORDER" FILTER, e.g. (a < A) OR (a = A AND _id < ID) """
+
+    branches = []
+
+    for index, (field, direction) in enumerate(sort):
+
+        branch = {previous: values[position] for position, (previous, _) in enumerate(sort[:index])}
+
+        branch[field] = {"$gt" if direction == 1 else "$lt": values[index]}
+
+        branches.append(branch)
+
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def listingQuery(listing, account_id, params):
+    """ METHOD BUILDS THE FILTER OF ONE PAGE
+    Args:
+        listing ([str]): KEY OF LISTINGS
+        account_id ([str]): ACCOUNT ID
+        params ([dict]): SEE parseListingArgs
+    Returns:
+        [dict]: MONGO FILTER
+    """
+
+    spec = LISTINGS[listing]
+
+    query = {"Account_ID": int(account_id)}
+
+    # THE DATE FIELD IS A DATETIME, end IS INCLUSIVE
+    if spec["date_field"] and (params["start"] or params["end"]):
+
+        query[spec["date_field"]] = {}
+
+        if params["start"]:
+
+            query[spec["date_field"]]["$gte"] = datetime.strptime(params["start"], "%Y-%m-%d")
+
+        if params["end"]:
+
+            query[spec["date_field"]]["$lt"] = datetime.strptime(params["end"], "%Y-%m-%d") + timedelta(days=1)
+
+    if params["after"]:
+
+        query.update(keysetCondition(spec["sort"], decodeCursor(listing, params["after"])))
+
+    return query
+
+
+def listingPage(listing, account_id, params):
+    """ METHOD READS ONE PAGE, ONE EXTRA DOCUMENT TELLS WHETHER ANOTHER PAGE EXISTS
+    Returns:
+        [tuple]: (DOCUMENTS, NEXT CURSOR OR None)
+    """
+
+    spec = LISTINGS[listing]
+
+    limit = params["limit"] or DEFAULT_PAGE_SIZE
+
+    docs = list(mongo.db[spec["collection"]].find(
+        listingQuery(listing, account_id, params), spec["projection"]).sort(spec["sort"]).limit(limit + 1))
+
+    if len(docs) <= limit:
+
+        return docs, None
+
+    return docs[:limit], encodeCursor(listing, docs[limit - 1])
+
+
+def listingCursor(listing, account_id, params):
+    """ METHOD OPENS THE CURSOR format=ndjson STREAMS FROM """
+
+    spec = LISTINGS[listing]
+
+    cursor = mongo.db[spec["collection"]].find(
+        listingQuery(listing, account_id, params), spec["projection"],
+        batch_size=STREAM_BATCH_SIZE).sort(spec["sort"])
+
+    return cursor.limit(params["limit"]) if params["limit"] else cursor
+
+
+def ndjsonLines(cursor):
+    """ METHOD YIELDS ONE JSON LINE PER DOCUMENT, CLOSING THE CURSOR IF THE CLIENT GOES AWAY """
+
+    try:
+
+        for doc in cursor:
+
+            yield dumpJson(doc) + b"\n"
+
+    finally:
+
+        cursor.close()
@@ -0,0 +1,58 @@
+from flask import g
+from bson.objectid import ObjectId
+
+from extensions import mongo, user_cache
+
+# A CACHED USER DOCUMENT IS DROPPED BY THE WRITE ROUTES OF THIS PROCESS (invalidateUser), BY THE CONDITIONAL ROUTES WHEN THE
+# ACCOUNT'S "users" VERSION MOVED (api/versions.py) AND BY THE STREAM HUB. A WRITE FROM ANOTHER WORKER OR THE TRADING BOT IS
+# OTHERWISE SEEN AFTER AT MOST USER_CACHE_TTL SECONDS.
+
+
+def getUser(current_user):
+    """ METHOD LOADS THE USER DOCUMENT, MEMOIZED PER REQUEST AND CACHED PER PROCESS (SEE USER_CACHE_TTL)
+        THE RETURNED DOCUMENT IS SHARED, CALLERS MUST NOT MUTATE IT
+    Args:
+        current_user ([dict]): DECODED USER FROM THE ACCESS TOKEN
+    Returns:
+        [dict]: USER DOCUMENT
+    """
+
+    user_id = current_user["id"]["$oid"]
+
+    if "users" not in g:
+
+        g.users = {}
+
+    if user_id in g.users:
+
+        return g.users[user_id]
+
+    user = user_cache.get(user_id)
+
+    if user is None:
+
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+
+        if user is not None:
+
+            user_cache.set(user_id, user)
+
+    g.users[user_id] = user
+
+    return user
+
+
+def getAccount(current_user, account_id):
+    """ METHOD RETURNS ONE ACCOUNT FROM THE USER DOCUMENT, RAISES KeyError IF THE ACCOUNT DOESN'T EXIST """
+
+    return getUser(current_user)["Accounts"][account_id]
+
+
+def invalidateUser(user_id):
+    """ METHOD DROPS A USER DOCUMENT FROM THE PROCESS CACHE AND THE REQUEST, CALLED BY THE WRITE ROUTES AFTER THEIR UPDATE """
+
+    user_cache.pop(user_id)
+
+    if "users" in g:
+
+        g.users.pop(user_id, None)
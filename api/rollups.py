@@ -0,0 +1,357 @@
+from datetime import datetime, timedelta
+import time
+import click
+from flask.cli import with_appcontext
+from pymongo import UpdateOne
+
+from assets.logger import Logger
+from extensions import mongo
+
+logger = Logger()
+
+# WEEKLY AND MONTHLY OHLC ROLLUPS OF THE DAILY HISTORY COLLECTIONS, STORED IN <collection>_weekly AND <collection>_monthly.
+# ONE DOCUMENT PER (Account_ID, Period), Period IS THE YYYY-MM-DD THE BUCKET STARTS ON.
+# A REFRESH ONLY READS DAILY DOCUMENTS NEWER THAN THE LAST ROLLED UP Date. EVERY UPDATE MERGES ITS BUCKET INTO THE STORED ONE BY DATE
+# (Open ONLY FROM AN EARLIER First_Date, Close ONLY FROM A LATER OR EQUAL Last_Date, High/Low BY $max/$min), SO REPLAYED, RACING OR
+# OUT OF ORDER REFRESHES CONVERGE ON THE SAME DOCUMENT.
+# REFRESHES RUN FROM "flask --app run refresh-history-rollups" (ONCE, OR --every SECONDS), NEVER ON A GET. READS MERGE THE DAILY
+# DOCUMENTS NOT ROLLED UP YET IN MEMORY, SO THEY ARE CURRENT HOWEVER FAR BEHIND THE LAST REFRESH IS.
+
+# HISTORY COLLECTION -> FIELD HOLDING THE DAILY VALUE
+HISTORY_VALUES = {
+    "balance_history": "Balance",
+    "profit_loss_history": "Profit_Loss"
+}
+
+PERIODS = {
+    "week": "weekly",
+    "month": "monthly"
+}
+
+
+def periodStart(date, period):
+    """ METHOD RETURNS THE YYYY-MM-DD THE WEEK (MONDAY) OR MONTH CONTAINING date STARTS ON """
+
+    day = datetime.strptime(date, "%Y-%m-%d")
+
+    if period == "week":
+
+        day -= timedelta(days=day.weekday())
+
+    else:
+
+        day = day.replace(day=1)
+
+    return day.strftime("%Y-%m-%d")
+
+
+def rollupName(collection, period):
+
+    return f"{collection}_{PERIODS[period]}"
+
+
+def rollupCollection(collection, period):
+
+    return mongo.db[rollupName(collection, period)]
+
+
+def lastRolledDate(collection, period, account_id):
+
+    latest = rollupCollection(collection, period).find_one(
+        {"Account_ID": account_id}, {"Last_Date": 1}, sort=[("Period", -1)])
+
+    return latest["Last_Date"] if latest else None
+
+
+def foldBuckets(history, period, value_field, after=None):
+    """ METHOD FOLDS DAILY DOCUMENTS (SORTED BY Date) INTO OHLC BUCKETS, SKIPPING DATES ON OR BEFORE after """
+
+    buckets = {}
+
+    for doc in history:
+
+        value = doc.get(value_field)
+
+        if value is None or (after and doc["Date"] <= after):
+
+            continue
+
+        key = periodStart(doc["Date"], period)
+
+        if key not in buckets:
+
+            buckets[key] = {"Open": value, "High": value, "Low": value,
+                            "Close": value, "First_Date": doc["Date"], "Last_Date": doc["Date"]}
+
+            continue
+
+        bucket = buckets[key]
+
+        bucket["High"] = max(bucket["High"], value)
+
+        bucket["Low"] = min(bucket["Low"], value)
+
+        bucket["Close"] = value
+
+        bucket["Last_Date"] = doc["Date"]
+
+    return buckets
+
+
+def bucketOperations(account_id, buckets):
+    """ METHOD BUILDS THE UPSERTS THAT MERGE buckets INTO THE STORED ROLLUP (PIPELINE UPDATES, THE $cond GUARDS NEED THE STORED DATES) """
+
+    return [UpdateOne(
+        {"Account_ID": account_id, "Period": key},
+        [{"$set": {
+            "Open": {"$cond": [{"$lte": [bucket["First_Date"], {"$ifNull": ["$First_Date", bucket["First_Date"]]}]},
+                               bucket["Open"], "$Open"]},
+            "First_Date": {"$min": ["$First_Date", bucket["First_Date"]]},
+            "High": {"$max": ["$High", bucket["High"]]},
+            "Low": {"$min": ["$Low", bucket["Low"]]},
+            "Close": {"$cond": [{"$gte": [bucket["Last_Date"], {"$ifNull": ["$Last_Date", bucket["Last_Date"]]}]},
+                                bucket["Close"], "$Close"]},
+            "Last_Date": {"$max": ["$Last_Date", bucket["Last_Date"]]}
+        }}], upsert=True) for key, bucket in buckets.items()]
+
+
+def mergeBucket(stored, bucket):
+    """ METHOD MERGES A FRESHLY FOLDED BUCKET INTO A STORED ONE IN MEMORY, SAME RULES AS bucketOperations """
+
+    if stored is None:
+
+        return dict(bucket)
+
+    return {
+        "Open": bucket["Open"] if bucket["First_Date"] <= stored["First_Date"] else stored["Open"],
+        "First_Date": min(stored["First_Date"], bucket["First_Date"]),
+        "High": max(stored["High"], bucket["High"]),
+        "Low": min(stored["Low"], bucket["Low"]),
+        "Close": bucket["Close"] if bucket["Last_Date"] >= stored["Last_Date"] else stored["Close"],
+        "Last_Date": max(stored["Last_Date"], bucket["Last_Date"])
+    }
+
+
+def saveBuckets(collection, period, account_id, buckets):
+
+    operations = bucketOperations(account_id, buckets)
+
+    if operations:
+
+        rollupCollection(collection, period).bulk_write(operations, ordered=True)
+
+
+def pendingHistoryQuery(account_id, last_dates):
+    """ METHOD BUILDS THE DAILY HISTORY QUERY FOR DOCUMENTS NOT YET IN EVERY ROLLUP
+    Args:
+        account_id ([int]): ACCOUNT ID
+        last_dates ([dict]): PERIOD -> LAST ROLLED UP Date, None IF THE ROLLUP IS EMPTY
+    """
+
+    query = {"Account_ID": account_id}
+
+    if all(last_dates.values()):
+
+        query["Date"] = {"$gt": min(last_dates.values())}
+
+    return query
+
+
+def refreshRollups(collection, account_id):
+    """ METHOD FOLDS DAILY DOCUMENTS NEWER THAN THE LAST ROLLED UP Date INTO THE WEEKLY AND MONTHLY ROLLUPS
+    Args:
+        collection ([str]): balance_history OR profit_loss_history
+        account_id ([int]): ACCOUNT ID
+    """
+
+    value_field = HISTORY_VALUES[collection]
+
+    last_dates = {period: lastRolledDate(
+        collection, period, account_id) for period in PERIODS}
+
+    history = list(mongo.db[collection].find(
+        pendingHistoryQuery(account_id, last_dates), {"_id": 0, "Date": 1, value_field: 1}).sort("Date", 1))
+
+    for period, last_date in last_dates.items():
+
+        saveBuckets(collection, period, account_id,
+                    foldBuckets(history, period, value_field, last_date))
+
+
+def rollupsQuery(period, account_id, start, end):
+    """ METHOD BUILDS THE QUERY FOR THE BUCKETS THAT OVERLAP [start, end] """
+
+    query = {"Account_ID": account_id}
+
+    condition = {}
+
+    if start:
+
+        condition["$gte"] = periodStart(start, period)
+
+    if end:
+
+        condition["$lte"] = end
+
+    if condition:
+
+        query["Period"] = condition
+
+    return query
+
+
+def bucketRow(bucket):
+
+    return {
+        "Date": bucket["Period"],
+        "Open": bucket["Open"],
+        "High": bucket["High"],
+        "Low": bucket["Low"],
+        "Close": bucket["Close"]
+    }
+
+
+def pendingRollupQuery(account_id, period, last_date, start, end):
+    """ METHOD BUILDS THE DAILY HISTORY QUERY FOR THE DOCUMENTS PAST last_date THAT FALL IN THE BUCKETS OVERLAPPING [start, end] """
+
+    query = {"Account_ID": account_id}
+
+    condition = {}
+
+    if last_date:
+
+        condition["$gt"] = last_date
+
+    if start:
+
+        condition["$gte"] = periodStart(start, period)
+
+    if end:
+
+        condition["$lte"] = end
+
+    if condition:
+
+        query["Date"] = condition
+
+    return query
+
+
+def mergeRollups(stored, pending):
+    """ METHOD MERGES THE BUCKETS FOLDED FROM THE PENDING DAILY DOCUMENTS INTO THE STORED ONES
+    Args:
+        stored ([list]): ROLLUP DOCUMENTS AS READ
+        pending ([dict]): PERIOD -> BUCKET, SEE foldBuckets
+    Returns:
+        [list]: {Date, Open, High, Low, Close} SORTED BY Date
+    """
+
+    buckets = {bucket["Period"]: bucket for bucket in stored}
+
+    for key, bucket in pending.items():
+
+        buckets[key] = {**mergeBucket(buckets.get(key), bucket), "Period": key}
+
+    return [bucketRow(buckets[key]) for key in sorted(buckets)]
+
+
+def capRows(rows, points):
+    """ METHOD MERGES RUNS OF ADJACENT ROWS SO AT MOST points ARE LEFT AND THE WHOLE RANGE IS STILL COVERED
+    Args:
+        rows ([list]): {Date, Open, High, Low, Close} SORTED BY Date, SEE mergeRollups
+        points ([int]): MAX NUMBER OF ROWS, None KEEPS THEM ALL
+    Returns:
+        [list]: MERGED ROWS, EACH DATED BY THE FIRST ROW IT COVERS
+    """
+
+    if not points or len(rows) <= points:
+
+        return rows
+
+    size = -(-len(rows) // points)
+
+    capped = []
+
+    for index in range(0, len(rows), size):
+
+        merged = None
+
+        for row in rows[index:index + size]:
+
+            merged = mergeBucket(merged, {**row, "First_Date": row["Date"], "Last_Date": row["Date"]})
+
+        capped.append(bucketRow({**merged, "Period": rows[index]["Date"]}))
+
+    return capped
+
+
+def fetchRollups(collection, period, account_id, start, end):
+    """ METHOD RETURNS THE OHLC BUCKETS THAT OVERLAP [start, end], READ ONLY
+    Returns:
+        [list]: {Date, Open, High, Low, Close} SORTED BY Date
+    """
+
+    value_field = HISTORY_VALUES[collection]
+
+    stored = list(rollupCollection(collection, period).find(
+        rollupsQuery(period, account_id, start, end), {"_id": 0}).sort("Period", 1))
+
+    pending = mongo.db[collection].find(pendingRollupQuery(
+        account_id, period, lastRolledDate(collection, period, account_id), start, end),
+        {"_id": 0, "Date": 1, value_field: 1}).sort("Date", 1)
+
+    return mergeRollups(stored, foldBuckets(pending, period, value_field))
+
+
+def refreshAllRollups():
+
+    for collection in HISTORY_VALUES:
+
+        for account_id in mongo.db[collection].distinct("Account_ID"):
+
+            try:
+
+                refreshRollups(collection, account_id)
+
+            except Exception:
+
+                logger.ERROR(
+                    f"History Rollup Refresh Failed - COLLECTION:{collection} ACCOUNT ID:{account_id}")
+
+
+@click.command("refresh-history-rollups")
+@click.option("--every", type=float, default=0, help="Seconds between passes, 0 runs one pass and exits (for cron).")
+@with_appcontext
+def refresh_history_rollups_command(every):
+    """ Fold new daily history into the weekly and monthly rollups. """
+
+    while True:
+
+        refreshAllRollups()
+
+        if not every:
+
+            return
+
+        time.sleep(every)
+
+
+@click.command("rebuild-history-rollups")
+@click.option("--account-id", "account_ids", type=int, multiple=True, help="Account ID to rebuild, defaults to every account with history.")
+@with_appcontext
+def rebuild_history_rollups_command(account_ids):
+    """ Rebuild the weekly and monthly history rollups. """
+
+    for collection in HISTORY_VALUES:
+
+        for account_id in account_ids or mongo.db[collection].distinct("Account_ID"):
+
+            for period in PERIODS:
+
+                rollupCollection(collection, period).delete_many(
+                    {"Account_ID": account_id})
+
+            refreshRollups(collection, account_id)
+
+            logger.INFO(
+                f"Rebuilt History Rollups - COLLECTION:{collection} ACCOUNT ID:{account_id}")
@@ -1,20 +1,25 @@
 import json
 from typing import Type
-from flask import Blueprint, current_app, request
+from flask import Blueprint, Response, current_app, request
 from assets.logger import Logger
 from flask import jsonify
 from flask_cors import cross_origin
-import jwt
 from functools import wraps
 from datetime import datetime, timedelta
-import statistics
 from pprint import pprint
 from bson.objectid import ObjectId
 import uuid
-from api.helpers import maxDrawDown, sharpeRatio
+from concurrent.futures import ThreadPoolExecutor
+from api import sections
+from api.helpers import parseWindows
+from api.exports import EXPORT_FORMATS, exportChunks, exportCursor, exportEncoder, exportFilename, parseExportArgs
+from api.listings import listingCursor, listingPage, ndjsonLines, parseListingArgs
+from api.loaders import getAccount, getUser, invalidateUser
+from api.versions import bumpVersions, conditional
+from auth.tokens import token_required
 
 from assets.current_datetime import getDatetime
-from extensions import mongo
+from extensions import mongo, stream_hub
 
 logger = Logger()
 
@@ -23,49 +28,12 @@ api = Blueprint("api", __name__, url_prefix="/api")
 logger = Logger()
 
 
-def token_required(f):
-    """ METHOD IS A DECORATOR THATS CHECKS IF TOKEN IS VALID
-    Args:
-        f ([function]): FUNCTION THAT IS BEING CALLED
-    Returns:
-        [function]: FUNCTION THAT IS BEING CALLED
-    """
-
-    @wraps(f)
-    def decorated(*args, **kwargs):
-
-        token = None
-
-        if "x-access-token" in request.headers:
-
-            token = request.headers["x-access-token"]
-
-            try:
-
-                current_user = jwt.decode(
-                    token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
-
-            except jwt.ExpiredSignatureError as e:
-
-                logger.WARNING("Token Expired")
-
-                return jsonify({"error": "Token Expired"}), 401
-
-            except jwt.DecodeError as e:
-
-                logger.WARNING("Token Decode Error")
-
-                return jsonify({"error": "Token Decode Error"}), 401
-
-            return f(current_user["user"], *args, **kwargs)
-
-        return jsonify({"error": "Token Does Not Exist"}), 401
-
-    return decorated
-
-
 def exception_handler(func):
+    """ METHOD IS A DECORATOR THAT TURNS A ROUTE'S EXCEPTIONS INTO JSON ERRORS, GOES BELOW @api.route SO FLASK REGISTERS THE WRAPPER
+        KeyError (UNKNOWN ACCOUNT) AND ValueError (BAD QUERY PARAMS) ARE 400s
+    """
 
+    @wraps(func)
     def wrapper(*args, **kwargs):
 
         account_id = kwargs["account_id"]
@@ -78,12 +46,18 @@ def exception_handler(func):
 
             return jsonify({"error": f"Account ID {account_id} Not Found"}), 400
 
+        except ValueError as e:
+
+            return jsonify({"error": str(e)}), 400
+
         except TypeError:
 
             return jsonify({"error": "ERROR"}), 400
 
         except Exception:
 
+            logger.ERROR(f"Route Failed - {request.path}")
+
             return jsonify({"error": "ERROR"}), 500
 
     return wrapper
@@ -92,435 +66,396 @@ def exception_handler(func):
 ## GET REQUESTS ##########################################
 
 
-@exception_handler
 @api.route("/account_status/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("account_status")
 def fetch_account_status(current_user, account_id):
 
-    # query the user collection for account status
-    status = mongo.db.users.find_one({"_id": ObjectId(current_user["id"]["$oid"])})[
-        "Accounts"][account_id]["Active"]
+    account = getAccount(current_user, account_id)
 
-    return jsonify({"account_status": status, "account_id": account_id}), 200
+    account_status = sections.account_status(account, account_id, request.args)
+
+    return jsonify({"account_status": account_status, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/account_balance/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("account_balance")
 def fetch_account_balance(current_user, account_id):
 
-    # query the user collection for account balance
-    balance = mongo.db.users.find_one({"_id": ObjectId(current_user["id"]["$oid"])})[
-        "Accounts"][account_id]["Account_Balance"]
+    account = getAccount(current_user, account_id)
 
-    return jsonify({"account_balance": balance, "account_id": account_id}), 200
+    account_balance = sections.account_balance(account, account_id, request.args)
+
+    return jsonify({"account_balance": account_balance, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/rate_of_return/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("rate_of_return", "rates_of_return")
 def fetch_rate_of_return(current_user, account_id):
-    # (Current Account Balance - Account Balance from 30 days ago)/(Account balance from 30 days ago) * 12 [if you want yearly RoR]
-    # query the user collection for account balance
-    balance = mongo.db.users.find_one({"_id": ObjectId(current_user["id"]["$oid"])})[
-        "Accounts"][account_id]["Account_Balance"]
 
-    # date 30 days ago
-    days_ago = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    account = getAccount(current_user, account_id)
 
-    balance_history = mongo.db.balance_history.find_one(
-        {"Account_ID": int(account_id), "Date": days_ago})
+    try:
 
-    if balance_history != None:
+        windows = parseWindows(request.args)
 
-        days_ago_balance = balance_history["Balance"]
+    except ValueError as e:
 
-        rate_of_return = round(
-            (balance - days_ago_balance) / days_ago_balance, 4)
-
-    else:
+        return jsonify({"error": str(e)}), 400
 
-        rate_of_return = 0
+    # 30d STAYS IN rate_of_return FOR OLDER CLIENTS, EVERY WINDOW IS RESOLVED BY THE SAME QUERY
+    rates = sections.window_rates(
+        account, account_id, list(dict.fromkeys(windows + ["30d"])))
 
-    return jsonify({"rate_of_return": rate_of_return, "account_id": account_id}), 200
+    return jsonify({
+        "rate_of_return": rates["30d"]["rate_of_return"],
+        "rates_of_return": {window: rates[window] for window in windows},
+        "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/number_of_holdings/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("number_of_holdings")
 def fetch_number_of_holdings(current_user, account_id):
 
-    number_of_holdings = mongo.db.open_positions.find(
-        {"Account_ID": int(account_id)}).count()
+    getAccount(current_user, account_id)
+
+    number_of_holdings = sections.number_of_holdings(None, account_id, request.args)
 
     return jsonify({"number_of_holdings": number_of_holdings, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/account_balance_history/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("account_balance_history")
 def fetch_account_balance_history(current_user, account_id):
 
-    days_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    getAccount(current_user, account_id)
 
-    account_balance_history = [history for history in mongo.db.balance_history.find(
-        {"Account_ID": int(account_id)}) if history["Date"] >= days_ago]
+    try:
 
-    for i in account_balance_history:
+        account_balance_history = sections.account_balance_history(None, account_id, request.args)
 
-        del i["_id"]
+    except ValueError as e:
 
-        del i["Trader"]
-
-        del i["Account_ID"]
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({"account_balance_history": account_balance_history, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/profit_loss_history/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("profit_loss_history")
 def fetch_profit_loss_history(current_user, account_id):
 
-    days_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-
-    profit_loss_history = [history for history in mongo.db.profit_loss_history.find(
-        {"Account_ID": int(account_id)}) if history["Date"] >= days_ago]
+    getAccount(current_user, account_id)
 
-    for i in profit_loss_history:
+    try:
 
-        del i["_id"]
+        profit_loss_history = sections.profit_loss_history(None, account_id, request.args)
 
-        del i["Trader"]
+    except ValueError as e:
 
-        del i["Account_ID"]
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({"profit_loss_history": profit_loss_history, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/queued/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("queued")
 def fetch_queued(current_user, account_id):
+    """ METHOD RETURNS THE ACCOUNT'S QUEUED ORDERS, ALL OF THEM (LEGACY) UNLESS limit/after/format IS PASSED
+    Query Params:
+        limit ([int]): PAGE SIZE, DEFAULT 100, AT MOST 1000
+        after ([str]): next CURSOR OF THE PREVIOUS PAGE
+        format ([str]): json (DEFAULT) OR ndjson TO STREAM EVERY ORDER, ONE PER LINE
+    """
+
+    getAccount(current_user, account_id)
+
+    params = parseListingArgs(request.args)
+
+    if params["format"] == "ndjson":
+
+        return Response(ndjsonLines(listingCursor("queued", account_id, params)), mimetype="application/x-ndjson")
+
+    if not (params["limit"] or params["after"]):
 
-    queued = [queued for queued in mongo.db.queue.find(
-        {"Account_ID": int(account_id)})]
+        queued = sections.queued(None, account_id, request.args)
 
-    return jsonify({"queued": queued, "account_id": account_id}), 200
+        return jsonify({"queued": queued, "account_id": account_id}), 200
 
+    queued, cursor = listingPage("queued", account_id, params)
 
+    return jsonify({"queued": queued, "next": cursor, "account_id": account_id}), 200
+
+
+@api.route("/closed_positions/<account_id>", methods=["GET"])
 @exception_handler
+@token_required
+@conditional("closed_positions")
+def fetch_closed_positions(current_user, account_id):
+    """ METHOD PAGES THROUGH THE ACCOUNT'S CLOSED POSITIONS, NEWEST Sell_Date FIRST
+    Query Params:
+        limit ([int]): PAGE SIZE, DEFAULT 100, AT MOST 1000
+        after ([str]): next CURSOR OF THE PREVIOUS PAGE
+        start ([str]): OPTIONAL YYYY-MM-DD, FIRST Sell_Date
+        end ([str]): OPTIONAL YYYY-MM-DD, LAST Sell_Date (INCLUSIVE)
+        format ([str]): json (DEFAULT) OR ndjson TO STREAM EVERY MATCHING POSITION, ONE PER LINE
+    Returns:
+        [json]: {closed_positions, next, account_id}, next IS None ON THE LAST PAGE
+    """
+
+    getAccount(current_user, account_id)
+
+    params = parseListingArgs(request.args)
+
+    if params["format"] == "ndjson":
+
+        return Response(ndjsonLines(listingCursor("closed_positions", account_id, params)),
+                        mimetype="application/x-ndjson")
+
+    closed_positions, cursor = listingPage("closed_positions", account_id, params)
+
+    return jsonify({"closed_positions": closed_positions, "next": cursor, "account_id": account_id}), 200
+
+
 @api.route("/forbidden_symbols/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("forbidden_symbols")
 def fetch_forbidden_symbols(current_user, account_id):
 
-    forbidden_symbols = mongo.db.users.find_one({"_id": ObjectId(current_user["id"]["$oid"])})[
-        "Accounts"][account_id]["forbidden_symbols"]
+    account = getAccount(current_user, account_id)
+
+    forbidden_symbols = sections.forbidden_symbols(account, account_id, request.args)
 
     return jsonify({"forbidden_symbols": forbidden_symbols, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/best_performing_equities/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("best_performing_equities")
 def fetch_best_performing_equities(current_user, account_id):
 
-    symbols = {}
-
-    obj = [{
-        "Symbol": "ABC",
-        "ROV": 2.3
-    },
-        {
-        "Symbol": "BCA",
-        "ROV": 3.2
-    },
-        {
-        "Symbol": "ABC",
-        "ROV": -1.1
-    },
-        {
-        "Symbol": "ABC",
-        "ROV": 1.7
-    },
-        {
-        "Symbol": "AMC",
-        "ROV": 4.4
-    },
-        {
-        "Symbol": "ZWQ",
-        "ROV": -3.2
-    },
-        {
-        "Symbol": "ABC",
-        "ROV": 1.7
-    },
-        {
-        "Symbol": "AMC",
-        "ROV": 1.3
-    },
-        {
-        "Symbol": "QQQ",
-        "ROV": -1.3
-    },
-        {
-        "Symbol": "SPY",
-        "ROV": 1.9
-    },
-        {
-        "Symbol": "SPY",
-        "ROV": -4.2
-    }
-    ]
-
-    # get top 3 best performing symbols via close_positions
-    closed_positions = mongo.db.closed_positions.find(
-        {"Account_ID": int(account_id)})
-
-    for position in obj:
-
-        symbol = position["Symbol"]
-
-        if symbol not in symbols:
-
-            symbols[symbol] = 0
-
-        symbols[symbol] += position["ROV"]
-
-    best_performing_equities = [{"Symbol": symbol[0], "ROV": round(symbol[1], 2)} for symbol in sorted(
-        symbols.items(), key=lambda t: t[::-1], reverse=True)[0:3]]
+    getAccount(current_user, account_id)
+
+    try:
+
+        best_performing_equities = sections.best_performing_equities(None, account_id, request.args)
+
+    except ValueError as e:
+
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({"best_performing_equities": best_performing_equities, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/worst_performing_equities/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("worst_performing_equities")
 def fetch_worst_performing_equities(current_user, account_id):
 
-    symbols = {}
-
-    obj = [{
-        "Symbol": "ABC",
-        "ROV": 2.3
-    },
-        {
-        "Symbol": "BCA",
-        "ROV": 3.2
-    },
-        {
-        "Symbol": "ABC",
-        "ROV": -1.1
-    },
-        {
-        "Symbol": "ABC",
-        "ROV": 1.7
-    },
-        {
-        "Symbol": "AMC",
-        "ROV": 4.4
-    },
-        {
-        "Symbol": "ZWQ",
-        "ROV": -3.2
-    },
-        {
-        "Symbol": "ABC",
-        "ROV": 1.7
-    },
-        {
-        "Symbol": "AMC",
-        "ROV": 1.3
-    },
-        {
-        "Symbol": "QQQ",
-        "ROV": -1.3
-    },
-        {
-        "Symbol": "SPY",
-        "ROV": 1.9
-    },
-        {
-        "Symbol": "SPY",
-        "ROV": -4.2
-    }
-    ]
-
-    # get top 3 worse performing symbols via close_positions
-    closed_positions = mongo.db.closed_positions.find(
-        {"Account_ID": int(account_id)})
-
-    for position in obj:
-
-        symbol = position["Symbol"]
-
-        if symbol not in symbols:
-
-            symbols[symbol] = 0
-
-        symbols[symbol] += position["ROV"]
-
-    worst_performing_equities = [{"Symbol": symbol[0], "ROV": round(symbol[1], 2)} for symbol in sorted(
-        symbols.items(), key=lambda t: t[::-1])[0:3]]
+    getAccount(current_user, account_id)
+
+    try:
+
+        worst_performing_equities = sections.worst_performing_equities(None, account_id, request.args)
+
+    except ValueError as e:
+
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({"worst_performing_equities": worst_performing_equities, "account_id": account_id}), 200
 
 
-@exception_handler
 @api.route("/strategies/<account_id>", methods=["GET"])
+@exception_handler
 @token_required
+@conditional("strategies")
 def fetch_strategies(current_user, account_id):
 
-    # STRATEGY, ROV, AVG ROV, WINS, LOSS, FLAT, TOTAL
+    account = getAccount(current_user, account_id)
 
-    closed_positions = mongo.db.closed_positions.find(
-        {"Account_ID": int(account_id)})
+    strategies = sections.strategies(account, account_id, request.args)
 
-    strategy_results = mongo.db.users.find_one({"_id": ObjectId(current_user["id"]["$oid"])})[
-        "Accounts"][account_id]["Strategies"]
+    return jsonify({"strategies": strategies, "account_id": account_id}), 200
 
-    for v in strategy_results.values():
 
-        if v["Active"]:
+@api.route("/open_positions/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional("open_positions")
+def fetch_open_positions(current_user, account_id):
 
-            v["Active"] = "Active"
+    getAccount(current_user, account_id)
 
-        else:
+    open_positions = sections.open_positions(None, account_id, request.args)
 
-            v["Active"] = "Inactive"
+    return jsonify({"open_positions": open_positions, "account_id": account_id}), 200
 
-        v.update({
-            "Wins": 0,
-            "Loss": 0,
-            "Profit_Loss": 0,
-            "Avg_ROV": [],
-            "Drawdowns": []})
+##########################################################
+## COMPOSITE REQUESTS ####################################
 
-    for position in closed_positions:
+# SHARED POOL FOR RUNNING THE INDEPENDENT DASHBOARD SECTION QUERIES CONCURRENTLY
+dashboard_executor = ThreadPoolExecutor(max_workers=8)
 
-        strategy = position["Strategy"]
 
-        if position["ROV"] > 0:
+@api.route("/dashboard/<account_id>", methods=["GET"])
+@exception_handler
+@token_required
+@conditional()
+def fetch_dashboard(current_user, account_id):
+    """ METHOD ASSEMBLES EVERY DASHBOARD WIDGET IN ONE ROUND TRIP
+    Args:
+        current_user ([dict]): DECODED USER FROM THE ACCESS TOKEN
+        account_id ([str]): ACCOUNT ID
+    Query Params:
+        sections ([str]): OPTIONAL COMMA SEPARATED SECTION NAMES, DEFAULTS TO ALL SECTIONS
+    Returns:
+        [json]: ONE KEY PER SECTION, SAME PAYLOADS AS THE SINGLE WIDGET ROUTES
+    """
 
-            strategy_results[strategy]["Wins"] += 1
+    requested = request.args.get("sections")
 
-        elif position["ROV"] < 0:
+    if requested:
 
-            strategy_results[strategy]["Loss"] += 1
+        names = [name.strip() for name in requested.split(",") if name.strip()]
 
-        else:
+    else:
 
-            continue
+        names = list(sections.SECTIONS)
 
-        strategy_results[strategy]["Profit_Loss"] += (
-            (position["Sell_Price"] * position["Qty"]) - (position["Buy_Price"] * position["Qty"]))
+    unknown = [name for name in names if name not in sections.SECTIONS]
 
-        strategy_results[strategy]["Avg_ROV"].append(position["ROV"])
+    if unknown:
 
-        strategy_results[strategy]["Drawdowns"].append(
-            position["Sell_Price"] - position["Buy_Price"])
+        return jsonify({"error": f"Unknown Sections {', '.join(unknown)}"}), 400
 
-    strategies = []
+    # LOAD THE USER DOCUMENT ONCE, EVERY SECTION READS FROM THE SAME ACCOUNT
+    user = getUser(current_user)
 
-    for key, value in strategy_results.items():
+    if account_id not in user["Accounts"]:
 
-        value["MDD"] = maxDrawDown(value)
+        return jsonify({"error": f"Account ID {account_id} Not Found"}), 400
 
-        if len(value["Avg_ROV"]) > 1:
+    account = user["Accounts"][account_id]
 
-            value["Avg_ROV"] = round(statistics.mean(value["Avg_ROV"]), 2)
+    app = current_app._get_current_object()
 
-            value["SR"] = sharpeRatio(value)
+    args = request.args.to_dict()
 
-        else:
+    def build(name):
 
-            value["Avg_ROV"] = 0
+        with app.app_context():
 
-            value["SR"] = 0
+            return sections.SECTIONS[name](account, account_id, args)
 
-        value["Profit_Loss"] = round(value["Profit_Loss"], 2)
+    futures = {name: dashboard_executor.submit(
+        build, name) for name in names}
 
-        value["Strategy"] = key
+    try:
 
-        try:
+        dashboard = {name: future.result()
+                     for name, future in futures.items()}
 
-            value["WRP"] = round(((value["Wins"] - value["Loss"]) /
-                                  value["Wins"]) * 100, 2)
+    except ValueError as e:
 
-        except:
+        return jsonify({"error": str(e)}), 400
 
-            value["WRP"] = 0
+    return jsonify({"dashboard": dashboard, "account_id": account_id}), 200
 
-        del strategy_results[key]["Drawdowns"]
+##########################################################
+## EXPORTS ###############################################
 
-        del strategy_results[key]["Wins"]
 
-        del strategy_results[key]["Loss"]
+@api.route("/export/<account_id>/<dataset>", methods=["GET"])
+@exception_handler
+@token_required
+def export_dataset(current_user, account_id, dataset):
+    """ METHOD STREAMS A WHOLE DATASET OF THE ACCOUNT AS A FILE, ENCODED CHUNK BY CHUNK FROM THE CURSOR (SEE api/exports.py)
+    Args:
+        dataset ([str]): closed_positions, balance_history OR profit_loss_history
+    Query Params:
+        format ([str]): csv (DEFAULT), arrow (ARROW IPC STREAM) OR parquet
+        start ([str]): OPTIONAL YYYY-MM-DD
+        end ([str]): OPTIONAL YYYY-MM-DD, INCLUSIVE
+        strategy ([str]): OPTIONAL, closed_positions ONLY
+    """
 
-        strategies.append(value)
+    getAccount(current_user, account_id)
 
-    return jsonify({"strategies": strategies, "account_id": account_id}), 200
+    params = parseExportArgs(dataset, request.args)
 
+    return Response(exportChunks(exportCursor(dataset, account_id, params), exportEncoder(dataset, params)),
+                    mimetype=EXPORT_FORMATS[params["format"]][0],
+                    headers={"Content-Disposition": f'attachment; filename="{exportFilename(dataset, account_id, params)}"'})
 
-@ exception_handler
-@ api.route("/open_positions/<account_id>", methods=["GET"])
-@ token_required
-def fetch_open_positions(current_user, account_id):
+##########################################################
+## STREAMS ###############################################
+
+
+@api.route("/stream/<account_id>", methods=["GET"])
+@token_required(query=True)
+def stream_account(current_user, account_id):
+    """ METHOD STREAMS THE ACCOUNT'S CHANGES AS SERVER-SENT EVENTS INSTEAD OF THE DASHBOARD POLLING EVERY WIDGET
+        EVENTS: ready, account, queued, open_positions, account_balance_history, overflow (RECONNECT AND REFETCH)
+        A HEARTBEAT COMMENT IS SENT EVERY STREAM_HEARTBEAT SECONDS. EACH OPEN STREAM HOLDS A GUNICORN THREAD, SO A WORKER ONLY
+        TAKES STREAM_SYNC_LIMIT OF THEM (503 PAST THAT), MANY CONCURRENT STREAMS ARE SERVED BY asgi.py
+    Query Params:
+        token ([str]): ACCESS TOKEN, FOR EventSource CLIENTS THAT CAN'T SET x-access-token
+    """
 
-    open_positions = {}
-
-    wow = [
-        {
-            "Strategy": "TEST1",
-            "Symbol": "ABC"
-        },
-        {
-            "Strategy": "TEST1",
-            "Symbol": "BCA"
-        },
-        {
-            "Strategy": "TEST1",
-            "Symbol": "AMC"
-        },
-        {
-            "Strategy": "TEST1",
-            "Symbol": "QQQ"
-        },
-        {
-            "Strategy": "TEST2",
-            "Symbol": "ABC"
-        },
-        {
-            "Strategy": "TEST2",
-            "Symbol": "SPY"
-        }
-    ]
-
-    # for position in mongo.db.open_positions.find({"Account_ID": int(account_id)}):
-    for position in wow:
-
-        strategy = position["Strategy"]
-
-        if strategy not in open_positions:
-
-            open_positions[strategy] = []
-
-        open_positions[strategy].append(position["Symbol"])
-
-    open_positions = [{"Strategy": k, "Symbols": v}
-                      for k, v in open_positions.items()]
+    try:
 
-    return jsonify({"open_positions": open_positions, "account_id": account_id}), 200
+        getAccount(current_user, account_id)
+
+    except KeyError:
+
+        return jsonify({"error": f"Account ID {account_id} Not Found"}), 400
+
+    subscriber = stream_hub.subscribe(account_id)
+
+    if subscriber is None:
+
+        return jsonify({"error": "Too Many Open Streams"}), 503, {"Retry-After": str(int(stream_hub.heartbeat))}
+
+    def generate():
+
+        try:
+
+            yield from stream_hub.messages(subscriber)
+
+        finally:
+
+            stream_hub.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 ##########################################################
 ## PUT REQUESTS ##########################################
 
 
-@exception_handler
 @api.route("/change_account_status/<account_id>", methods=["PUT"])
+@exception_handler
 @token_required
 def change_account_status(current_user, account_id):
 
+    getAccount(current_user, account_id)
+
     status = request.json["account_status"]
 
     if status == "Active":
@@ -534,27 +469,39 @@ def change_account_status(current_user, account_id):
     mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
         "$set": {f"Accounts.{account_id}.Active": status}})
 
+    bumpVersions(account_id, ["users"])
+
+    invalidateUser(current_user["id"]["$oid"])
+
     return jsonify({"account_status": status, "account_id": account_id}), 201
 
 
-@exception_handler
 @api.route("/add_forbidden_symbol/<account_id>", methods=["PUT"])
+@exception_handler
 @token_required
 def add_forbidden_symbol(current_user, account_id):
 
+    getAccount(current_user, account_id)
+
     symbol = request.json["symbol"]
 
     mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
         "$push": {f"Accounts.{account_id}.forbidden_symbols": symbol.upper()}})
 
+    bumpVersions(account_id, ["users"])
+
+    invalidateUser(current_user["id"]["$oid"])
+
     return jsonify({"account_id": account_id}), 201
 
 
-@exception_handler
 @api.route("/update_strategy/<account_id>", methods=["PUT"])
+@exception_handler
 @token_required
 def update_strategy(current_user, account_id):
 
+    getAccount(current_user, account_id)
+
     data = request.json["data"]
 
     strategy = data["Strategy"]
@@ -574,18 +521,28 @@ def update_strategy(current_user, account_id):
     mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
         "$set": {f"Accounts.{account_id}.Strategies.{strategy}": {"Active": status, "Shares": shares}}})
 
+    bumpVersions(account_id, ["users"])
+
+    invalidateUser(current_user["id"]["$oid"])
+
     return jsonify({"account_id": account_id}), 201
 
 ##########################################################
 ## DELETE REQUESTS ##########################################
 
 
-@exception_handler
 @api.route("/remove_forbidden_symbol/<account_id>/<symbol>", methods=["DELETE"])
+@exception_handler
 @token_required
 def remove_forbidden_symbol(current_user, account_id, symbol):
 
+    getAccount(current_user, account_id)
+
     mongo.db.users.update_one({"_id": ObjectId(current_user["id"]["$oid"])}, {
         "$pull": {f"Accounts.{account_id}.forbidden_symbols": symbol.upper()}})
 
+    bumpVersions(account_id, ["users"])
+
+    invalidateUser(current_user["id"]["$oid"])
+
     return jsonify({"account_id": account_id}), 201
@@ -0,0 +1,563 @@
+import copy
+import heapq
+import threading
+from bisect import bisect_right
+from datetime import date as date_type, datetime, timedelta
+from api.analytics import bookMetrics, lttbIndices
+from api.helpers import dateQuery, parseDateRange, parsePoints, parsePositiveInt, parseWindows, windowStart
+from api.rollups import HISTORY_VALUES, PERIODS, capRows, fetchRollups
+from api.strategy_stats import fetchStrategyStats, newStats, summarize
+
+from extensions import mongo, equity_cache
+
+# EACH SECTION BUILDS THE PAYLOAD FOR ONE DASHBOARD WIDGET.
+# SECTIONS TAKE THE ACCOUNT SUB-DOCUMENT FROM THE USERS COLLECTION (ALREADY LOADED BY THE CALLER),
+# THE ACCOUNT ID AND THE REQUEST ARGS, SO THE SAME CODE SERVES BOTH THE SINGLE WIDGET ROUTES AND /dashboard.
+
+
+def sources(*collections):
+    """ METHOD IS A DECORATOR THAT RECORDS THE COLLECTIONS A SECTION'S PAYLOAD IS BUILT FROM, READ BY THE ETAGS (api/versions.py)
+        THE ROLLUPS (strategy_stats, *_weekly/monthly) FOLLOW THEIR SOURCE COLLECTION
+    """
+
+    def decorator(f):
+
+        f.sources = collections
+
+        return f
+
+    return decorator
+
+
+@sources("users")
+def account_status(account, account_id, args):
+
+    return account["Active"]
+
+
+@sources("users")
+def account_balance(account, account_id, args):
+
+    return account["Account_Balance"]
+
+
+# HOW FAR BEFORE THE EARLIEST WINDOW START TO LOOK FOR THE NEAREST PRIOR BALANCE (WEEKENDS, HOLIDAYS)
+RATE_OF_RETURN_LOOKBACK_DAYS = 10
+
+
+# FIELDS window_rates READS FROM balance_history
+BALANCE_PROJECTION = {"_id": 0, "Date": 1, "Balance": 1}
+
+
+def windowRatesQuery(account_id, windows):
+    """ METHOD BUILDS THE balance_history RANGE QUERY COVERING EVERY WINDOW, PLUS THE LOOKBACK FOR THE NEAREST PRIOR BALANCE
+    Returns:
+        [tuple]: (TODAY, WINDOW -> START DATE, QUERY)
+    """
+
+    today = datetime.now().date()
+
+    starts = {window: windowStart(window, today).isoformat()
+              for window in windows}
+
+    earliest = (date_type.fromisoformat(min(starts.values())) -
+                timedelta(days=RATE_OF_RETURN_LOOKBACK_DAYS)).isoformat()
+
+    query = {"Account_ID": int(account_id), "Date": {
+        "$gte": earliest, "$lte": today.isoformat()}}
+
+    return today, starts, query
+
+
+def resolveWindowRates(balance, history, starts, today):
+    """ METHOD RESOLVES EACH WINDOW AGAINST THE NEAREST BALANCE ON OR BEFORE ITS START DATE
+    Args:
+        balance ([float]): CURRENT BALANCE
+        history ([list]): {Date, Balance} SORTED BY Date
+        starts ([dict]): WINDOW -> START DATE
+        today ([date]): TODAY
+    Returns:
+        [dict]: WINDOW -> {rate_of_return, annualized, date, balance}, 0/None WHEN THERE IS NO PRIOR BALANCE
+    """
+
+    dates = [doc["Date"] for doc in history]
+
+    rates = {}
+
+    for window, start in starts.items():
+
+        index = bisect_right(dates, start) - 1
+
+        if index < 0 or not history[index]["Balance"]:
+
+            rates[window] = {"rate_of_return": 0,
+                             "annualized": 0, "date": None, "balance": None}
+
+            continue
+
+        prior = history[index]
+
+        rate = (balance - prior["Balance"]) / prior["Balance"]
+
+        days = (today - date_type.fromisoformat(prior["Date"])).days
+
+        try:
+
+            annualized = (1 + rate) ** (365 / days) - \
+                1 if days > 0 and rate > -1 else 0
+
+        except OverflowError:
+
+            annualized = 0
+
+        rates[window] = {
+            "rate_of_return": round(rate, 4),
+            "annualized": round(annualized, 4),
+            "date": prior["Date"],
+            "balance": prior["Balance"]
+        }
+
+    return rates
+
+
+def window_rates(account, account_id, windows):
+    """ METHOD RESOLVES THE RATE OF RETURN FOR SEVERAL WINDOWS WITH ONE SORTED RANGE SCAN OVER balance_history
+        EACH WINDOW USES THE NEAREST BALANCE ON OR BEFORE ITS START DATE
+    Args:
+        account ([dict]): ACCOUNT SUB-DOCUMENT, Account_Balance IS THE CURRENT BALANCE
+        account_id ([str]): ACCOUNT ID
+        windows ([list]): WINDOWS FROM RETURN_WINDOWS
+    Returns:
+        [dict]: SEE resolveWindowRates
+    """
+
+    today, starts, query = windowRatesQuery(account_id, windows)
+
+    history = list(mongo.db.balance_history.find(
+        query, BALANCE_PROJECTION).sort("Date", 1))
+
+    return resolveWindowRates(account["Account_Balance"], history, starts, today)
+
+
+@sources("users", "balance_history")
+def rate_of_return(account, account_id, args):
+
+    return window_rates(account, account_id, ["30d"])["30d"]["rate_of_return"]
+
+
+@sources("users", "balance_history")
+def rates_of_return(account, account_id, args):
+
+    return window_rates(account, account_id, parseWindows(args))
+
+
+@sources("open_positions")
+def number_of_holdings(account, account_id, args):
+
+    return mongo.db.open_positions.count_documents({"Account_ID": int(account_id)})
+
+
+# FIELDS THE HISTORY ENDPOINTS NEVER RETURN
+HISTORY_PROJECTION = {"_id": 0, "Trader": 0, "Account_ID": 0}
+
+
+def parseHistoryArgs(args):
+    """ METHOD READS THE HISTORY QUERY PARAMS, RAISES ValueError IF ANY IS INVALID
+    Returns:
+        [tuple]: (START, END, POINTS, MODE)
+    """
+
+    start, end = parseDateRange(args)
+
+    points = parsePoints(args)
+
+    mode = args.get("mode", "lttb")
+
+    if mode != "lttb" and mode not in PERIODS:
+
+        raise ValueError(f"mode Must Be One Of lttb, {', '.join(PERIODS)}")
+
+    return start, end, points, mode
+
+
+def historyQuery(account_id, start, end):
+
+    query = {"Account_ID": int(account_id)}
+
+    date = dateQuery(start, end)
+
+    if date:
+
+        query["Date"] = date
+
+    return query
+
+
+def downsampleHistory(collection, history, points):
+    """ METHOD KEEPS AT MOST points DAILY DOCUMENTS, PICKED WITH LTTB SO THE SHAPE OF THE CURVE SURVIVES """
+
+    if not points or len(history) <= points:
+
+        return history
+
+    value_field = HISTORY_VALUES[collection]
+
+    indices = lttbIndices([date_type.fromisoformat(doc["Date"]).toordinal() for doc in history],
+                          [doc.get(value_field) or 0 for doc in history], points)
+
+    return [history[index] for index in indices]
+
+
+def history(collection, account_id, args):
+    """ METHOD RETURNS AN ACCOUNT'S HISTORY FOR THE REQUESTED DATE RANGE, FILTERED AND PROJECTED INSIDE MONGO
+    Args:
+        collection ([str]): balance_history OR profit_loss_history
+        account_id ([str]): ACCOUNT ID
+        args ([dict]): REQUEST ARGS, SEE parseDateRange. OPTIONAL points CAPS THE NUMBER OF POINTS RETURNED
+            AND mode PICKS HOW: lttb (DEFAULT, KEEPS THE DAILY DOCUMENTS) OR week/month (OHLC BUCKETS FROM THE ROLLUPS,
+            ADJACENT BUCKETS ARE MERGED WHEN MORE THAN points OVERLAP THE RANGE)
+    Returns:
+        [list]: HISTORY DOCUMENTS OR OHLC BUCKETS SORTED BY Date
+    """
+
+    start, end, points, mode = parseHistoryArgs(args)
+
+    if mode in PERIODS:
+
+        buckets = fetchRollups(collection, mode, int(account_id), start, end)
+
+        return capRows(buckets, points)
+
+    history = list(mongo.db[collection].find(
+        historyQuery(account_id, start, end), HISTORY_PROJECTION).sort("Date", 1))
+
+    return downsampleHistory(collection, history, points)
+
+
+@sources("balance_history")
+def account_balance_history(account, account_id, args):
+
+    return history("balance_history", account_id, args)
+
+
+@sources("profit_loss_history")
+def profit_loss_history(account, account_id, args):
+
+    return history("profit_loss_history", account_id, args)
+
+
+@sources("queue")
+def queued(account, account_id, args):
+
+    return [queued for queued in mongo.db.queue.find(
+        {"Account_ID": int(account_id)})]
+
+
+@sources("users")
+def forbidden_symbols(account, account_id, args):
+
+    return account["forbidden_symbols"]
+
+
+# FIELD OF closed_positions HOLDING WHEN THE POSITION WAS CLOSED, STORED AS A DATETIME
+CLOSED_POSITION_DATE = "Sell_Date"
+
+# metric QUERY PARAM -> FIELD OF THE PER SYMBOL SUMMARY
+EQUITY_METRICS = {
+    "rov": "ROV",
+    "avg_rov": "Avg_ROV",
+    "profit_loss": "Profit_Loss",
+    "trades": "Trades"
+}
+
+# STRIPED SO CONCURRENT MISSES OF ONE KEY ALWAYS SHARE A LOCK WITHOUT ONE LOCK PER KEY EVER BEING KEPT (OR DROPPED UNDER A WAITER)
+EQUITY_LOCK_STRIPES = 64
+
+equity_locks = [threading.Lock() for _ in range(EQUITY_LOCK_STRIPES)]
+
+
+def equityPipeline(account_id, start, end):
+    """ METHOD BUILDS THE $group OVER closed_positions THAT SUMMARIZES EACH SYMBOL BETWEEN start AND end (INCLUSIVE) """
+
+    match = {"Account_ID": int(account_id)}
+
+    if start or end:
+
+        match[CLOSED_POSITION_DATE] = {}
+
+        if start:
+
+            match[CLOSED_POSITION_DATE]["$gte"] = datetime.strptime(
+                start, "%Y-%m-%d")
+
+        if end:
+
+            match[CLOSED_POSITION_DATE]["$lt"] = datetime.strptime(
+                end, "%Y-%m-%d") + timedelta(days=1)
+
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": "$Symbol",
+            "ROV": {"$sum": "$ROV"},
+            "Avg_ROV": {"$avg": "$ROV"},
+            "Profit_Loss": {"$sum": {"$subtract": [
+                {"$multiply": ["$Sell_Price", "$Qty"]},
+                {"$multiply": ["$Buy_Price", "$Qty"]}]}},
+            "Trades": {"$sum": 1}
+        }}
+    ]
+
+
+def symbol_performance(account_id, start, end):
+    """ METHOD SUMMARIZES CLOSED POSITIONS PER SYMBOL WITH ONE $group, SHARED BY THE BEST AND WORST ROUTES THROUGH equity_cache
+    Args:
+        account_id ([str]): ACCOUNT ID
+        start ([str]): YYYY-MM-DD OR None
+        end ([str]): YYYY-MM-DD OR None, INCLUSIVE
+    Returns:
+        [dict]: SYMBOL -> {ROV, Avg_ROV, Profit_Loss, Trades}
+    """
+
+    key = (int(account_id), start, end)
+
+    performance = equity_cache.get(key)
+
+    if performance is not None:
+
+        return performance
+
+    # CONCURRENT MISSES FOR THE SAME KEY (BEST AND WORST FROM ONE DASHBOARD) WAIT FOR ONE AGGREGATION
+    with equity_locks[hash(key) % EQUITY_LOCK_STRIPES]:
+
+        performance = equity_cache.get(key)
+
+        if performance is not None:
+
+            return performance
+
+        performance = {row.pop("_id"): row for row in mongo.db.closed_positions.aggregate(
+            equityPipeline(account_id, start, end))}
+
+        equity_cache.set(key, performance)
+
+    return performance
+
+
+def parseEquityArgs(args):
+    """ METHOD READS k (DEFAULT 3), metric (DEFAULT rov) AND start/end OR range (DEFAULT all), RAISES ValueError IF ANY IS INVALID
+    Returns:
+        [tuple]: (K, FIELD, START, END)
+    """
+
+    k = parsePositiveInt(args, "k", 3)
+
+    metric = args.get("metric", "rov")
+
+    if metric not in EQUITY_METRICS:
+
+        raise ValueError(f"metric Must Be One Of {', '.join(EQUITY_METRICS)}")
+
+    return (k, EQUITY_METRICS[metric], *parseDateRange(args, default="all"))
+
+
+def rankEquities(performance, k, field, best):
+    """ METHOD PICKS THE TOP OR BOTTOM k SYMBOLS BY field WITH A HEAP SELECTION
+    Returns:
+        [list]: {Symbol, <FIELD>} ORDERED BEST TO WORST (OR WORST TO BEST)
+    """
+
+    select = heapq.nlargest if best else heapq.nsmallest
+
+    ranked = select(k, performance.items(),
+                    key=lambda item: (item[1][field], item[0]))
+
+    return [{"Symbol": symbol, field: round(row[field], 2)} for symbol, row in ranked]
+
+
+def ranked_equities(account_id, args, best):
+    """ METHOD RETURNS THE TOP OR BOTTOM k SYMBOLS
+    Args:
+        account_id ([str]): ACCOUNT ID
+        args ([dict]): REQUEST ARGS, SEE parseEquityArgs
+        best ([bool]): TRUE FOR THE TOP k, FALSE FOR THE BOTTOM k
+    Returns:
+        [list]: SEE rankEquities
+    """
+
+    k, field, start, end = parseEquityArgs(args)
+
+    return rankEquities(symbol_performance(account_id, start, end), k, field, best)
+
+
+@sources("closed_positions")
+def best_performing_equities(account, account_id, args):
+
+    return ranked_equities(account_id, args, True)
+
+
+@sources("closed_positions")
+def worst_performing_equities(account, account_id, args):
+
+    return ranked_equities(account_id, args, False)
+
+
+def strategyRows(account, account_id, stats):
+    """ METHOD MERGES THE ACCOUNT'S STRATEGY SETTINGS WITH THEIR ROLLUP STATS
+    Args:
+        account ([dict]): ACCOUNT SUB-DOCUMENT
+        account_id ([str]): ACCOUNT ID
+        stats ([dict]): STRATEGY -> ROLLUP DOCUMENT
+    Returns:
+        [list]: ONE ROW PER STRATEGY
+    """
+
+    # COPY SO THE RESULT FIELDS BELOW DON'T LEAK INTO THE CALLER'S USER DOCUMENT
+    strategy_results = copy.deepcopy(account["Strategies"])
+
+    strategies = []
+
+    for key, value in strategy_results.items():
+
+        value["Active"] = "Active" if value["Active"] else "Inactive"
+
+        row = summarize(stats.get(key) or newStats(account_id, key))
+
+        value["Profit_Loss"] = round(row["Profit_Loss"], 2)
+
+        value["MDD"] = row["MDD"]
+
+        if row["Count"] > 1:
+
+            value["Avg_ROV"] = round(row["Avg_ROV"], 2)
+
+            # SAME AS sharpeRatio, A ZERO STANDARD DEVIATION GIVES 0
+            value["SR"] = round(row["Avg_ROV"] / row["Std_ROV"],
+                                2) if row["Std_ROV"] else 0
+
+        else:
+
+            value["Avg_ROV"] = 0
+
+            value["SR"] = 0
+
+        value["Strategy"] = key
+
+        try:
+
+            value["WRP"] = round(((row["Wins"] - row["Loss"]) /
+                                  row["Wins"]) * 100, 2)
+
+        except ZeroDivisionError:
+
+            value["WRP"] = 0
+
+        strategies.append(value)
+
+    return strategies
+
+
+@sources("users", "closed_positions")
+def strategies(account, account_id, args):
+
+    # STRATEGY, ROV, AVG ROV, WINS, LOSS, FLAT, TOTAL
+
+    # ROLLUP IS READ IN O(STRATEGIES), ONLY CLOSED POSITIONS PAST ITS HIGH-WATER MARKS ARE FOLDED IN (IN MEMORY)
+    return strategyRows(account, account_id, fetchStrategyStats(account_id))
+
+
+# FIELDS open_positions READS FROM open_positions AND quotes
+POSITION_PROJECTION = {"_id": 0, "Strategy": 1, "Symbol": 1, "Qty": 1, "Buy_Price": 1}
+
+QUOTE_PROJECTION = {"_id": 0, "Symbol": 1, "Last_Price": 1}
+
+
+def quotesQuery(positions):
+
+    return {"Symbol": {"$in": list({position["Symbol"] for position in positions})}}
+
+
+def positionsBook(positions, quotes):
+    """ METHOD VALUES OPEN POSITIONS AGAINST LAST PRICES AND GROUPS THEM BY STRATEGY
+    Args:
+        positions ([list]): {Strategy, Symbol, Qty, Buy_Price}
+        quotes ([dict]): SYMBOL -> LAST PRICE
+    Returns:
+        [list]: {Strategy, Symbols, Exposure, Cost, Unrealized_PL, Weight, Positions} PER STRATEGY
+    """
+
+    if not positions:
+
+        return []
+
+    values, strategies = bookMetrics(
+        [position["Strategy"] for position in positions],
+        [position["Qty"] for position in positions],
+        [position["Buy_Price"] for position in positions],
+        [quotes.get(position["Symbol"], float("nan")) for position in positions])
+
+    open_positions = {}
+
+    for index, position in enumerate(positions):
+
+        strategy = position["Strategy"]
+
+        if strategy not in open_positions:
+
+            open_positions[strategy] = {
+                "Strategy": strategy,
+                "Symbols": [],
+                "Positions": [],
+                **{field: round(value, 4 if field == "Weight" else 2) for field, value in strategies[strategy].items()}}
+
+        open_positions[strategy]["Symbols"].append(position["Symbol"])
+
+        open_positions[strategy]["Positions"].append({
+            "Symbol": position["Symbol"],
+            "Qty": position["Qty"],
+            "Buy_Price": position["Buy_Price"],
+            "Last_Price": quotes.get(position["Symbol"]),
+            "Exposure": round(float(values["Exposure"][index]), 2),
+            "Unrealized_PL": round(float(values["Unrealized_PL"][index]), 2),
+            "Weight": round(float(values["Weight"][index]), 4)})
+
+    return list(open_positions.values())
+
+
+@sources("open_positions", "quotes")
+def open_positions(account, account_id, args):
+    """ METHOD GROUPS THE ACCOUNT'S OPEN POSITIONS BY STRATEGY AND VALUES THEM AGAINST THE LAST PRICES IN THE quotes COLLECTION
+        POSITIONS WITHOUT A QUOTE ARE VALUED AT THEIR Buy_Price
+    Returns:
+        [list]: SEE positionsBook
+    """
+
+    positions = list(mongo.db.open_positions.find(
+        {"Account_ID": int(account_id)}, POSITION_PROJECTION))
+
+    if not positions:
+
+        return []
+
+    quotes = {quote["Symbol"]: quote["Last_Price"] for quote in mongo.db.quotes.find(
+        quotesQuery(positions), QUOTE_PROJECTION)}
+
+    return positionsBook(positions, quotes)
+
+
+# SECTION NAME -> BUILDER. THE NAMES MATCH THE RESPONSE KEYS OF THE SINGLE WIDGET ROUTES.
+SECTIONS = {
+    "account_status": account_status,
+    "account_balance": account_balance,
+    "rate_of_return": rate_of_return,
+    "rates_of_return": rates_of_return,
+    "number_of_holdings": number_of_holdings,
+    "account_balance_history": account_balance_history,
+    "profit_loss_history": profit_loss_history,
+    "queued": queued,
+    "forbidden_symbols": forbidden_symbols,
+    "best_performing_equities": best_performing_equities,
+    "worst_performing_equities": worst_performing_equities,
+    "strategies": strategies,
+    "open_positions": open_positions
+}
@@ -0,0 +1,408 @@
+import math
+from datetime import datetime, timedelta
+import time
+import click
+from bson.objectid import ObjectId
+from flask.cli import with_appcontext
+from pymongo.errors import DuplicateKeyError
+
+from api.analytics import strategyMetrics
+from assets.logger import Logger
+from extensions import mongo
+
+logger = Logger()
+
+# ROLLUP OF closed_positions, ONE DOCUMENT PER (Account_ID, Strategy) IN THE strategy_stats COLLECTION.
+# Last_ID IS THE DOCUMENT'S HIGH-WATER MARK: EVERY POSITION OF THE STRATEGY WITH A SMALLER _id IS FOLDED IN, NONE FROM Last_ID ON.
+# IT IS A TIME BOUNDARY (ObjectId.from_datetime) STATS_SETTLE_SECONDS BEHIND THE CLOCK, NOT THE LAST _id SEEN, SO A POSITION WHOSE
+# _id WAS GENERATED A LITTLE BEFORE ITS INSERT (SEVERAL WRITERS, CLOCK SKEW) STILL LANDS PAST THE MARK. POSITIONS BACKFILLED WITH
+# OLDER _ids NEED "flask --app run rebuild-strategy-stats".
+# WRITES ONLY COME FROM "flask --app run refresh-strategy-stats" (ONCE, OR --every SECONDS, IT ALSO SEEDS NEW ACCOUNTS WITH A
+# REBUILD) AND THE REBUILD, NEVER FROM A GET, AND closed_positions IS NEVER WRITTEN. READS FOLD THE POSITIONS PAST EACH MARK IN
+# MEMORY. AN ACCOUNT WITHOUT A ROLLUP YET IS ANSWERED BY THE REBUILD'S $group UNTIL THE REFRESH SEEDS IT.
+# EVERY WRITE IS CONDITIONAL ON THE Version THAT WAS READ, THE LOSER OF A RACE WRITES NOTHING AND FOLDS AGAIN ON THE NEXT PASS.
+
+STATS_SETTLE_SECONDS = 60
+
+POSITION_FIELDS = {"Strategy": 1, "ROV": 1,
+                   "Sell_Price": 1, "Buy_Price": 1, "Qty": 1}
+
+
+def newStats(account_id, strategy):
+
+    return {
+        "Account_ID": account_id,
+        "Strategy": strategy,
+        "Wins": 0,
+        "Loss": 0,
+        "Count": 0,
+        "Profit_Loss": 0,
+        # WELFORD RUNNING MEAN / SUM OF SQUARED DIFFERENCES OF ROV
+        "ROV_Mean": 0,
+        "ROV_M2": 0,
+        # RUNNING PEAK AND MAX DRAWDOWN OVER THE PER TRADE PRICE DELTAS
+        "DD_Peak": None,
+        "DD_Max": 0,
+        "Last_ID": None,
+        "Version": None
+    }
+
+
+def foldDrawdown(stats, drawdown):
+    """ METHOD FOLDS ONE PER TRADE PRICE DELTA INTO THE DRAWDOWN STATE, SAME RESULT AS analytics.maxDrawdown OVER THE WHOLE SERIES """
+
+    if stats["DD_Peak"] is None or drawdown > stats["DD_Peak"]:
+
+        stats["DD_Peak"] = drawdown
+
+    stats["DD_Max"] = max(stats["DD_Max"], stats["DD_Peak"] - drawdown)
+
+
+def foldPosition(stats, position):
+    """ METHOD FOLDS ONE CLOSED POSITION INTO THE RUNNING STATS IN PLACE, FLAT TRADES (ROV == 0) ARE SKIPPED """
+
+    rov = position["ROV"]
+
+    if rov == 0:
+
+        return
+
+    if rov > 0:
+
+        stats["Wins"] += 1
+
+    else:
+
+        stats["Loss"] += 1
+
+    stats["Count"] += 1
+
+    stats["Profit_Loss"] += (position["Sell_Price"] *
+                             position["Qty"]) - (position["Buy_Price"] * position["Qty"])
+
+    delta = rov - stats["ROV_Mean"]
+
+    stats["ROV_Mean"] += delta / stats["Count"]
+
+    stats["ROV_M2"] += delta * (rov - stats["ROV_Mean"])
+
+    foldDrawdown(stats, position["Sell_Price"] - position["Buy_Price"])
+
+
+def summarize(stats):
+    """ METHOD TURNS RUNNING STATS INTO Wins, Loss, Count, Profit_Loss, Avg_ROV, Std_ROV AND MDD """
+
+    count = stats["Count"]
+
+    return {
+        "Wins": stats["Wins"],
+        "Loss": stats["Loss"],
+        "Count": count,
+        "Profit_Loss": stats["Profit_Loss"],
+        "Avg_ROV": stats["ROV_Mean"] if count else None,
+        "Std_ROV": math.sqrt(stats["ROV_M2"] / (count - 1)) if count > 1 else None,
+        "MDD": round(stats["DD_Max"], 2)
+    }
+
+
+def settledMark():
+    """ METHOD RETURNS THE HIGH-WATER MARK A FOLD STARTING NOW STOPS AT, STATS_SETTLE_SECONDS BEHIND THE CLOCK """
+
+    return ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=STATS_SETTLE_SECONDS))
+
+
+def pendingQuery(account_id, stats, before=None):
+    """ METHOD BUILDS THE closed_positions QUERY FOR THE POSITIONS PAST EACH STRATEGY'S Last_ID, EVERY POSITION OF A NEW STRATEGY
+    Args:
+        account_id ([int]): ACCOUNT ID
+        stats ([dict]): STRATEGY -> ROLLUP DOCUMENT
+        before ([ObjectId]): OPTIONAL, ONLY POSITIONS WITH A SMALLER _id
+    Returns:
+        [dict]: QUERY
+    """
+
+    clauses = [{"Strategy": strategy, "_id": {"$gte": doc["Last_ID"]}} for strategy, doc in stats.items()]
+
+    clauses.append({"Strategy": {"$nin": list(stats)}})
+
+    query = {"Account_ID": account_id, "$or": clauses}
+
+    if before is not None:
+
+        query["_id"] = {"$lt": before}
+
+    return query
+
+
+def foldPending(stats, account_id, position):
+    """ METHOD FOLDS ONE POSITION FROM pendingQuery INTO stats, STARTING A DOCUMENT FOR A NEW STRATEGY
+    Returns:
+        [str]: THE POSITION'S STRATEGY
+    """
+
+    strategy = position["Strategy"]
+
+    if strategy not in stats:
+
+        stats[strategy] = newStats(account_id, strategy)
+
+    foldPosition(stats[strategy], position)
+
+    return strategy
+
+
+def writeStats(doc, version):
+    """ METHOD WRITES ONE ROLLUP DOCUMENT UNLESS ANOTHER WRITER CHANGED IT SINCE IT WAS READ
+    Args:
+        doc ([dict]): ROLLUP DOCUMENT, WITH THE _id IT WAS READ WITH (NONE IF IT DIDN'T EXIST)
+        version ([ObjectId]): Version AS READ
+    Returns:
+        [bool]: WHETHER IT WAS WRITTEN
+    """
+
+    doc["Version"] = ObjectId()
+
+    if "_id" not in doc:
+
+        try:
+
+            mongo.db.strategy_stats.insert_one(doc)
+
+            return True
+
+        except DuplicateKeyError:
+
+            return False
+
+    return mongo.db.strategy_stats.replace_one({"_id": doc["_id"], "Version": version}, doc).matched_count == 1
+
+
+def loadStats(account_id):
+
+    return {doc["Strategy"]: doc for doc in mongo.db.strategy_stats.find({"Account_ID": account_id})}
+
+
+def fetchStrategyStats(account_id):
+    """ METHOD READS THE ACCOUNT'S ROLLUP AND FOLDS THE POSITIONS PAST ITS MARKS IN MEMORY, WRITES NOTHING
+    Args:
+        account_id ([str]): ACCOUNT ID
+    Returns:
+        [dict]: STRATEGY -> ROLLUP DOCUMENT
+    """
+
+    account_id = int(account_id)
+
+    stats = loadStats(account_id)
+
+    if not stats:
+
+        return aggregatedStats(account_id, strategyAggregates(account_id))
+
+    for position in mongo.db.closed_positions.find(pendingQuery(account_id, stats), POSITION_FIELDS).sort("_id", 1):
+
+        foldPending(stats, account_id, position)
+
+    return stats
+
+
+def refreshStrategyStats(account_id):
+    """ METHOD FOLDS THE POSITIONS PAST EACH MARK UP TO settledMark INTO THE STORED ROLLUP, SEEDS AN ACCOUNT WITHOUT ONE WITH A REBUILD
+    Args:
+        account_id ([int]): ACCOUNT ID
+    Returns:
+        [int]: NUMBER OF STRATEGIES WRITTEN
+    """
+
+    stats = loadStats(account_id)
+
+    if not stats:
+
+        return rebuildStrategyStats(account_id)
+
+    versions = {strategy: doc["Version"] for strategy, doc in stats.items()}
+
+    mark = settledMark()
+
+    folded = set()
+
+    for position in mongo.db.closed_positions.find(pendingQuery(account_id, stats, mark), POSITION_FIELDS).sort("_id", 1):
+
+        folded.add(foldPending(stats, account_id, position))
+
+    written = 0
+
+    # A STRATEGY WITH NOTHING NEW KEEPS ITS OLD MARK, ITS PENDING QUERY IS STILL ONE EMPTY INDEX RANGE
+    for strategy in folded:
+
+        stats[strategy]["Last_ID"] = mark
+
+        written += writeStats(stats[strategy], versions.get(strategy))
+
+    return written
+
+
+def strategyPipeline(account_id, before=None):
+    """ METHOD BUILDS THE $group OVER closed_positions THAT SUMMARIZES EACH STRATEGY IN ONE ROW
+        FLAT TRADES (ROV == 0) ARE SKIPPED. Drawdowns IS PUSHED IN _id ORDER BECAUSE THE DRAWDOWN STATE IS ORDER DEPENDENT.
+    Args:
+        account_id ([int]): ACCOUNT ID
+        before ([ObjectId]): OPTIONAL, ONLY POSITIONS WITH A SMALLER _id
+    Returns:
+        [list]: PIPELINE, ROWS ARE {_id: STRATEGY, Wins, Loss, Count, Profit_Loss, Avg_ROV, Std_ROV, Drawdowns}
+    """
+
+    match = {"Account_ID": account_id, "ROV": {"$ne": 0}}
+
+    if before is not None:
+
+        match["_id"] = {"$lt": before}
+
+    return [
+        {"$match": match},
+        {"$sort": {"_id": 1}},
+        {"$group": {
+            "_id": "$Strategy",
+            "Wins": {"$sum": {"$cond": [{"$gt": ["$ROV", 0]}, 1, 0]}},
+            "Loss": {"$sum": {"$cond": [{"$lt": ["$ROV", 0]}, 1, 0]}},
+            "Count": {"$sum": 1},
+            "Profit_Loss": {"$sum": {"$subtract": [
+                {"$multiply": ["$Sell_Price", "$Qty"]},
+                {"$multiply": ["$Buy_Price", "$Qty"]}]}},
+            "Avg_ROV": {"$avg": "$ROV"},
+            "Std_ROV": {"$stdDevSamp": "$ROV"},
+            "Drawdowns": {"$push": {"$subtract": ["$Sell_Price", "$Buy_Price"]}}
+        }}
+    ]
+
+
+def strategyAggregates(account_id, before=None):
+    """ METHOD RUNS strategyPipeline INSIDE MONGO, ONE SUMMARY ROW PER STRATEGY CROSSES THE WIRE
+    Returns:
+        [dict]: STRATEGY -> {Wins, Loss, Count, Profit_Loss, Avg_ROV, Std_ROV, Drawdowns}
+    """
+
+    return {row.pop("_id"): row for row in mongo.db.closed_positions.aggregate(
+        strategyPipeline(account_id, before), allowDiskUse=True)}
+
+
+def aggregatedDoc(account_id, strategy, row, metric):
+    """ METHOD TURNS ONE strategyAggregates ROW AND ITS strategyMetrics DRAWDOWN STATE INTO A ROLLUP DOCUMENT,
+        THE SAME DOCUMENT FOLDING THE STRATEGY'S POSITIONS ONE BY ONE GIVES
+    """
+
+    doc = newStats(account_id, strategy)
+
+    doc.update({
+        "Wins": row["Wins"],
+        "Loss": row["Loss"],
+        "Count": row["Count"],
+        "Profit_Loss": row["Profit_Loss"],
+        "ROV_Mean": row["Avg_ROV"],
+        "ROV_M2": (row["Std_ROV"] or 0) ** 2 * (row["Count"] - 1),
+        "DD_Peak": metric["Peak"],
+        "DD_Max": metric["MDD"]
+    })
+
+    return doc
+
+
+def aggregatedStats(account_id, aggregates):
+    """ METHOD TURNS THE strategyAggregates OF AN ACCOUNT INTO ITS ROLLUP, INSTEAD OF FOLDING EVERY POSITION
+    Returns:
+        [dict]: STRATEGY -> ROLLUP DOCUMENT (NOT STORED)
+    """
+
+    # ONE BATCHED CALL FOR THE DRAWDOWN STATE OF EVERY STRATEGY
+    metrics = strategyMetrics(
+        {strategy: row["Drawdowns"] for strategy, row in aggregates.items()})
+
+    return {strategy: aggregatedDoc(account_id, strategy, row, metrics[strategy]) for strategy, row in aggregates.items()}
+
+
+def rebuildStrategyStats(account_id, attempts=5):
+    """ METHOD REBUILDS AN ACCOUNT'S ROLLUP FROM SCRATCH UP TO settledMark, USED FOR BACKFILLS AND TO SEED NEW ACCOUNTS
+        EACH STRATEGY'S DOCUMENT IS REPLACED IN PLACE (READERS NEVER SEE IT MISSING). A REFRESH THAT WRITES IN BETWEEN MAKES THE
+        REPLACE FAIL AND THE PASS IS REPEATED.
+    Args:
+        account_id ([int]): ACCOUNT ID
+        attempts ([int]): PASSES BEFORE GIVING UP ON A BUSY ACCOUNT
+    Returns:
+        [int]: NUMBER OF STRATEGIES WRITTEN
+    """
+
+    for _ in range(attempts):
+
+        stored = {doc["Strategy"]: doc for doc in mongo.db.strategy_stats.find(
+            {"Account_ID": account_id}, {"Strategy": 1, "Version": 1})}
+
+        mark = settledMark()
+
+        stats = aggregatedStats(account_id, strategyAggregates(account_id, mark))
+
+        conflicts = 0
+
+        for strategy, doc in stats.items():
+
+            doc["Last_ID"] = mark
+
+            if strategy in stored:
+
+                doc["_id"] = stored[strategy]["_id"]
+
+            conflicts += not writeStats(doc, stored.get(strategy, {}).get("Version"))
+
+        if not conflicts:
+
+            return len(stats)
+
+    logger.WARNING(f"Strategy Stats Rebuild Kept Conflicting - ACCOUNT ID:{account_id}")
+
+    return 0
+
+
+def refreshAllStrategyStats():
+
+    for account_id in mongo.db.closed_positions.distinct("Account_ID"):
+
+        try:
+
+            refreshStrategyStats(account_id)
+
+        except Exception:
+
+            logger.ERROR(f"Strategy Stats Refresh Failed - ACCOUNT ID:{account_id}")
+
+
+@click.command("refresh-strategy-stats")
+@click.option("--every", type=float, default=0, help="Seconds between passes, 0 runs one pass and exits (for cron).")
+@with_appcontext
+def refresh_strategy_stats_command(every):
+    """ Fold new closed positions into the strategy_stats rollup, seeding accounts that have none. """
+
+    while True:
+
+        refreshAllStrategyStats()
+
+        if not every:
+
+            return
+
+        time.sleep(every)
+
+
+@click.command("rebuild-strategy-stats")
+@click.option("--account-id", "account_ids", type=int, multiple=True, help="Account ID to rebuild, defaults to every account with closed positions.")
+@with_appcontext
+def rebuild_strategy_stats_command(account_ids):
+    """ Rebuild the strategy_stats rollup from closed_positions. """
+
+    if not account_ids:
+
+        account_ids = mongo.db.closed_positions.distinct("Account_ID")
+
+    for account_id in account_ids:
+
+        count = rebuildStrategyStats(account_id)
+
+        logger.INFO(
+            f"Rebuilt Strategy Stats - ACCOUNT ID:{account_id} STRATEGIES:{count}")
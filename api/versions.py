@@ -0,0 +1,327 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from functools import wraps
+import hashlib
+import time
+import uuid
+import click
+from flask import current_app, jsonify, make_response, request
+from flask.cli import with_appcontext
+from pymongo import UpdateOne
+
+from assets.logger import Logger
+from api.sections import SECTIONS
+from extensions import mongo, user_cache, equity_cache, seen_versions
+from extensions.stream import changedAccounts
+
+logger = Logger()
+
+# PER-ACCOUNT DATA VERSIONS FOR CONDITIONAL GETs, STORED IN account_versions:
+#   {_id: "<Account_ID>", users: N, queue: N, ...}  ONE COUNTER PER SOURCE COLLECTION OF THE ACCOUNT, _id IS THE URL'S STRING ID
+#   {_id: "global", Epoch, Heartbeat, quotes: N, ...}  CHANGES THAT CAN'T BE TIED TO ONE ACCOUNT (QUOTES, DELETES WITHOUT A PRE-IMAGE)
+# THE WRITE ROUTES BUMP "users" THEMSELVES. EVERYTHING ELSE (THE TRADING BOT'S WRITES) IS BUMPED BY ONE
+# "flask --app run watch-versions" PROCESS FOLLOWING A CHANGE STREAM. IT HEARTBEATS INTO THE global DOCUMENT AND STARTS A NEW Epoch
+# EVERY TIME IT (RE)CONNECTS, SO CHANGES MADE WHILE IT WAS DOWN CAN'T HIDE BEHIND AN OLD ETag.
+# WHEN THE HEARTBEAT IS OLDER THAN VERSION_STALE_SECONDS THE ROUTES SKIP ETAGS AND ANSWER IN FULL, AS BEFORE.
+
+# SECTION -> COLLECTIONS ITS PAYLOAD IS BUILT FROM, DECLARED ON EACH SECTION (SEE api.sections.sources)
+SECTION_SOURCES = {name: section.sources for name, section in SECTIONS.items()}
+
+# ROUTES THAT AREN'T DASHBOARD SECTIONS
+LISTING_SOURCES = {
+    "closed_positions": ("closed_positions",)
+}
+
+SOURCES = {**SECTION_SOURCES, **LISTING_SOURCES}
+
+VERSIONED_COLLECTIONS = sorted({collection for sources in SOURCES.values() for collection in sources})
+
+# COLLECTIONS WITHOUT AN Account_ID, ALWAYS COUNTED ON THE global DOCUMENT
+GLOBAL_COLLECTIONS = {"quotes"}
+
+GLOBAL = "global"
+
+
+def sectionNames(names, args):
+    """ METHOD RETURNS THE SECTIONS A ROUTE BUILDS, names OR THE DASHBOARD'S ?sections= (ALL BY DEFAULT). None IF ONE IS UNKNOWN """
+
+    if names:
+
+        return names
+
+    requested = args.get("sections")
+
+    names = [name.strip() for name in requested.split(",") if name.strip()] if requested else list(SECTION_SOURCES)
+
+    return names if all(name in SECTION_SOURCES for name in names) else None
+
+
+def versionsQuery(account_id):
+
+    return {"_id": {"$in": [account_id, GLOBAL]}}
+
+
+def resolveVersions(docs, account_id, stale_seconds):
+    """ METHOD SPLITS THE account_versions DOCUMENTS OF ONE ACCOUNT
+    Returns:
+        [tuple]: (ACCOUNT COUNTERS, global DOCUMENT), OR None WHEN THE WATCHER'S HEARTBEAT IS MISSING OR STALE
+    """
+
+    docs = {doc["_id"]: doc for doc in docs}
+
+    shared = docs.get(GLOBAL)
+
+    if not shared or "Heartbeat" not in shared:
+
+        return None
+
+    if shared["Heartbeat"] < datetime.utcnow() - timedelta(seconds=stale_seconds):
+
+        return None
+
+    return docs.get(account_id, {}), shared
+
+
+def versionKey(collection, versions):
+
+    counters, shared = versions
+
+    return (shared["Epoch"], counters.get(collection, 0), shared.get(collection, 0))
+
+
+def makeEtag(endpoint, names, versions, query_string):
+    """ METHOD HASHES EVERYTHING THE RESPONSE DEPENDS ON: THE ROUTE, ITS QUERY STRING, THE SOURCE VERSIONS AND TODAY'S DATE
+        (RELATIVE RANGES LIKE range=7d MOVE AT MIDNIGHT WITHOUT ANY WRITE)
+    """
+
+    sources = sorted({collection for name in names for collection in SOURCES[name]})
+
+    parts = [endpoint, query_string, date.today().isoformat()] + \
+        [f"{collection}:{versionKey(collection, versions)}" for collection in sources]
+
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+
+
+def refreshCaches(current_user, account_id, names, versions):
+    """ METHOD DROPS THE IN-PROCESS CACHE ENTRIES (user_cache, equity_cache) WHOSE SOURCE CHANGED SINCE THIS PROCESS LAST SAW IT,
+        SO A FRESH ETag IS NEVER ATTACHED TO A CACHED PAYLOAD THAT IS OLDER THAN IT
+    """
+
+    for collection in {collection for name in names for collection in SOURCES[name]}:
+
+        key = (account_id, collection)
+
+        version = versionKey(collection, versions)
+
+        if seen_versions.get(key) == version:
+
+            continue
+
+        # ALSO ON THE FIRST SIGHT (OR ONCE seen_versions EXPIRED IT), THE CACHED ENTRY MAY PREDATE EVERY VERSION THIS PROCESS KNOWS
+        if collection == "users":
+
+            user_cache.pop(current_user["id"]["$oid"])
+
+        elif collection == "closed_positions":
+
+            equity_cache.evict(lambda cached: str(cached[0]) == account_id)
+
+        seen_versions.set(key, version)
+
+
+def bumpUpdate(collections):
+
+    return {"$inc": {collection: 1 for collection in collections}}
+
+
+def bumpVersions(account_id, collections):
+    """ METHOD BUMPS THE ACCOUNT'S VERSION OF EACH COLLECTION, CALLED BY THE WRITE ROUTES AFTER THEIR UPDATE """
+
+    mongo.db.account_versions.update_one({"_id": account_id}, bumpUpdate(collections), upsert=True)
+
+
+def conditional(*names):
+    """ METHOD IS A DECORATOR FOR GET ROUTES (UNDER token_required) THAT ANSWERS 304 ON A MATCHING If-None-Match
+        BEFORE THE ROUTE RUNS, AND TAGS 200 RESPONSES WITH A WEAK ETag
+    Args:
+        names ([str]): SECTIONS THE ROUTE RETURNS, NONE FOR THE DASHBOARD (READS ?sections=)
+    Returns:
+        [function]: DECORATOR
+    """
+
+    def decorator(f):
+
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+
+            sections = sectionNames(names, request.args)
+
+            account_id = kwargs["account_id"]
+
+            if sections is None:
+
+                return f(current_user, *args, **kwargs)
+
+            versions = resolveVersions(mongo.db.account_versions.find(versionsQuery(account_id)),
+                                       account_id, current_app.config["VERSION_STALE_SECONDS"])
+
+            if versions is None:
+
+                return f(current_user, *args, **kwargs)
+
+            refreshCaches(current_user, account_id, sections, versions)
+
+            etag = makeEtag(request.endpoint, sections, versions, request.query_string.decode())
+
+            if request.if_none_match.contains_weak(etag):
+
+                # THE ACCOUNT MUST STILL BELONG TO THE USER, FROM THE CACHED USER DOCUMENT. api.loaders IMPORTS THIS MODULE
+                from api.loaders import getAccount
+
+                try:
+
+                    getAccount(current_user, account_id)
+
+                except KeyError:
+
+                    return jsonify({"error": f"Account ID {account_id} Not Found"}), 400
+
+                response = make_response("", 304)
+
+            else:
+
+                response = make_response(f(current_user, *args, **kwargs))
+
+                if response.status_code != 200:
+
+                    return response
+
+            response.set_etag(etag, weak=True)
+
+            response.headers["Cache-Control"] = "private, no-cache"
+
+            return response
+
+        return decorated
+
+    return decorator
+
+##########################################################
+## WATCHER ###############################################
+
+
+def changeTargets(change):
+    """ METHOD RETURNS THE (ACCOUNT ID OR "global", COLLECTION) PAIRS ONE CHANGE STREAM EVENT BUMPS """
+
+    collection = change["ns"]["coll"]
+
+    description = change.get("updateDescription")
+
+    if collection in GLOBAL_COLLECTIONS:
+
+        return [(GLOBAL, collection)]
+
+    document = change.get("fullDocument") or change.get("fullDocumentBeforeChange")
+
+    if collection == "users":
+
+        accounts = None
+
+        if description:
+
+            accounts = changedAccounts(list(description.get("updatedFields", {})) + description.get("removedFields", []))
+
+        if accounts is None and document:
+
+            accounts = list(document.get("Accounts", {}))
+
+        if accounts is None:
+
+            return [(GLOBAL, collection)]
+
+        return [(account_id, collection) for account_id in accounts]
+
+    if document and "Account_ID" in document:
+
+        return [(str(document["Account_ID"]), collection)]
+
+    return [(GLOBAL, collection)]
+
+
+def flushBumps(db, bumps):
+
+    if not bumps:
+
+        return
+
+    targets = {}
+
+    for (target, collection), count in bumps.items():
+
+        targets.setdefault(target, {})[collection] = count
+
+    db.account_versions.bulk_write([UpdateOne({"_id": target}, {"$inc": counts}, upsert=True)
+                                    for target, counts in targets.items()], ordered=False)
+
+    bumps.clear()
+
+
+def watchVersions(db, heartbeat, batch_size=500):
+    """ METHOD FOLLOWS THE CHANGE STREAM AND BUMPS account_versions UNTIL THE STREAM FAILS
+        BUMPS ARE BATCHED UNTIL THE STREAM GOES IDLE OR batch_size CHANGES PILE UP (QUOTE BURSTS)
+    """
+
+    pipeline = [{"$match": {"ns.coll": {"$in": VERSIONED_COLLECTIONS}}}]
+
+    with db.watch(pipeline, full_document="updateLookup", full_document_before_change="whenAvailable",
+                  max_await_time_ms=1000) as stream:
+
+        # A NEW EPOCH INVALIDATES EVERY ETag ISSUED BEFORE THIS STREAM WAS OPEN
+        db.account_versions.update_one({"_id": GLOBAL}, {"$set": {
+            "Epoch": uuid.uuid4().hex, "Heartbeat": datetime.utcnow()}}, upsert=True)
+
+        logger.INFO("Version Watcher Started")
+
+        bumps = Counter()
+
+        beat = time.monotonic()
+
+        while stream.alive:
+
+            change = stream.try_next()
+
+            if change is not None:
+
+                bumps.update(changeTargets(change))
+
+            if change is None or sum(bumps.values()) >= batch_size:
+
+                flushBumps(db, bumps)
+
+            if time.monotonic() - beat >= heartbeat:
+
+                db.account_versions.update_one({"_id": GLOBAL}, {"$set": {"Heartbeat": datetime.utcnow()}})
+
+                beat = time.monotonic()
+
+
+@click.command("watch-versions")
+@with_appcontext
+def watch_versions_command():
+    """ Bump account_versions from a change stream (run one, keeps running). """
+
+    backoff = 1
+
+    while True:
+
+        try:
+
+            watchVersions(mongo.db, current_app.config["VERSION_HEARTBEAT_SECONDS"])
+
+        except Exception:
+
+            logger.ERROR("Version Watcher Failed")
+
+        time.sleep(backoff)
+
+        backoff = min(backoff * 2, 60)
@@ -0,0 +1,136 @@
+# ASYNC SERVING MODE: THE api BLUEPRINT ON QUART + PYMONGO'S ASYNCIO CLIENT (api/async_routes.py)
+# RUN: hypercorn asgi:app --bind 0.0.0.0:8001 [--workers N]
+# ONE EVENT LOOP PER WORKER HOLDS MANY IN-FLIGHT REQUESTS, THE INDEPENDENT MONGO QUERIES OF A REQUEST ARE AWAITED TOGETHER.
+# ONLY /api AND THE HEALTH CHECKS ARE SERVED HERE. LOGIN STAYS ON THE WSGI APP (run.py), TOKENS WORK ON BOTH AS LONG AS THEY SHARE THE SECRET KEY.
+from quart import Quart, jsonify
+from quart_cors import cors
+from dotenv import load_dotenv
+import os
+import pymongo
+
+from api.async_routes import api
+from extensions import async_mongo, metrics, user_cache, equity_cache, token_cache, seen_versions, stream_hub, compress
+from extensions.json_provider import OrjsonProvider
+
+THIS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+load_dotenv(dotenv_path=f"{THIS_FOLDER}/assets/.env")
+
+MONGO_URI = os.getenv('MONGO_URI')
+
+SECRET_KEY = os.getenv('SECRET_KEY')
+
+SECRET_KEY_FILE = os.getenv('SECRET_KEY_FILE')
+
+SECRET_KEY_USER = os.getenv('SECRET_KEY_USER', 'Trey Thomas')
+
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+
+READINESS_TIMEOUT = float(os.getenv('READINESS_TIMEOUT', 2))
+
+VERSION_STALE_SECONDS = float(os.getenv('VERSION_STALE_SECONDS', 30))
+
+COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+
+STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', 256))
+
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', 15))
+
+
+def create_app(config=None):
+
+    app = cors(Quart(__name__))
+
+    app.config["MONGO_URI"] = MONGO_URI
+
+    app.config["SECRET_KEY"] = SECRET_KEY
+
+    app.config["SECRET_KEY_USER"] = SECRET_KEY_USER
+
+    app.config["READINESS_TIMEOUT"] = READINESS_TIMEOUT
+
+    app.config["VERSION_STALE_SECONDS"] = VERSION_STALE_SECONDS
+
+    app.config["COMPRESS_ENABLED"] = COMPRESS_ENABLED
+
+    app.config["COMPRESS_MIN_SIZE"] = COMPRESS_MIN_SIZE
+
+    app.config["COMPRESS_LEVEL"] = COMPRESS_LEVEL
+
+    app.config["STREAM_QUEUE_SIZE"] = STREAM_QUEUE_SIZE
+
+    app.config["STREAM_HEARTBEAT"] = STREAM_HEARTBEAT
+
+    app.config.update(config or {})
+
+    if not app.config["SECRET_KEY"] and SECRET_KEY_FILE:
+
+        with open(SECRET_KEY_FILE) as f:
+
+            app.config["SECRET_KEY"] = f.read().strip()
+
+    # ObjectId AND datetime VALUES SERIALIZE THE SAME WAY AS ON THE WSGI APP
+    app.json = OrjsonProvider(app)
+
+    async_mongo.init_app(app, event_listeners=[metrics.command_listener],
+                         maxPoolSize=MONGO_MAX_POOL_SIZE)
+
+    user_cache.init_app(app)
+
+    equity_cache.init_app(app)
+
+    token_cache.init_app(app)
+
+    seen_versions.init_app(app)
+
+    stream_hub.init_app(app)
+
+    compress.init_app(app)
+
+    @app.before_serving
+    async def load_secret_key():
+
+        # LEGACY KEY, SEE extensions/secret.py. before_serving RUNS AFTER THE CLIENT IS CONNECTED.
+        if app.config["SECRET_KEY"]:
+
+            return
+
+        user = await async_mongo.db.users.find_one({"Name": app.config["SECRET_KEY_USER"]}, {"Password": 1})
+
+        if not user:
+
+            raise RuntimeError(
+                f"Secret key user not found: {app.config['SECRET_KEY_USER']}")
+
+        app.config["SECRET_KEY"] = user["Password"]
+
+    @app.route("/healthz")
+    async def healthz():
+
+        return jsonify({"status": "ok"}), 200
+
+    @app.route("/readyz")
+    async def readyz():
+
+        try:
+
+            with pymongo.timeout(app.config["READINESS_TIMEOUT"]):
+
+                await async_mongo.cx.admin.command("ping")
+
+        except Exception as e:
+
+            return jsonify({"status": "unavailable", "error": type(e).__name__}), 503
+
+        return jsonify({"status": "ready"}), 200
+
+    app.register_blueprint(api)
+
+    return app
+
+
+app = create_app()
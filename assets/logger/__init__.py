@@ -1,73 +1,249 @@
 # LOGGER FOR MAIN.PY
+# LOG CALLS ONLY FORMAT THE LINE AND PUT IT ON A QUEUE. ONE BACKGROUND WRITER THREAD PER PROCESS PRINTS IT,
+# APPENDS IT TO THE DAILY FILE (HANDLES STAY OPEN AND ROTATE WHEN THE DAY CHANGES) AND FLUSHES ONCE PER BATCH.
+# SET LOG_FORMAT=json FOR ONE JSON OBJECT PER LINE INSTEAD OF "LEVEL | DATE | MESSAGE".
 from datetime import datetime
-import pytz
+import atexit
+import json
 import os
+import queue
+import threading
+import time
 import traceback
+import pytz
 
 THIS_FOLDER = os.path.dirname(os.path.abspath(__file__))
 
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+CENTRAL = pytz.timezone("US/Central")
+
+# MAX LINES WRITTEN BEFORE THE FILES ARE FLUSHED
+BATCH_SIZE = 500
+
+
+class Clock:
+    """ US/CENTRAL WALL CLOCK AT SECOND RESOLUTION, THE TIMEZONE CONVERSION ONLY RUNS ONCE PER SECOND """
+
+    def __init__(self):
+
+        self._cached = (None, None)
+
+    def now(self):
+
+        second = int(time.time())
+
+        cached_second, value = self._cached
+
+        if cached_second != second:
+
+            value = datetime.fromtimestamp(second, tz=pytz.UTC).astimezone(
+                CENTRAL).replace(tzinfo=None)
+
+            self._cached = (second, value)
+
+        return value
+
+
+class LogWriter:
+    """ BACKGROUND WRITER SHARED BY EVERY Logger IN THE PROCESS """
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+
+        self._reset()
+
+    def _reset(self):
+
+        self.queue = queue.SimpleQueue()
+
+        self.thread = None
+
+        self.pid = None
+
+        self.files = {}
+
+    def put(self, record):
+
+        if self.pid != os.getpid():
+
+            self.start()
+
+        self.queue.put(record)
+
+    def start(self):
+
+        with self._lock:
+
+            if self.pid == os.getpid():
+
+                return
+
+            self.thread = threading.Thread(
+                target=self.run, name="log-writer", daemon=True)
+
+            self.thread.start()
+
+            self.pid = os.getpid()
+
+    def run(self):
+
+        while True:
+
+            batch = [self.queue.get()]
+
+            while len(batch) < BATCH_SIZE:
+
+                try:
+
+                    batch.append(self.queue.get_nowait())
+
+                except queue.Empty:
+
+                    break
+
+            try:
+
+                self.write(batch)
+
+            except Exception:
+
+                traceback.print_exc()
+
+    def write(self, batch):
+
+        touched = set()
+
+        waiting = []
+
+        for record in batch:
+
+            # FLUSH MARKER FROM flush()
+            if isinstance(record, threading.Event):
+
+                waiting.append(record)
+
+                continue
+
+            log_type, day, line = record
+
+            print(line)
+
+            handle = self.handle(log_type, day)
+
+            handle.write(f"{line}\n")
+
+            touched.add(handle)
+
+        for handle in touched:
+
+            handle.flush()
+
+        for event in waiting:
+
+            event.set()
+
+    def handle(self, log_type, day):
+
+        current = self.files.get(log_type)
+
+        if current and current[0] == day:
+
+            return current[1]
+
+        if current:
+
+            current[1].close()
+
+        handle = open(f"{THIS_FOLDER}/logs/{log_type}_{day}.txt", "a")
+
+        self.files[log_type] = (day, handle)
+
+        return handle
+
+    def flush(self, timeout=5):
+        """ METHOD BLOCKS UNTIL EVERYTHING QUEUED SO FAR IS WRITTEN """
+
+        if self.pid != os.getpid():
+
+            return
+
+        event = threading.Event()
+
+        self.queue.put(event)
+
+        event.wait(timeout)
+
+
+clock = Clock()
+
+writer = LogWriter()
+
+atexit.register(writer.flush)
+
+if hasattr(os, "register_at_fork"):
+
+    # THE WRITER THREAD DOESN'T SURVIVE A FORK, THE CHILD STARTS ITS OWN ON THE FIRST LOG CALL
+    os.register_at_fork(after_in_child=writer._reset)
+
 
 class Logger:
 
     def getDatetime(self):
 
-        dt = datetime.now(tz=pytz.UTC).replace(microsecond=0)
+        return clock.now()
 
-        dt_central = dt.astimezone(pytz.timezone('US/Central'))
+    def format(self, level, dt, message=None, tb=None):
 
-        return datetime.strptime(dt_central.strftime("%Y-%m-%d %H:%M:%S"), "%Y-%m-%d %H:%M:%S")
+        if LOG_FORMAT == "json":
 
-    def log(self, log, log_type="info"):
+            record = {"level": level, "time": dt.isoformat()}
 
-        with open(f"{THIS_FOLDER}/logs/{log_type}_{str(self.getDatetime()).split(' ')[0].replace('-', '_')}.txt", "a") as f:
+            if message is not None:
 
-            f.write(f"{log}\n")
+                record["message"] = str(message)
 
-    def INFO(self, info):
+            if tb:
 
-        # LEVEL | DATE | MESSAGE
-        log = f"INFO | {self.getDatetime()} | {info}"
+                record["traceback"] = tb
 
-        print(log)
+            return json.dumps(record)
 
-        self.log(log)
+        # LEVEL | DATE | MESSAGE
+        log = f"{level} | {dt}" if message is None else f"{level} | {dt} | {message}"
 
-    def WARNING(self, warning):
+        return f"{log}\n{tb}" if tb else log
 
-        # LEVEL | DATE | MESSAGE
-        log = f"WARNING | {self.getDatetime()} | {warning}"
+    def log(self, log, log_type="info", dt=None):
 
-        print(log)
+        dt = dt or self.getDatetime()
 
-        self.log(log)
+        writer.put((log_type, dt.strftime("%Y_%m_%d"), log))
 
-    def ERROR(self, error=None):
+    def INFO(self, info):
 
-        # LEVEL:DATETIME
-        if error == None:
+        dt = self.getDatetime()
 
-            log = f"ERROR | {self.getDatetime()}"
+        self.log(self.format("INFO", dt, info), dt=dt)
 
-        # LEVEL:DATETIME:MESSAGE
-        else:
+    def WARNING(self, warning):
 
-            log = f"ERROR | {self.getDatetime()} | {error}"
+        dt = self.getDatetime()
 
-        print(log)
+        self.log(self.format("WARNING", dt, warning), dt=dt)
 
-        tb = traceback.format_exc()
+    def ERROR(self, error=None):
 
-        print(tb)
+        dt = self.getDatetime()
 
-        log = f"{log}\n{tb}"
+        # THE TRACEBACK HAS TO BE CAPTURED ON THE CALLING THREAD
+        tb = traceback.format_exc()
 
-        self.log(log, "error")
+        self.log(self.format("ERROR", dt, error, tb), "error", dt=dt)
 
     def CRITICAL(self, error):
 
-        # LEVEL:DATETIME:MESSAGE
-        log = f"CRITICAL | {self.getDatetime()} | {error}"
-
-        print(log)
+        dt = self.getDatetime()
 
-        self.log(log, "error")
+        self.log(self.format("CRITICAL", dt, error), "error", dt=dt)
@@ -2,12 +2,12 @@ from flask import Blueprint, current_app, request
 from assets.logger import Logger
 from flask import jsonify
 from flask_cors import cross_origin
-import jwt
-from datetime import datetime, timedelta
-from bson import json_util
-import json
+from concurrent.futures import TimeoutError as PoolTimeout
+import math
 
-from extensions import mongo, bcrypt
+from extensions import mongo, bcrypt, login_throttle, password_pool
+from extensions.throttle import PoolFull
+from auth.tokens import RefreshError, TokenError, revokeRefreshToken, rotateRefreshToken, tokenPair, verifyToken
 
 logger = Logger()
 
@@ -18,28 +18,25 @@ auth = Blueprint("auth", __name__)
 @cross_origin()
 def checkAuthToken():
 
-    token = None
+    token = request.headers.get("x-access-token")
 
-    if "x-access-token" in request.headers:
+    if not token:
 
-        token = request.headers["x-access-token"]
+        logger.WARNING("Missing Token")
 
-        try:
+        return jsonify({"error": "Missing Token"}), 401
 
-            jwt.decode(
-                token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
-
-            return jsonify({"success": True}), 200
+    try:
 
-        except Exception as e:
+        verifyToken(token, current_app.config["SECRET_KEY"])
 
-            logger.WARNING("Token Expired")
+    except TokenError as e:
 
-            return jsonify({"error": "Token Expired"}), 401
+        logger.WARNING(str(e))
 
-    logger.WARNING("Missing Token")
+        return jsonify({"error": str(e)}), 401
 
-    return jsonify({"error": "Missing Token"}), 401
+    return jsonify({"success": True}), 200
 
 
 @auth.route("/login", methods=["POST"])
@@ -52,21 +49,29 @@ def login():
 
         password = request.json["password"]
 
+        ip = request.remote_addr
+
+        # LOCKED OUT USERNAMES AND IPS ARE REJECTED BEFORE ANY BCRYPT WORK
+        retry_after = login_throttle.retryAfter(username, ip)
+
+        if retry_after:
+
+            logger.WARNING(
+                f"Login Throttled - USERNAME:{username} IP:{ip}")
+
+            return jsonify({"error": "Too Many Attempts"}), 429, {"Retry-After": str(math.ceil(retry_after))}
+
         user = mongo.db.users.find_one({
             "Username": username
         })
 
         if user:
 
-            if bcrypt.check_password_hash(user["Password"], password):
+            if password_pool.check(bcrypt.check_password_hash, user["Password"], password):
 
-                obj = {
-                    "id": user["_id"],
-                    "Name": user["Name"]
-                }
+                login_throttle.succeeded(username, ip)
 
-                token = jwt.encode({"user": json.loads(json_util.dumps(obj)), "exp": datetime.utcnow(
-                ) + timedelta(hours=24)}, current_app.config["SECRET_KEY"], algorithm="HS256")
+                tokens = tokenPair(user["_id"], user["Name"])
 
                 logger.INFO(f"Login Successful - USERNAME:{username}")
 
@@ -81,16 +86,71 @@ def login():
                     "Account_IDs" : [account_id for account_id in user["Accounts"].keys()]
                 }
 
-                return jsonify({"token": token, "data" : obj})
+                return jsonify({**tokens, "data" : obj})
+
+        login_throttle.failed(username, ip)
 
         logger.WARNING(
-            f"Invalid Credentials - USERNAME:{username} PASSWORD:{password}")
+            f"Invalid Credentials - USERNAME:{username} IP:{ip}")
 
         return jsonify({"error": "Invalid Credentials"}), 401
 
-    except Exception as e:
-        print(e)
+    except PoolFull:
+
+        logger.WARNING("Login Rejected - Password Pool Full")
+
+        return jsonify({"error": "Server Busy"}), 503, {"Retry-After": "1"}
+
+    except PoolTimeout:
+
+        # THE POOL IS SATURATED, NOT A WRONG PASSWORD, SO NO THROTTLE FAILURE IS RECORDED
+        logger.WARNING("Login Rejected - Password Check Timed Out")
 
-        logger.WARNING(f"Invalid Credentials")
+        return jsonify({"error": "Server Busy"}), 503, {"Retry-After": str(math.ceil(password_pool.timeout))}
+
+    except Exception:
+
+        logger.ERROR("Login Failed")
 
         return jsonify({"error": "Invalid Credentials"}), 401
+
+
+@auth.route("/refresh", methods=["POST"])
+@cross_origin()
+def refresh():
+    """ METHOD TRADES A REFRESH TOKEN FOR A NEW ACCESS TOKEN AND A NEW REFRESH TOKEN, NO PASSWORD CHECK
+    Body:
+        refresh_token ([str]): REFRESH TOKEN FROM /login OR THE LAST /refresh, IT CAN ONLY BE USED ONCE
+    Returns:
+        [json]: {token, refresh_token, expires_in}
+    """
+
+    token = (request.get_json(silent=True) or {}).get("refresh_token")
+
+    if not token:
+
+        return jsonify({"error": "Missing Refresh Token"}), 401
+
+    try:
+
+        return jsonify(rotateRefreshToken(token)), 200
+
+    except RefreshError as e:
+
+        logger.WARNING(f"Refresh Rejected - {e} IP:{request.remote_addr}")
+
+        return jsonify({"error": str(e)}), 401
+
+
+@auth.route("/logout", methods=["POST"])
+@cross_origin()
+def logout():
+    """ METHOD REVOKES A REFRESH TOKEN AND EVERY TOKEN ROTATED FROM THE SAME LOGIN """
+
+    token = (request.get_json(silent=True) or {}).get("refresh_token")
+
+    if not token or not revokeRefreshToken(token):
+
+        return jsonify({"error": "Invalid Refresh Token"}), 401
+
+    return jsonify({"success": True}), 200
@@ -0,0 +1,238 @@
+from datetime import datetime, timedelta
+from functools import partial, wraps
+import hashlib
+import hmac
+import secrets
+import time
+import uuid
+from flask import current_app, g, jsonify, request
+from pymongo import ReturnDocument
+import jwt
+
+from assets.logger import Logger
+from extensions import mongo, token_cache
+
+logger = Logger()
+
+# ACCESS TOKENS ARE HS256 JWTs THAT LIVE ACCESS_TOKEN_MINUTES. REFRESH TOKENS ARE OPAQUE RANDOM STRINGS (REFRESH_TOKEN_DAYS)
+# KEPT IN THE refresh_tokens COLLECTION BY THEIR SHA-256, SO A DATABASE LEAK DOESN'T LEAK USABLE TOKENS.
+# EVERY REFRESH ROTATES: THE PRESENTED TOKEN IS REVOKED AND A NEW ONE FROM THE SAME Family IS ISSUED. PRESENTING AN ALREADY
+# ROTATED TOKEN MEANS IT WAS COPIED, SO THE WHOLE FAMILY IS REVOKED. EXPIRED DOCUMENTS ARE DROPPED BY A TTL INDEX ON Expires_At.
+
+
+# ACCESS TOKEN CHECKS ARE SHARED BY token_required (api/routes.py, api/async_routes.py) AND /checkAuthToken.
+# A VERIFIED TOKEN IS CACHED IN token_cache UNDER HMAC(SECRET_KEY, TOKEN) UNTIL ITS exp (CAPPED BY TOKEN_CACHE_TTL),
+# SO A DASHBOARD'S WORTH OF REQUESTS DECODES IT ONCE. ROTATING SECRET_KEY CHANGES EVERY DIGEST, OLD ENTRIES ARE NEVER HIT AGAIN.
+
+
+class TokenError(Exception):
+    """ RAISED WHEN AN ACCESS TOKEN IS EXPIRED OR INVALID, THE MESSAGE IS RETURNED TO THE CLIENT """
+
+
+class RefreshError(Exception):
+    """ RAISED WHEN A REFRESH TOKEN IS UNKNOWN, EXPIRED, REVOKED OR REUSED """
+
+
+def verifyToken(token, secret):
+    """ METHOD VERIFIES AN ACCESS TOKEN, FROM token_cache WHEN IT WAS ALREADY VERIFIED WITH THE SAME SECRET
+    Args:
+        token ([str]): JWT FROM THE x-access-token HEADER
+        secret ([str]): CURRENT SECRET_KEY
+    Returns:
+        [dict]: DECODED CLAIMS, SHARED, CALLERS MUST NOT MUTATE THEM
+    Raises:
+        TokenError: EXPIRED OR INVALID TOKEN
+    """
+
+    digest = hmac.new(secret.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+    claims = token_cache.get(digest)
+
+    if claims is not None:
+
+        if claims["exp"] > time.time():
+
+            return claims
+
+        token_cache.pop(digest)
+
+        raise TokenError("Token Expired")
+
+    try:
+
+        claims = jwt.decode(token, secret, algorithms=["HS256"], options={"require": ["exp"]})
+
+    except jwt.ExpiredSignatureError:
+
+        raise TokenError("Token Expired")
+
+    except jwt.InvalidTokenError:
+
+        raise TokenError("Token Decode Error")
+
+    token_cache.set(digest, claims, ttl=min(
+        claims["exp"] - time.time(), token_cache.ttl))
+
+    return claims
+
+
+def requestToken(request, query=False):
+    """ METHOD READS THE ACCESS TOKEN FROM THE x-access-token HEADER, OR THE ?token= PARAM WHEN query IS SET
+        (EventSource CAN'T SEND HEADERS, ONLY THE SSE ROUTES ALLOW IT SO TOKENS DON'T END UP IN EVERY ACCESS LOG)
+    """
+
+    return request.headers.get("x-access-token") or (request.args.get("token") if query else None)
+
+
+def token_required(f=None, query=False):
+    """ METHOD IS A DECORATOR THATS CHECKS IF TOKEN IS VALID, THEN CALLS f WITH THE TOKEN'S USER AS ITS FIRST ARGUMENT
+        THE USER IS ALSO LEFT ON g.current_user FOR ANYTHING ELSE THE REQUEST RUNS
+    Args:
+        f ([function]): FUNCTION THAT IS BEING CALLED
+        query ([bool]): ALSO ACCEPT THE TOKEN AS ?token=, USED AS @token_required(query=True)
+    Returns:
+        [function]: FUNCTION THAT IS BEING CALLED
+    """
+
+    if f is None:
+
+        return partial(token_required, query=query)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+
+        token = requestToken(request, query)
+
+        if not token:
+
+            return jsonify({"error": "Token Does Not Exist"}), 401
+
+        try:
+
+            claims = verifyToken(token, current_app.config["SECRET_KEY"])
+
+        except TokenError as e:
+
+            logger.WARNING(str(e))
+
+            return jsonify({"error": str(e)}), 401
+
+        g.current_user = claims["user"]
+
+        return f(g.current_user, *args, **kwargs)
+
+    return decorated
+
+
+def tokenHash(token):
+
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def accessToken(user_id, name):
+    """ METHOD SIGNS AN ACCESS TOKEN
+    Args:
+        user_id ([ObjectId]): USER _id
+        name ([str]): USER Name
+    Returns:
+        [str]: JWT
+    """
+
+    return jwt.encode({
+        "user": {"id": {"$oid": str(user_id)}, "Name": name},
+        "exp": datetime.utcnow() + timedelta(minutes=current_app.config["ACCESS_TOKEN_MINUTES"])
+    }, current_app.config["SECRET_KEY"], algorithm="HS256")
+
+
+def issueRefreshToken(user_id, name, family=None):
+    """ METHOD STORES A NEW REFRESH TOKEN
+    Args:
+        user_id ([ObjectId]): USER _id
+        name ([str]): USER Name, KEPT SO A REFRESH DOESN'T NEED THE USERS COLLECTION
+        family ([str]): ROTATION CHAIN, A NEW ONE IS STARTED AT LOGIN
+    Returns:
+        [str]: THE TOKEN, ONLY ITS HASH IS STORED
+    """
+
+    token = secrets.token_urlsafe(32)
+
+    now = datetime.utcnow()
+
+    mongo.db.refresh_tokens.insert_one({
+        "Token_Hash": tokenHash(token),
+        "User_ID": user_id,
+        "Name": name,
+        "Family": family or uuid.uuid4().hex,
+        "Created_At": now,
+        "Expires_At": now + timedelta(days=current_app.config["REFRESH_TOKEN_DAYS"]),
+        "Revoked": False
+    })
+
+    return token
+
+
+def tokenPair(user_id, name, family=None):
+
+    return {
+        "token": accessToken(user_id, name),
+        "refresh_token": issueRefreshToken(user_id, name, family),
+        "expires_in": current_app.config["ACCESS_TOKEN_MINUTES"] * 60
+    }
+
+
+def rotateRefreshToken(token):
+    """ METHOD SPENDS A REFRESH TOKEN AND ISSUES A NEW ACCESS/REFRESH PAIR FROM THE SAME FAMILY
+    Returns:
+        [dict]: {token, refresh_token, expires_in}
+    Raises:
+        RefreshError: THE TOKEN IS UNKNOWN, EXPIRED OR REVOKED. A REVOKED TOKEN ALSO REVOKES ITS FAMILY.
+    """
+
+    now = datetime.utcnow()
+
+    # ONE ATOMIC UPDATE, TWO CONCURRENT REFRESHES WITH THE SAME TOKEN CAN'T BOTH WIN
+    spent = mongo.db.refresh_tokens.find_one_and_update(
+        {"Token_Hash": tokenHash(token), "Revoked": False, "Expires_At": {"$gt": now}},
+        {"$set": {"Revoked": True, "Revoked_At": now}},
+        projection={"User_ID": 1, "Name": 1, "Family": 1},
+        return_document=ReturnDocument.BEFORE)
+
+    if spent:
+
+        return tokenPair(spent["User_ID"], spent["Name"], spent["Family"])
+
+    reused = mongo.db.refresh_tokens.find_one(
+        {"Token_Hash": tokenHash(token), "Revoked": True}, {"Family": 1})
+
+    if reused:
+
+        revokeFamily(reused["Family"])
+
+        raise RefreshError("Refresh Token Reused")
+
+    raise RefreshError("Invalid Refresh Token")
+
+
+def revokeRefreshToken(token):
+    """ METHOD REVOKES THE FAMILY OF A REFRESH TOKEN (LOGOUT)
+    Returns:
+        [bool]: FALSE IF THE TOKEN IS UNKNOWN
+    """
+
+    doc = mongo.db.refresh_tokens.find_one(
+        {"Token_Hash": tokenHash(token)}, {"Family": 1})
+
+    if not doc:
+
+        return False
+
+    revokeFamily(doc["Family"])
+
+    return True
+
+
+def revokeFamily(family):
+
+    mongo.db.refresh_tokens.update_many(
+        {"Family": family, "Revoked": False},
+        {"$set": {"Revoked": True, "Revoked_At": datetime.utcnow()}})
@@ -0,0 +1,88 @@
+# BENCHMARK api.analytics AGAINST THE OLD PURE PYTHON api/helpers.py IMPLEMENTATIONS
+# RUN FROM THE REPO ROOT: python -m benchmarks.bench_analytics [--trades 5000] [--strategies 10] [--repeat 20]
+# CORRECTNESS OF api.analytics IS COVERED BY tests/test_analytics.py, THIS SCRIPT ONLY TIMES IT
+import argparse
+import random
+import statistics
+import timeit
+
+from api import analytics
+
+
+def legacyMaxDrawDown(value):
+
+    try:
+
+        max_value = max(value["Drawdowns"])
+
+        max_index = value["Drawdowns"].index(max_value)
+
+        min_value = min(value["Drawdowns"][max_index:])
+
+        return round(max_value - min_value, 2)
+
+    except:
+
+        return 0
+
+
+def legacySharpeRatio(value):
+
+    try:
+
+        return round(statistics.mean(value["Avg_ROV"]) / statistics.stdev(value["Avg_ROV"]), 2)
+
+    except:
+
+        return 0
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--trades", type=int, default=5000)
+
+    parser.add_argument("--strategies", type=int, default=10)
+
+    parser.add_argument("--repeat", type=int, default=20)
+
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+
+    series = {f"STRATEGY_{i}": [rng.gauss(0.2, 2.5) for _ in range(rng.randint(args.trades // 2, args.trades))]
+              for i in range(args.strategies)}
+
+    def legacy():
+
+        for returns in series.values():
+
+            legacyMaxDrawDown({"Drawdowns": returns})
+
+            legacySharpeRatio({"Avg_ROV": returns})
+
+    def vectorized():
+
+        for returns in series.values():
+
+            analytics.maxDrawdown(returns)
+
+            analytics.sharpeRatio(returns)
+
+    def batched():
+
+        analytics.strategyMetrics(series)
+
+    print(f"{args.strategies} strategies, up to {args.trades} trades each, best of {args.repeat}")
+
+    for name, func in (("legacy helpers (MDD + SR)", legacy), ("analytics per strategy (MDD + SR)", vectorized), ("analytics batched (all metrics)", batched)):
+
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+
+        print(f"{name:<36} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,304 @@
+# BENCHMARK EVERY api/ AND auth/ ROUTE THROUGH THE FLASK TEST CLIENT
+# RUN FROM THE REPO ROOT:
+#   python -m benchmarks.bench_routes --uri mongodb://localhost:27017/tos_benchmark [--requests 50] [--seed]
+#   python -m benchmarks.bench_routes --in-process [--closed-positions 2000 --years 1]
+#   python -m benchmarks.bench_routes --compare benchmarks/results/<before>.json benchmarks/results/<after>.json
+# --seed (IMPLIED BY --in-process) DROPS AND RE-SEEDS THE DATABASE WITH benchmarks.seed FIRST.
+# EACH ENDPOINT REPORTS p50/p95/p99 LATENCY IN ms AND THE MONGO ROUND TRIPS PER REQUEST, RESULTS ARE SAVED AS JSON.
+# --in-process USES mongomock INSTEAD OF A SERVER. IT IS ONLY A ROUGH STAND-IN: NO COMMAND MONITORING (ROUND TRIPS ARE null),
+# NO INDEXES, AND SOME AGGREGATION STAGES AND BULK WRITES ARE UNSUPPORTED, SO THOSE ENDPOINTS SHOW UP WITH ERROR STATUSES.
+import argparse
+from collections import Counter
+from datetime import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+THIS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+RESULTS_FOLDER = os.path.join(THIS_FOLDER, "results")
+
+# ENDPOINT -> (METHOD, PATH, JSON BODY). {account_id} IS FILLED IN PER REQUEST.
+# "credentials" POSTS THE USER'S LOGIN, "refresh_token" THE LATEST REFRESH TOKEN (EACH RESPONSE ROTATES IT).
+# EVERY api/auth ENDPOINT MUST HAVE AN ENTRY OR BE LISTED IN SKIPPED, OTHERWISE THE RUN STOPS.
+SCENARIOS = {
+    "auth.checkAuthToken": ("GET", "/checkAuthToken", None),
+    "auth.login": ("POST", "/login", "credentials"),
+    "auth.refresh": ("POST", "/refresh", "refresh_token"),
+    "api.fetch_account_status": ("GET", "/api/account_status/{account_id}", None),
+    "api.fetch_account_balance": ("GET", "/api/account_balance/{account_id}", None),
+    "api.fetch_rate_of_return": ("GET", "/api/rate_of_return/{account_id}", None),
+    "api.fetch_number_of_holdings": ("GET", "/api/number_of_holdings/{account_id}", None),
+    "api.fetch_account_balance_history": ("GET", "/api/account_balance_history/{account_id}?range=1y", None),
+    "api.fetch_profit_loss_history": ("GET", "/api/profit_loss_history/{account_id}?range=1y", None),
+    "api.fetch_queued": ("GET", "/api/queued/{account_id}", None),
+    "api.fetch_closed_positions": ("GET", "/api/closed_positions/{account_id}?limit=100", None),
+    "api.export_dataset": ("GET", "/api/export/{account_id}/closed_positions?format=csv", None),
+    "api.fetch_forbidden_symbols": ("GET", "/api/forbidden_symbols/{account_id}", None),
+    "api.fetch_best_performing_equities": ("GET", "/api/best_performing_equities/{account_id}", None),
+    "api.fetch_worst_performing_equities": ("GET", "/api/worst_performing_equities/{account_id}", None),
+    "api.fetch_strategies": ("GET", "/api/strategies/{account_id}", None),
+    "api.fetch_open_positions": ("GET", "/api/open_positions/{account_id}", None),
+    "api.fetch_dashboard": ("GET", "/api/dashboard/{account_id}", None),
+    "api.change_account_status": ("PUT", "/api/change_account_status/{account_id}", {"account_status": "Inactive"}),
+    "api.add_forbidden_symbol": ("PUT", "/api/add_forbidden_symbol/{account_id}", {"symbol": "BENCH"}),
+    "api.update_strategy": ("PUT", "/api/update_strategy/{account_id}", {"data": {"Strategy": "MACD_XVER", "Shares": 10, "Status": "Active"}}),
+    "api.remove_forbidden_symbol": ("DELETE", "/api/remove_forbidden_symbol/{account_id}/BENCH", None)
+}
+
+# ENDPOINTS THAT CAN'T BE TIMED AS ONE REQUEST/RESPONSE
+# auth.logout REVOKES THE REFRESH TOKEN THE OTHER SCENARIOS ROTATE, api.stream_account NEVER ENDS
+SKIPPED = {"auth.logout", "api.stream_account"}
+
+
+def percentile(values, pct):
+
+    ordered = sorted(values)
+
+    if not ordered:
+
+        return None
+
+    index = (len(ordered) - 1) * pct / 100
+
+    lower = int(index)
+
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+def coveredEndpoints(app):
+    """ METHOD CHECKS EVERY api/auth ENDPOINT IN THE URL MAP HAS A SCENARIO """
+
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()
+                 if rule.endpoint.split(".")[0] in ("api", "auth")}
+
+    missing = endpoints - set(SCENARIOS) - SKIPPED
+
+    if missing:
+
+        sys.exit(f"NO BENCHMARK SCENARIO FOR: {', '.join(sorted(missing))}")
+
+    return [endpoint for endpoint in SCENARIOS if endpoint in endpoints]
+
+
+def login(client, credentials):
+
+    response = client.post("/login", json=credentials)
+
+    if response.status_code != 200:
+
+        sys.exit(f"LOGIN FAILED FOR {credentials['username']}: {response.status_code}")
+
+    return response.get_json()
+
+
+def benchmarkEndpoint(client, listener, endpoint, session, credentials, account_ids, requests, warmup):
+    """ METHOD TIMES ONE ENDPOINT, ROTATING THROUGH THE SEEDED ACCOUNTS
+    Returns:
+        [dict]: LATENCY PERCENTILES (ms), MONGO ROUND TRIPS PER REQUEST AND STATUS CODE COUNTS
+    """
+
+    method, path, body_type = SCENARIOS[endpoint]
+
+    body = credentials if body_type == "credentials" else body_type
+
+    latencies, round_trips, statuses = [], [], Counter()
+
+    for index in range(warmup + requests):
+
+        url = path.format(account_id=account_ids[index % len(account_ids)])
+
+        if body_type == "refresh_token":
+
+            body = {"refresh_token": session["refresh_token"]}
+
+        # THE TEST CLIENT RUNS THE REQUEST ON THIS THREAD, SO THE LISTENER'S THREAD LOCAL TIMELINE SEES ITS COMMANDS.
+        # THE DASHBOARD FANS OUT TO A THREAD POOL, THOSE COMMANDS ARE NOT COUNTED.
+        listener.startRecording()
+
+        start = time.perf_counter()
+
+        response = client.open(url, method=method, json=body,
+                               headers={"x-access-token": session["token"]})
+
+        response.get_data()
+
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if body_type == "refresh_token" and response.status_code == 200:
+
+            session.update(response.get_json())
+
+        timeline = listener.stopRecording()
+
+        if index < warmup:
+
+            continue
+
+        latencies.append(elapsed)
+
+        round_trips.append(len(timeline))
+
+        statuses[response.status_code] += 1
+
+    return {
+        "method": method,
+        "path": path,
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "mongo_round_trips": statistics.mean(round_trips) if any(round_trips) else None,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())}
+    }
+
+
+def compare(before_path, after_path):
+
+    with open(before_path) as f:
+
+        before = json.load(f)["endpoints"]
+
+    with open(after_path) as f:
+
+        after = json.load(f)["endpoints"]
+
+    print(f"{'ENDPOINT':40} {'p50 BEFORE':>11} {'p50 AFTER':>10} {'p95 BEFORE':>11} {'p95 AFTER':>10} {'TRIPS':>11}")
+
+    for endpoint in sorted(set(before) | set(after)):
+
+        old, new = before.get(endpoint, {}), after.get(endpoint, {})
+
+        trips = f"{old.get('mongo_round_trips')}->{new.get('mongo_round_trips')}"
+
+        print(f"{endpoint:40} {old.get('p50_ms', '-'):>11} {new.get('p50_ms', '-'):>10} "
+              f"{old.get('p95_ms', '-'):>11} {new.get('p95_ms', '-'):>10} {trips:>11}")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark every API route through the Flask test client.")
+
+    parser.add_argument("--uri", default="mongodb://localhost:27017/tos_benchmark")
+
+    parser.add_argument("--in-process", action="store_true",
+                        help="Use mongomock instead of a MongoDB server (approximate).")
+
+    parser.add_argument("--seed", action="store_true",
+                        help="Drop and re-seed the database first.")
+
+    parser.add_argument("--requests", type=int, default=50)
+
+    parser.add_argument("--warmup", type=int, default=3)
+
+    parser.add_argument("--users", type=int, default=2)
+
+    parser.add_argument("--accounts", type=int, default=2)
+
+    parser.add_argument("--strategies", type=int, default=5)
+
+    parser.add_argument("--closed-positions", type=int, default=5000)
+
+    parser.add_argument("--years", type=int, default=3)
+
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+
+    parser.add_argument("--output", help="Results file, defaults to benchmarks/results/<timestamp>.json")
+
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Print two saved results side by side and exit.")
+
+    args = parser.parse_args()
+
+    if args.compare:
+
+        compare(*args.compare)
+
+        return
+
+    # run READS THESE AT IMPORT TIME
+    os.environ["MONGO_URI"] = args.uri
+
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+    os.environ["MONGO_ENSURE_INDEXES"] = "false" if args.in_process else "true"
+
+    from benchmarks.seed import seed
+    from extensions import metrics, mongo
+    from run import create_app
+
+    app = create_app({"TESTING": True})
+
+    if args.in_process:
+
+        import mongomock
+
+        mongo.cx = mongomock.MongoClient()
+
+        mongo.db = mongo.cx.get_database(mongo.db.name)
+
+    if args.seed or args.in_process:
+
+        print("SEEDING...")
+
+        credentials = seed(mongo.db, users=args.users, accounts=args.accounts, strategies=args.strategies,
+                           closed_positions=args.closed_positions, years=args.years,
+                           bcrypt_rounds=args.bcrypt_rounds)
+
+    else:
+
+        credentials = [{"username": user["Username"], "password": f"password{index}", "account_ids": list(user["Accounts"])}
+                       for index, user in enumerate(mongo.db.users.find({}, {"Username": 1, "Accounts": 1}).sort("Username", 1))]
+
+    if not credentials:
+
+        sys.exit("NO USERS IN THE DATABASE, RUN WITH --seed")
+
+    # ALL REQUESTS RUN AS THE FIRST SEEDED USER
+    user = credentials[0]
+
+    client = app.test_client()
+
+    session = login(client, {"username": user["username"], "password": user["password"]})
+
+    results = {}
+
+    for endpoint in coveredEndpoints(app):
+
+        results[endpoint] = benchmarkEndpoint(client, metrics.command_listener, endpoint, session,
+                                              {"username": user["username"], "password": user["password"]},
+                                              user["account_ids"], args.requests, args.warmup)
+
+        result = results[endpoint]
+
+        print(f"{endpoint:40} p50:{result['p50_ms']:>9}ms p95:{result['p95_ms']:>9}ms p99:{result['p99_ms']:>9}ms "
+              f"TRIPS:{result['mongo_round_trips']} STATUS:{result['statuses']}")
+
+    output = args.output or os.path.join(
+        RESULTS_FOLDER, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    with open(output, "w") as f:
+
+        json.dump({
+            "created": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "backend": "mongomock" if args.in_process else "mongodb",
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "uri")},
+            "endpoints": results
+        }, f, indent=2)
+
+    print(f"SAVED {output}")
+
+
+if __name__ == "__main__":
+
+    main()
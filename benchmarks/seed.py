@@ -0,0 +1,208 @@
+# SYNTHETIC TRADING DATA FOR THE BENCHMARKS
+# RUN FROM THE REPO ROOT: python -m benchmarks.seed --uri mongodb://localhost:27017/tos_benchmark [--users 2 --accounts 2 ...]
+# THE TARGET DATABASE IS DROPPED FIRST, NEVER POINT IT AT A REAL DATABASE.
+import argparse
+from datetime import datetime, timedelta
+import random
+import bcrypt
+
+STRATEGY_NAMES = ["MACD_XVER", "RSI_REVERT", "BREAKOUT", "GAP_FILL",
+                  "VWAP_BOUNCE", "MOMENTUM", "MEAN_REVERT", "EARNINGS_RUN"]
+
+# USERS ARE username<N> / password<N>
+PASSWORD = "password"
+
+
+def symbolsList(count):
+
+    return [f"SYM{index:03d}" for index in range(count)]
+
+
+def seed(db, users=2, accounts=2, strategies=5, closed_positions=5000, open_positions=50,
+         queued=20, years=3, symbols=50, bcrypt_rounds=12, random_seed=42):
+    """ METHOD DROPS AND FILLS EVERY COLLECTION THE API READS
+    Args:
+        db ([Database]): TARGET DATABASE (pymongo OR mongomock)
+        users ([int]): NUMBER OF USERS
+        accounts ([int]): ACCOUNTS PER USER
+        strategies ([int]): STRATEGIES PER ACCOUNT
+        closed_positions ([int]): CLOSED POSITIONS PER ACCOUNT
+        open_positions ([int]): OPEN POSITIONS PER ACCOUNT
+        queued ([int]): QUEUED ORDERS PER ACCOUNT
+        years ([int]): YEARS OF DAILY BALANCE AND P/L HISTORY PER ACCOUNT
+        symbols ([int]): SIZE OF THE SYMBOL UNIVERSE
+        bcrypt_rounds ([int]): BCRYPT COST OF THE SEEDED PASSWORDS
+        random_seed ([int]): RANDOM SEED, THE SAME ARGS ALWAYS PRODUCE THE SAME DATA
+    Returns:
+        [list]: {username, password, account_ids} FOR EVERY SEEDED USER
+    """
+
+    rng = random.Random(random_seed)
+
+    universe = symbolsList(symbols)
+
+    strategy_names = (STRATEGY_NAMES * (strategies // len(STRATEGY_NAMES) + 1))[:strategies]
+
+    strategy_names = [f"{name}_{index}" if index >= len(STRATEGY_NAMES) else name
+                      for index, name in enumerate(strategy_names)]
+
+    for collection in db.list_collection_names():
+
+        db.drop_collection(collection)
+
+    db.quotes.insert_many([{"Symbol": symbol, "Last_Price": round(rng.uniform(5, 500), 2)}
+                           for symbol in universe])
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    days = years * 365
+
+    credentials = []
+
+    account_id = 100000
+
+    for user_index in range(users):
+
+        trader = f"Trader {user_index}"
+
+        user_accounts = {}
+
+        for _ in range(accounts):
+
+            account_id += 1
+
+            balance = rng.uniform(10000, 100000)
+
+            history, profit_loss = [], []
+
+            for day in range(days, -1, -1):
+
+                date = (today - timedelta(days=day)).strftime("%Y-%m-%d")
+
+                change = balance * rng.gauss(0.0005, 0.01)
+
+                balance += change
+
+                history.append({"Trader": trader, "Account_ID": account_id,
+                                "Date": date, "Balance": round(balance, 2)})
+
+                profit_loss.append({"Trader": trader, "Account_ID": account_id,
+                                    "Date": date, "Profit_Loss": round(change, 2)})
+
+            db.balance_history.insert_many(history)
+
+            db.profit_loss_history.insert_many(profit_loss)
+
+            positions = []
+
+            for index in range(closed_positions):
+
+                buy_price = rng.uniform(5, 500)
+
+                sell_price = buy_price * (1 + rng.gauss(0.002, 0.03))
+
+                positions.append({
+                    "Trader": trader,
+                    "Account_ID": account_id,
+                    "Strategy": rng.choice(strategy_names),
+                    "Symbol": rng.choice(universe),
+                    "Qty": rng.randint(1, 200),
+                    "Buy_Price": round(buy_price, 2),
+                    "Sell_Price": round(sell_price, 2),
+                    "ROV": round((sell_price - buy_price) / buy_price * 100, 2),
+                    "Sell_Date": today - timedelta(minutes=(closed_positions - index) * days * 1440 // max(closed_positions, 1))
+                })
+
+            if positions:
+
+                db.closed_positions.insert_many(positions)
+
+            if open_positions:
+
+                db.open_positions.insert_many([{
+                    "Trader": trader,
+                    "Account_ID": account_id,
+                    "Strategy": rng.choice(strategy_names),
+                    "Symbol": rng.choice(universe),
+                    "Qty": rng.randint(1, 200),
+                    "Buy_Price": round(rng.uniform(5, 500), 2)
+                } for _ in range(open_positions)])
+
+            if queued:
+
+                db.queue.insert_many([{
+                    "Trader": trader,
+                    "Account_ID": account_id,
+                    "Strategy": rng.choice(strategy_names),
+                    "Symbol": rng.choice(universe),
+                    "Order_Type": rng.choice(["BUY", "SELL"]),
+                    "Date": today
+                } for _ in range(queued)])
+
+            user_accounts[str(account_id)] = {
+                "Active": True,
+                "Account_Balance": round(balance, 2),
+                "forbidden_symbols": rng.sample(universe, min(3, len(universe))),
+                "Strategies": {name: {"Active": rng.random() > 0.2, "Shares": rng.randint(1, 100)} for name in strategy_names}
+            }
+
+        username = f"username{user_index}"
+
+        password = f"{PASSWORD}{user_index}"
+
+        db.users.insert_one({
+            "Name": trader,
+            "Username": username,
+            "Password": bcrypt.hashpw(password.encode(), bcrypt.gensalt(bcrypt_rounds)).decode(),
+            "Accounts": user_accounts
+        })
+
+        credentials.append({"username": username, "password": password,
+                            "account_ids": list(user_accounts)})
+
+    return credentials
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Drop and seed a MongoDB database with synthetic trading data.")
+
+    parser.add_argument("--uri", default="mongodb://localhost:27017/tos_benchmark")
+
+    parser.add_argument("--users", type=int, default=2)
+
+    parser.add_argument("--accounts", type=int, default=2)
+
+    parser.add_argument("--strategies", type=int, default=5)
+
+    parser.add_argument("--closed-positions", type=int, default=5000)
+
+    parser.add_argument("--open-positions", type=int, default=50)
+
+    parser.add_argument("--queued", type=int, default=20)
+
+    parser.add_argument("--years", type=int, default=3)
+
+    parser.add_argument("--symbols", type=int, default=50)
+
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+
+    client = MongoClient(args.uri)
+
+    credentials = seed(client.get_default_database(), args.users, args.accounts, args.strategies,
+                       args.closed_positions, args.open_positions, args.queued, args.years,
+                       args.symbols, args.bcrypt_rounds)
+
+    for user in credentials:
+
+        print(f"{user['username']} / {user['password']} - ACCOUNTS:{', '.join(user['account_ids'])}")
+
+
+if __name__ == "__main__":
+
+    main()
@@ -1,6 +1,39 @@
 from flask_pymongo import PyMongo
 from flask_bcrypt import Bcrypt
+from extensions.async_mongo import AsyncMongo
+from extensions.cache import TTLCache
+from extensions.compress import Compress
+from extensions.metrics import Metrics
+from extensions.profiler import Profiler
+from extensions.secret import SecretKey
+from extensions.stream import StreamHub
+from extensions.throttle import LoginThrottle, PasswordPool
 
 mongo = PyMongo()
 
+async_mongo = AsyncMongo()
+
 bcrypt = Bcrypt()
+
+login_throttle = LoginThrottle()
+
+password_pool = PasswordPool()
+
+user_cache = TTLCache(maxsize=1024, ttl=30, config_prefix="USER_CACHE")
+
+equity_cache = TTLCache(maxsize=256, ttl=60, config_prefix="EQUITY_CACHE")
+
+token_cache = TTLCache(maxsize=4096, ttl=300, config_prefix="TOKEN_CACHE")
+
+# LAST account_versions KEY OF EACH (ACCOUNT, COLLECTION) THIS PROCESS SERVED (api/versions.py)
+seen_versions = TTLCache(maxsize=4096, ttl=300, config_prefix="SEEN_VERSIONS")
+
+metrics = Metrics()
+
+profiler = Profiler(metrics.command_listener)
+
+secret_key = SecretKey(mongo)
+
+stream_hub = StreamHub(user_cache)
+
+compress = Compress()
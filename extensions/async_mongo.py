@@ -0,0 +1,36 @@
+from pymongo import AsyncMongoClient
+
+# ASYNCIO MONGO CLIENT FOR THE QUART APP (asgi.py), PYMONGO'S NATIVE ASYNC API.
+# THE CLIENT IS BOUND TO THE EVENT LOOP, SO IT IS CREATED IN before_serving RATHER THAN AT IMPORT.
+
+
+class AsyncMongo:
+    """ QUART EXTENSION, EXPOSES cx (THE CLIENT) AND db (THE DEFAULT DATABASE OF MONGO_URI) WHILE THE APP IS SERVING """
+
+    def __init__(self):
+
+        self.cx = None
+
+        self.db = None
+
+    def init_app(self, app, **kwargs):
+
+        async def connect():
+
+            self.cx = AsyncMongoClient(app.config["MONGO_URI"], **kwargs)
+
+            self.db = self.cx.get_default_database()
+
+        async def close():
+
+            if self.cx is not None:
+
+                await self.cx.close()
+
+            self.cx = None
+
+            self.db = None
+
+        app.before_serving(connect)
+
+        app.after_serving(close)
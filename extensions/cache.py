@@ -0,0 +1,92 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """ BOUNDED IN-PROCESS CACHE, ENTRIES EXPIRE AFTER TTL SECONDS AND THE LEAST RECENTLY USED ENTRY IS EVICTED WHEN FULL
+    Args:
+        maxsize ([int]): MAX NUMBER OF ENTRIES
+        ttl ([float]): SECONDS AN ENTRY STAYS VALID
+        config_prefix ([str]): OPTIONAL APP CONFIG PREFIX, READS <PREFIX>_SIZE AND <PREFIX>_TTL IN init_app
+    """
+
+    def __init__(self, maxsize=1024, ttl=30, config_prefix=None):
+
+        self.maxsize = maxsize
+
+        self.ttl = ttl
+
+        self.config_prefix = config_prefix
+
+        self._data = OrderedDict()
+
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+
+        if self.config_prefix:
+
+            self.maxsize = app.config.get(
+                f"{self.config_prefix}_SIZE", self.maxsize)
+
+            self.ttl = app.config.get(f"{self.config_prefix}_TTL", self.ttl)
+
+    def get(self, key, default=None):
+
+        with self._lock:
+
+            entry = self._data.get(key)
+
+            if entry is None:
+
+                return default
+
+            value, expires = entry
+
+            if expires <= time.monotonic():
+
+                del self._data[key]
+
+                return default
+
+            self._data.move_to_end(key)
+
+            return value
+
+    def set(self, key, value, ttl=None):
+
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+
+            self._data[key] = (value, expires)
+
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+
+        with self._lock:
+
+            entry = self._data.pop(key, None)
+
+        return None if entry is None else entry[0]
+
+    def evict(self, predicate):
+        """ METHOD DROPS EVERY ENTRY WHOSE KEY MATCHES predicate """
+
+        with self._lock:
+
+            for key in [key for key in self._data if predicate(key)]:
+
+                del self._data[key]
+
+    def clear(self):
+
+        with self._lock:
+
+            self._data.clear()
@@ -0,0 +1,140 @@
+import gzip
+from flask import request as flask_request
+
+try:
+
+    import brotli
+
+except ImportError:
+
+    brotli = None
+
+# COMPRESSES JSON (AND CSV) RESPONSES OF AT LEAST COMPRESS_MIN_SIZE BYTES WITH BROTLI WHEN THE CLIENT AND THE INSTALL SUPPORT IT,
+# GZIP OTHERWISE. STREAMED RESPONSES (SSE) AND 304s ARE LEFT ALONE. SET COMPRESS_ENABLED=false WHEN A PROXY IN FRONT ALREADY COMPRESSES.
+# ETAGS STAY VALID ACROSS ENCODINGS BECAUSE THEY ARE WEAK (SEE api/versions.py).
+# QUART IS ONLY IMPORTED BY THE ASYNC HANDLER, SO THE FLASK APP (run.py) DOESN'T LOAD THE ASGI STACK OR NEED IT INSTALLED.
+
+COMPRESSIBLE_TYPES = {"application/json", "text/csv", "application/x-ndjson"}
+
+
+class Compress:
+    """ FLASK/QUART EXTENSION, COMPRESSES LARGE RESPONSES IN after_request """
+
+    def __init__(self):
+
+        self.enabled = True
+
+        self.min_size = 1024
+
+        self.level = 6
+
+        self.brotli_quality = 4
+
+    def init_app(self, app):
+
+        self.enabled = app.config.get("COMPRESS_ENABLED", self.enabled)
+
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", self.min_size)
+
+        self.level = app.config.get("COMPRESS_LEVEL", self.level)
+
+        self.brotli_quality = app.config.get("COMPRESS_BROTLI_QUALITY", self.brotli_quality)
+
+        if not self.enabled:
+
+            return
+
+        # QUART APPS (asgi.py) READ THE BODY ASYNCHRONOUSLY
+        if hasattr(app, "before_serving"):
+
+            app.after_request(self.after_request_async)
+
+        else:
+
+            app.after_request(self.after_request)
+
+    def encoding(self, accept_encodings):
+        """ METHOD PICKS br OR gzip FROM THE REQUEST'S Accept-Encoding, None IF THE CLIENT TAKES NEITHER """
+
+        if brotli and accept_encodings.quality("br") > 0:
+
+            return "br"
+
+        if accept_encodings.quality("gzip") > 0:
+
+            return "gzip"
+
+        return None
+
+    def compressible(self, response):
+
+        if response.status_code != 200 or response.mimetype not in COMPRESSIBLE_TYPES:
+
+            return False
+
+        return "Content-Encoding" not in response.headers
+
+    def encode(self, data, encoding):
+
+        if encoding == "br":
+
+            return brotli.compress(data, quality=self.brotli_quality)
+
+        # mtime=0 KEEPS THE OUTPUT DETERMINISTIC FOR THE SAME BODY
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def after_request(self, response):
+
+        if not self.compressible(response) or response.is_streamed:
+
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        encoding = self.encoding(flask_request.accept_encodings)
+
+        if encoding is None:
+
+            return response
+
+        data = response.get_data()
+
+        if len(data) < self.min_size:
+
+            return response
+
+        response.set_data(self.encode(data, encoding))
+
+        response.headers["Content-Encoding"] = encoding
+
+        return response
+
+    async def after_request_async(self, response):
+
+        from quart import request as quart_request
+        from quart.wrappers.response import DataBody
+
+        # ONLY BUFFERED BODIES, A STREAMED ONE (NDJSON, EXPORTS) WOULD BE READ WHOLE INTO MEMORY HERE
+        if not self.compressible(response) or not isinstance(response.response, DataBody):
+
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        encoding = self.encoding(quart_request.accept_encodings)
+
+        if encoding is None:
+
+            return response
+
+        data = await response.get_data()
+
+        if len(data) < self.min_size:
+
+            return response
+
+        response.set_data(self.encode(data, encoding))
+
+        response.headers["Content-Encoding"] = encoding
+
+        return response
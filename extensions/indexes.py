@@ -0,0 +1,198 @@
+from datetime import datetime
+import click
+from bson.objectid import ObjectId
+from flask.cli import with_appcontext
+
+from assets.logger import Logger
+from extensions import mongo
+
+logger = Logger()
+
+# EVERY INDEX THE API RELIES ON. COLLECTION -> [(KEYS, OPTIONS)]
+# ADD THE INDEX HERE WHEN A ROUTE STARTS FILTERING OR SORTING ON A NEW FIELD, AND ADD THE QUERY TO QUERY_PLANS BELOW.
+INDEXES = {
+    "users": [
+        ([("Username", 1)], {}),
+        ([("Name", 1)], {})
+    ],
+    "refresh_tokens": [
+        ([("Token_Hash", 1)], {"unique": True}),
+        ([("Family", 1)], {}),
+        # TTL, MONGO DELETES A TOKEN ONCE Expires_At HAS PASSED
+        ([("Expires_At", 1)], {"expireAfterSeconds": 0})
+    ],
+    "balance_history": [
+        ([("Account_ID", 1), ("Date", 1)], {})
+    ],
+    "profit_loss_history": [
+        ([("Account_ID", 1), ("Date", 1)], {})
+    ],
+    "open_positions": [
+        ([("Account_ID", 1), ("Strategy", 1)], {})
+    ],
+    "closed_positions": [
+        # ALSO THE POSITIONS PAST EACH strategy_stats HIGH-WATER MARK (api/strategy_stats.py)
+        ([("Account_ID", 1), ("Strategy", 1), ("_id", 1)], {}),
+        ([("Account_ID", 1), ("_id", 1)], {}),
+        # ALSO SERVES THE Sell_Date RANGES OF THE EQUITY ROUTES
+        ([("Account_ID", 1), ("Sell_Date", 1), ("_id", 1)], {})
+    ],
+    "quotes": [
+        ([("Symbol", 1)], {"unique": True})
+    ],
+    "queue": [
+        ([("Account_ID", 1), ("_id", 1)], {})
+    ],
+    "strategy_stats": [
+        ([("Account_ID", 1), ("Strategy", 1)], {"unique": True})
+    ],
+    "balance_history_weekly": [
+        ([("Account_ID", 1), ("Period", 1)], {"unique": True})
+    ],
+    "balance_history_monthly": [
+        ([("Account_ID", 1), ("Period", 1)], {"unique": True})
+    ],
+    "profit_loss_history_weekly": [
+        ([("Account_ID", 1), ("Period", 1)], {"unique": True})
+    ],
+    "profit_loss_history_monthly": [
+        ([("Account_ID", 1), ("Period", 1)], {"unique": True})
+    ]
+}
+
+# REPRESENTATIVE QUERY FOR EVERY ROUTE THAT READS A COLLECTION. (ROUTE, COLLECTION, FILTER, SORT)
+QUERY_PLANS = [
+    ("login", "users", {"Username": ""}, None),
+    ("refresh", "refresh_tokens", {"Token_Hash": "", "Revoked": False}, None),
+    ("logout", "refresh_tokens", {"Family": "", "Revoked": False}, None),
+    ("rate_of_return", "balance_history",
+     {"Account_ID": 0, "Date": {"$gte": "2000-01-01", "$lte": "2000-12-31"}}, {"Date": 1}),
+    ("number_of_holdings", "open_positions", {"Account_ID": 0}, None),
+    ("account_balance_history", "balance_history",
+     {"Account_ID": 0, "Date": {"$gte": "2000-01-01", "$lte": "2000-12-31"}}, {"Date": 1}),
+    ("profit_loss_history", "profit_loss_history",
+     {"Account_ID": 0, "Date": {"$gte": "2000-01-01", "$lte": "2000-12-31"}}, {"Date": 1}),
+    ("queued", "queue", {"Account_ID": 0}, None),
+    ("open_positions", "open_positions", {"Account_ID": 0}, None),
+    ("open_positions", "quotes", {"Symbol": {"$in": ["", " "]}}, None),
+    ("strategies", "strategy_stats", {"Account_ID": 0}, None),
+    ("strategies", "closed_positions",
+     {"Account_ID": 0, "$or": [{"Strategy": "", "_id": {"$gte": ObjectId("000000000000000000000000")}},
+                               {"Strategy": {"$nin": [""]}}]}, {"_id": 1}),
+    ("rebuild-strategy-stats", "closed_positions",
+     {"Account_ID": 0, "ROV": {"$ne": 0}}, {"_id": 1}),
+    ("queued", "queue",
+     {"Account_ID": 0, "_id": {"$gt": ObjectId("000000000000000000000000")}}, {"_id": 1}),
+    ("closed_positions", "closed_positions",
+     {"Account_ID": 0, "$or": [{"Sell_Date": {"$lt": datetime(2000, 1, 1)}},
+                               {"Sell_Date": datetime(2000, 1, 1), "_id": {"$lt": ObjectId("000000000000000000000000")}}]},
+     {"Sell_Date": -1, "_id": -1}),
+    ("best_performing_equities", "closed_positions",
+     {"Account_ID": 0, "Sell_Date": {"$gte": datetime(2000, 1, 1)}}, None),
+    ("account_balance_history", "balance_history_weekly",
+     {"Account_ID": 0, "Period": {"$gte": "2000-01-01"}}, {"Period": 1}),
+    ("profit_loss_history", "profit_loss_history_monthly",
+     {"Account_ID": 0}, {"Period": -1})
+]
+
+
+def ensureIndexes(db):
+    """ METHOD CREATES EVERY INDEX IN INDEXES THAT DOESN'T EXIST YET
+    Args:
+        db ([Database]): MONGO DATABASE
+    Returns:
+        [list]: (COLLECTION, KEYS) OF THE INDEXES THAT WERE CREATED
+    """
+
+    created = []
+
+    for collection, indexes in INDEXES.items():
+
+        existing = {tuple(info["key"])
+                    for info in db[collection].index_information().values()}
+
+        for keys, options in indexes:
+
+            if tuple(keys) in existing:
+
+                continue
+
+            db[collection].create_index(keys, **options)
+
+            logger.INFO(f"Created Index - COLLECTION:{collection} KEYS:{keys}")
+
+            created.append((collection, keys))
+
+    return created
+
+
+def findStages(plan, stage):
+
+    if isinstance(plan, dict):
+
+        if plan.get("stage") == stage:
+
+            return True
+
+        return any(findStages(value, stage) for value in plan.values())
+
+    if isinstance(plan, list):
+
+        return any(findStages(value, stage) for value in plan)
+
+    return False
+
+
+def checkQueryPlans(db):
+    """ METHOD EXPLAINS EVERY QUERY IN QUERY_PLANS AND REPORTS THE ONES THAT FALL BACK TO A COLLSCAN
+    Args:
+        db ([Database]): MONGO DATABASE
+    Returns:
+        [list]: (ROUTE, COLLECTION, FILTER) OF THE QUERIES THAT USE A COLLSCAN
+    """
+
+    failures = []
+
+    for route, collection, filter, sort in QUERY_PLANS:
+
+        command = {"find": collection, "filter": filter}
+
+        if sort:
+
+            command["sort"] = sort
+
+        explain = db.command("explain", command, verbosity="queryPlanner")
+
+        if findStages(explain["queryPlanner"]["winningPlan"], "COLLSCAN"):
+
+            failures.append((route, collection, filter))
+
+    return failures
+
+
+@click.command("ensure-indexes")
+@with_appcontext
+def ensure_indexes_command():
+    """ Create any missing indexes the API relies on. """
+
+    created = ensureIndexes(mongo.db)
+
+    click.echo(f"Created {len(created)} index(es).")
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans_command():
+    """ Fail if any route's query falls back to a COLLSCAN. """
+
+    failures = checkQueryPlans(mongo.db)
+
+    for route, collection, filter in failures:
+
+        click.echo(f"COLLSCAN - ROUTE:{route} COLLECTION:{collection} FILTER:{filter}", err=True)
+
+    if failures:
+
+        raise SystemExit(1)
+
+    click.echo(f"All {len(QUERY_PLANS)} queries use an index.")
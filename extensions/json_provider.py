@@ -0,0 +1,47 @@
+import orjson
+from bson import json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
+from flask.json.provider import JSONProvider
+
+# orjson SERIALIZES DICTS, LISTS, STRINGS AND NUMBERS IN C. ANYTHING ELSE (ObjectId, datetime, Decimal128, ...) GOES THROUGH
+# bson.json_util.default, SO RESPONSES KEEP THE RELAXED EXTENDED JSON OF flask_pymongo's BSONProvider ({"$oid"}, {"$date"}, ...).
+# DIFFERENCES: NaN/Infinity BECOME null (THEY ARE NOT VALID JSON) AND NUMPY SCALARS/ARRAYS SERIALIZE DIRECTLY.
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+
+
+def bsonDefault(obj):
+    """ METHOD ENCODES WHAT orjson DOESN'T KNOW, RAISES TypeError FOR ANYTHING BSON DOESN'T KNOW EITHER """
+
+    return json_util.default(obj, json_options=RELAXED_JSON_OPTIONS)
+
+
+def dumpJson(obj):
+    """ METHOD SERIALIZES obj TO UTF-8 JSON BYTES
+    Args:
+        obj ([any]): DOCUMENTS, LISTS AND SCALARS, BSON TYPES INCLUDED
+    Returns:
+        [bytes]: JSON
+    """
+
+    return orjson.dumps(obj, default=bsonDefault, option=OPTIONS)
+
+
+class OrjsonProvider(JSONProvider):
+    """ FLASK/QUART JSON PROVIDER BACKED BY orjson, REPLACES THE BSONProvider flask_pymongo INSTALLS (SEE run.connectMongo) """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+
+        return dumpJson(obj).decode()
+
+    def loads(self, s, **kwargs):
+
+        # REQUEST BODIES ARE SMALL, KEEP json_util SO {"$oid": ...} STILL PARSES TO ObjectId
+        return json_util.loads(s)
+
+    def response(self, *args, **kwargs):
+
+        # THE BODY STAYS BYTES, NO str ROUND TRIP
+        return self._app.response_class(dumpJson(self._prepare_response_obj(args, kwargs)), mimetype=self.mimetype)
@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from flask import Response, g, request
+from pymongo import monitoring
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry,
+                               Counter, Histogram, generate_latest, multiprocess)
+
+# PER ROUTE AND PER MONGO COMMAND METRICS IN PROMETHEUS TEXT FORMAT AT /metrics.
+# WITH SEVERAL WORKER PROCESSES, SET PROMETHEUS_MULTIPROC_DIR TO AN EMPTY DIRECTORY BEFORE THE APP STARTS.
+# EACH PROCESS THEN WRITES ITS SAMPLES THERE AND /metrics AGGREGATES ALL OF THEM, WHICHEVER WORKER SERVES THE SCRAPE.
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["endpoint", "method"],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+
+REQUEST_COUNT = Counter(
+    "http_requests_total", "Requests by route and status",
+    ["endpoint", "method", "status"])
+
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size by route",
+    ["endpoint"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304))
+
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ["collection", "command"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5))
+
+MONGO_DOCUMENTS = Counter(
+    "mongo_documents_returned_total", "Documents returned or affected by MongoDB commands",
+    ["collection", "command"])
+
+MONGO_FAILURES = Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands",
+    ["collection", "command"])
+
+
+def commandCollection(command_name, command):
+    """ METHOD RETURNS THE COLLECTION A MONGO COMMAND TARGETS, "-" FOR DATABASE LEVEL COMMANDS """
+
+    target = command.get(command_name)
+
+    if isinstance(target, str):
+
+        return target
+
+    # getMore NAMES ITS COLLECTION SEPARATELY
+    return command.get("collection", "-")
+
+
+def replyDocuments(reply):
+    """ METHOD COUNTS THE DOCUMENTS IN A COMMAND REPLY (CURSOR BATCH, OR n FOR COUNTS AND WRITES) """
+
+    cursor = reply.get("cursor")
+
+    if cursor:
+
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+
+    n = reply.get("n")
+
+    return n if isinstance(n, int) else 0
+
+
+class CommandListener(monitoring.CommandListener):
+    """ PYMONGO COMMAND LISTENER, RECORDS DURATION AND DOCUMENTS PER (COLLECTION, COMMAND)
+        A THREAD CAN ALSO startRecording() TO GET ITS OWN TIMELINE OF COMMANDS (USED BY THE PROFILER AND THE BENCHMARKS).
+        PYMONGO CALLS LISTENERS ON THE THREAD THAT RUNS THE COMMAND.
+    """
+
+    def __init__(self):
+
+        self._pending = {}
+
+        self._lock = threading.Lock()
+
+        self._local = threading.local()
+
+    def startRecording(self):
+
+        self._local.timeline = []
+
+        self._local.origin = time.perf_counter()
+
+        return self._local.timeline
+
+    def stopRecording(self):
+
+        timeline = getattr(self._local, "timeline", None)
+
+        self._local.timeline = None
+
+        return timeline
+
+    def started(self, event):
+
+        collection = commandCollection(event.command_name, event.command)
+
+        entry = None
+
+        timeline = getattr(self._local, "timeline", None)
+
+        if timeline is not None:
+
+            entry = {
+                "command": event.command_name,
+                "collection": collection,
+                "started_ms": round((time.perf_counter() - self._local.origin) * 1000, 3)
+            }
+
+            timeline.append(entry)
+
+        with self._lock:
+
+            self._pending[(event.connection_id, event.request_id)] = (
+                collection, entry)
+
+    def _finish(self, event, documents=None, failed=False):
+
+        with self._lock:
+
+            collection, entry = self._pending.pop(
+                (event.connection_id, event.request_id), ("-", None))
+
+        if entry is not None:
+
+            entry.update({"duration_ms": event.duration_micros / 1000,
+                         "documents": documents, "failed": failed})
+
+        return collection
+
+    def succeeded(self, event):
+
+        documents = replyDocuments(event.reply)
+
+        collection = self._finish(event, documents)
+
+        MONGO_LATENCY.labels(collection, event.command_name).observe(
+            event.duration_micros / 1e6)
+
+        MONGO_DOCUMENTS.labels(collection, event.command_name).inc(documents)
+
+    def failed(self, event):
+
+        collection = self._finish(event, failed=True)
+
+        MONGO_LATENCY.labels(collection, event.command_name).observe(
+            event.duration_micros / 1e6)
+
+        MONGO_FAILURES.labels(collection, event.command_name).inc()
+
+
+class Metrics:
+    """ FLASK EXTENSION, TIMES EVERY REQUEST AND SERVES /metrics. PASS command_listener TO THE MONGO CLIENT. """
+
+    def __init__(self):
+
+        self.command_listener = CommandListener()
+
+    def init_app(self, app):
+
+        if not app.config.get("METRICS_ENABLED", True):
+
+            return
+
+        app.before_request(self.before_request)
+
+        app.after_request(self.after_request)
+
+        app.add_url_rule("/metrics", "metrics", self.export)
+
+    def before_request(self):
+
+        g.metrics_start = time.perf_counter()
+
+    def after_request(self, response):
+
+        if "metrics_start" not in g:
+
+            return response
+
+        endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(
+            time.perf_counter() - g.metrics_start)
+
+        REQUEST_COUNT.labels(endpoint, request.method,
+                             response.status_code).inc()
+
+        if not response.is_streamed:
+
+            RESPONSE_SIZE.labels(endpoint).observe(
+                response.calculate_content_length() or 0)
+
+        return response
+
+    def export(self):
+
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+
+            registry = CollectorRegistry()
+
+            multiprocess.MultiProcessCollector(registry)
+
+        else:
+
+            registry = REGISTRY
+
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
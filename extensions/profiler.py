@@ -0,0 +1,201 @@
+from collections import Counter
+from datetime import datetime
+import cProfile
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from flask import g, request
+
+from assets.logger import Logger
+
+logger = Logger()
+
+THIS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# OPT-IN PROFILING OF SINGLE REQUESTS. OFF UNLESS PROFILING_ENABLED IS SET.
+# A REQUEST IS PROFILED WHEN IT SENDS X-Profile-Token MATCHING PROFILING_TOKEN, OR BY RANDOM SAMPLING (PROFILING_SAMPLE_RATE, 0-1).
+# EACH PROFILED REQUEST WRITES THREE FILES TO PROFILING_DIR (DEFAULT assets/logger/profiles), NAMED BY THE X-Profile-Id RESPONSE HEADER:
+#   <id>.prof        cProfile STATS, OPEN WITH pstats OR snakeviz
+#   <id>.folded      COLLAPSED STACKS FROM A WALL CLOCK SAMPLER, FEED TO flamegraph.pl OR speedscope
+#   <id>.mongo.json  TIMELINE OF THE MONGO COMMANDS THE REQUEST THREAD RAN
+
+PROFILE_HEADER = "X-Profile-Token"
+
+
+class StackSampler:
+    """ SAMPLES ONE THREAD'S STACK EVERY interval SECONDS AND COUNTS THE COLLAPSED STACKS """
+
+    def __init__(self, thread_id, interval):
+
+        self.thread_id = thread_id
+
+        self.interval = interval
+
+        self.stacks = Counter()
+
+        self._stop = threading.Event()
+
+        self._thread = threading.Thread(
+            target=self.run, name="profile-sampler", daemon=True)
+
+    def start(self):
+
+        self._thread.start()
+
+    def stop(self):
+
+        self._stop.set()
+
+        self._thread.join()
+
+    def run(self):
+
+        while not self._stop.wait(self.interval):
+
+            frame = sys._current_frames().get(self.thread_id)
+
+            stack = []
+
+            while frame is not None:
+
+                code = frame.f_code
+
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+
+                frame = frame.f_back
+
+            if stack:
+
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """ FLASK EXTENSION, WRAPS SELECTED REQUESTS IN cProfile, A STACK SAMPLER AND A MONGO COMMAND RECORDING """
+
+    def __init__(self, command_listener):
+
+        self.command_listener = command_listener
+
+    def init_app(self, app):
+
+        app.config.setdefault("PROFILING_ENABLED", False)
+
+        app.config.setdefault("PROFILING_TOKEN", None)
+
+        app.config.setdefault("PROFILING_SAMPLE_RATE", 0.0)
+
+        app.config.setdefault("PROFILING_INTERVAL", 0.001)
+
+        app.config.setdefault("PROFILING_DIR", os.path.join(
+            os.path.dirname(THIS_FOLDER), "assets", "logger", "profiles"))
+
+        if not app.config["PROFILING_ENABLED"]:
+
+            return
+
+        self.app = app
+
+        app.before_request(self.before_request)
+
+        app.after_request(self.after_request)
+
+        app.teardown_request(self.teardown_request)
+
+    def wanted(self):
+
+        token = self.app.config["PROFILING_TOKEN"]
+
+        sent = request.headers.get(PROFILE_HEADER)
+
+        if token and sent and hmac.compare_digest(sent, token):
+
+            return True
+
+        return random.random() < self.app.config["PROFILING_SAMPLE_RATE"]
+
+    def before_request(self):
+
+        if not self.wanted():
+
+            return
+
+        endpoint = re.sub(r"[^A-Za-z0-9]+", "_",
+                          request.endpoint or "unmatched").strip("_")
+
+        g.profile_id = f"{datetime.now():%Y%m%d_%H%M%S}_{endpoint}_{uuid.uuid4().hex[:8]}"
+
+        g.profile_sampler = StackSampler(
+            threading.get_ident(), self.app.config["PROFILING_INTERVAL"])
+
+        g.profile_started = time.perf_counter()
+
+        self.command_listener.startRecording()
+
+        g.profile_sampler.start()
+
+        g.profiler = cProfile.Profile()
+
+        g.profiler.enable()
+
+    def after_request(self, response):
+
+        if "profile_id" in g:
+
+            response.headers["X-Profile-Id"] = g.profile_id
+
+        return response
+
+    def teardown_request(self, exc):
+
+        if "profiler" not in g:
+
+            return
+
+        g.profiler.disable()
+
+        g.profile_sampler.stop()
+
+        timeline = self.command_listener.stopRecording() or []
+
+        elapsed = (time.perf_counter() - g.profile_started) * 1000
+
+        directory = self.app.config["PROFILING_DIR"]
+
+        path = os.path.join(directory, g.profile_id)
+
+        try:
+
+            os.makedirs(directory, exist_ok=True)
+
+            g.profiler.dump_stats(f"{path}.prof")
+
+            with open(f"{path}.folded", "w") as f:
+
+                f.write(g.profile_sampler.collapsed())
+
+            with open(f"{path}.mongo.json", "w") as f:
+
+                json.dump({
+                    "path": request.full_path,
+                    "method": request.method,
+                    "elapsed_ms": round(elapsed, 3),
+                    "commands": timeline
+                }, f, indent=2)
+
+            logger.INFO(
+                f"Request Profiled - ID:{g.profile_id} ELAPSED:{round(elapsed, 1)}ms MONGO COMMANDS:{len(timeline)}")
+
+        except OSError:
+
+            logger.ERROR(f"Profile Write Failed - ID:{g.profile_id}")
@@ -0,0 +1,81 @@
+import threading
+from flask import current_app, request
+
+from assets.logger import Logger
+
+logger = Logger()
+
+# WHERE THE JWT SIGNING KEY COMES FROM, IN ORDER:
+#   SECRET_KEY          THE KEY ITSELF
+#   SECRET_KEY_FILE     A FILE HOLDING THE KEY (DOCKER/KUBERNETES SECRETS)
+#   SECRET_KEY_USER     LEGACY: THE Password HASH OF THE USER WITH THIS Name. READ FROM MONGO ON THE FIRST REQUEST, NOT AT IMPORT,
+#                       SO STARTING OR FORKING A WORKER NEVER WAITS ON THE DATABASE.
+
+
+class SecretKey:
+    """ FLASK EXTENSION, RESOLVES app.config["SECRET_KEY"] FROM CONFIG, FALLING BACK TO A LAZY MONGO LOOKUP """
+
+    def __init__(self, mongo):
+
+        self.mongo = mongo
+
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+
+        app.config.setdefault("SECRET_KEY_FILE", None)
+
+        app.config.setdefault("SECRET_KEY_USER", None)
+
+        if not app.config.get("SECRET_KEY") and app.config["SECRET_KEY_FILE"]:
+
+            with open(app.config["SECRET_KEY_FILE"]) as f:
+
+                app.config["SECRET_KEY"] = f.read().strip()
+
+        if app.config.get("SECRET_KEY"):
+
+            return
+
+        if not app.config["SECRET_KEY_USER"]:
+
+            raise RuntimeError(
+                "No secret key configured, set SECRET_KEY, SECRET_KEY_FILE or SECRET_KEY_USER")
+
+        app.before_request(self.before_request)
+
+    def before_request(self):
+
+        # LIVENESS MUST NOT DEPEND ON MONGO, /readyz LOADS THE KEY ITSELF
+        if request.blueprint == "health":
+
+            return
+
+        self.load()
+
+    def load(self):
+        """ METHOD FETCHES THE LEGACY KEY ONCE PER PROCESS. RAISES RuntimeError IF THE USER DOESN'T EXIST. """
+
+        app = current_app._get_current_object()
+
+        if app.config.get("SECRET_KEY"):
+
+            return
+
+        with self._lock:
+
+            if app.config.get("SECRET_KEY"):
+
+                return
+
+            user = self.mongo.db.users.find_one(
+                {"Name": app.config["SECRET_KEY_USER"]}, {"Password": 1})
+
+            if not user:
+
+                raise RuntimeError(
+                    f"Secret key user not found: {app.config['SECRET_KEY_USER']}")
+
+            app.config["SECRET_KEY"] = user["Password"]
+
+            logger.INFO("Secret Key Loaded From Mongo")
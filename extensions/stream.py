@@ -0,0 +1,422 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from pymongo import CursorType, MongoClient
+from pymongo.errors import OperationFailure
+
+from assets.logger import Logger
+from extensions.json_provider import dumpJson
+
+logger = Logger()
+
+# ONE CHANGE STREAM PER PROCESS OVER THE COLLECTIONS THE DASHBOARD POLLS, FANNED OUT TO EVERY SSE SUBSCRIBER OF THE ACCOUNT.
+# EACH CHANGE IS TURNED INTO ONE SSE FRAME ONCE AND HANDED TO EVERY SUBSCRIBER, CLIENTS NEVER QUERY MONGO.
+# CHANGE STREAMS NEED A REPLICA SET. WHEN $changeStream IS REFUSED THE HUB TAILS local.oplog.rs INSTEAD (NEEDS READ ON local).
+# DELETES ONLY CARRY THE _id, THEIR Account_ID COMES FROM THE PRE-IMAGE: ENABLE IT WITH
+#   db.runCommand({collMod: "queue", changeStreamPreAndPostImages: {enabled: true}})   (SAME FOR open_positions, MONGO 6+)
+# WITHOUT PRE-IMAGES (AND IN OPLOG MODE) DELETES CAN'T BE ROUTED AND ARE DROPPED.
+# A SYNC (GUNICORN gthread) STREAM HOLDS A WORKER THREAD FOR AS LONG AS IT IS OPEN, SO EACH WORKER ONLY TAKES STREAM_SYNC_LIMIT OF
+# THEM AND ANSWERS 503 PAST THAT. asgi.py HAS NO LIMIT, SERVE /api/stream FROM IT WHEN MORE DASHBOARDS STAY OPEN.
+
+# COLLECTION -> SSE EVENT NAME, NAMED AFTER THE ROUTE THE CLIENT WOULD OTHERWISE POLL
+STREAMED_COLLECTIONS = {
+    "users": "account",
+    "queue": "queued",
+    "open_positions": "open_positions",
+    "balance_history": "account_balance_history"
+}
+
+OPERATIONS = {"insert", "update", "replace", "delete"}
+
+OPLOG_OPERATIONS = {"i": "insert", "u": "update", "d": "delete"}
+
+# $changeStream REFUSED: NOT A REPLICA SET / NOT SUPPORTED / NOT AUTHORIZED
+CHANGE_STREAM_UNSUPPORTED = {40573, 40324, 13, 115}
+
+# THE RESUME TOKEN FELL OFF THE OPLOG (ChangeStreamHistoryLost, ChangeStreamFatalError)
+RESUME_TOKEN_LOST = {286, 280}
+
+
+def frame(event, data):
+    """ METHOD FORMATS ONE SSE FRAME """
+
+    return f"event: {event}\ndata: {dumpJson(data).decode()}\n\n"
+
+
+def changedAccounts(updated_fields):
+    """ METHOD RETURNS THE ACCOUNT IDS AN UPDATE OF A USER DOCUMENT TOUCHED, None IF IT REPLACED Accounts AS A WHOLE """
+
+    accounts = set()
+
+    for field in updated_fields:
+
+        parts = field.split(".")
+
+        if parts[0] != "Accounts":
+
+            continue
+
+        if len(parts) == 1:
+
+            return None
+
+        accounts.add(parts[1])
+
+    return accounts
+
+
+class Subscriber:
+    """ BOUNDED MAILBOX OF ONE SSE CONNECTION. A CLIENT THAT FALLS max_size FRAMES BEHIND IS CUT OFF AND MUST RECONNECT. """
+
+    def __init__(self, account_id, max_size, loop=None):
+
+        self.account_id = account_id
+
+        self.overflowed = False
+
+        # loop IS SET FOR ASYNCIO SUBSCRIBERS (asgi.py), FRAMES ARE THEN HANDED OVER ON THE EVENT LOOP THREAD
+        self.loop = loop
+
+        self.queue = asyncio.Queue(max_size) if loop else queue.Queue(max_size)
+
+    def put(self, message):
+
+        if self.loop:
+
+            self.loop.call_soon_threadsafe(self._put, message)
+
+        else:
+
+            self._put(message)
+
+    def _put(self, message):
+
+        if self.overflowed:
+
+            return
+
+        try:
+
+            self.queue.put_nowait(message)
+
+        except (queue.Full, asyncio.QueueFull):
+
+            self.overflowed = True
+
+
+class StreamHub:
+    """ FLASK/QUART EXTENSION, WATCHES MONGO ON A BACKGROUND THREAD (STARTED BY THE FIRST SUBSCRIBER) AND FANS CHANGES OUT
+    Args:
+        user_cache ([TTLCache]): PROCESS CACHE OF USER DOCUMENTS, ENTRIES ARE DROPPED WHEN THE USER CHANGES
+    """
+
+    def __init__(self, user_cache):
+
+        self.user_cache = user_cache
+
+        self.uri = None
+
+        self.queue_size = 256
+
+        self.heartbeat = 15
+
+        self.sync_limit = 1
+
+        self.backoff = 1
+
+        self._subscribers = {}
+
+        self._sync_count = 0
+
+        self._lock = threading.Lock()
+
+        self._pid = None
+
+        self._thread = None
+
+        # LAST CHANGE DISPATCHED, A RECONNECTED watch RESUMES AFTER IT
+        self.resume_token = None
+
+        self.mode = None
+
+    def init_app(self, app):
+
+        self.uri = app.config["MONGO_URI"]
+
+        self.queue_size = app.config.get("STREAM_QUEUE_SIZE", self.queue_size)
+
+        self.heartbeat = app.config.get("STREAM_HEARTBEAT", self.heartbeat)
+
+        self.sync_limit = app.config.get("STREAM_SYNC_LIMIT", self.sync_limit)
+
+    def subscribe(self, account_id, loop=None):
+        """ METHOD REGISTERS A SUBSCRIBER, None WHEN IT IS A SYNC ONE AND THE WORKER ALREADY HOLDS STREAM_SYNC_LIMIT OF THEM """
+
+        subscriber = Subscriber(str(account_id), self.queue_size, loop)
+
+        with self._lock:
+
+            # THE WATCHER THREAD DOESN'T SURVIVE A FORK, EACH WORKER STARTS ITS OWN
+            if self._pid != os.getpid():
+
+                self._subscribers = {}
+
+                self._sync_count = 0
+
+                self._pid = os.getpid()
+
+                self._thread = None
+
+                self.resume_token = None
+
+            if loop is None:
+
+                if self._sync_count >= self.sync_limit:
+
+                    return None
+
+                self._sync_count += 1
+
+            self._startWatcher()
+
+            self._subscribers.setdefault(subscriber.account_id, set()).add(subscriber)
+
+        return subscriber
+
+    def _startWatcher(self):
+        """ METHOD STARTS THE WATCHER THREAD IF IT ISN'T RUNNING, CALLED WITH _lock HELD """
+
+        if self._thread is None or not self._thread.is_alive():
+
+            self._thread = threading.Thread(target=self.run, name="stream-hub", daemon=True)
+
+            self._thread.start()
+
+    def checkWatcher(self):
+        """ METHOD RESTARTS A WATCHER THREAD THAT DIED (run ONLY STOPS ON INTERPRETER SHUTDOWN), CALLED ON EVERY HEARTBEAT """
+
+        with self._lock:
+
+            if self._pid == os.getpid():
+
+                self._startWatcher()
+
+    def unsubscribe(self, subscriber):
+
+        with self._lock:
+
+            subscribers = self._subscribers.get(subscriber.account_id)
+
+            if subscribers and subscriber in subscribers:
+
+                subscribers.discard(subscriber)
+
+                if subscriber.loop is None:
+
+                    self._sync_count -= 1
+
+                if not subscribers:
+
+                    del self._subscribers[subscriber.account_id]
+
+    def publish(self, account_id, event, data):
+
+        with self._lock:
+
+            subscribers = list(self._subscribers.get(str(account_id), ()))
+
+        if not subscribers:
+
+            return
+
+        message = frame(event, data)
+
+        for subscriber in subscribers:
+
+            subscriber.put(message)
+
+    def run(self):
+
+        client = MongoClient(self.uri)
+
+        db = client.get_default_database()
+
+        while True:
+
+            try:
+
+                if self.mode != "oplog":
+
+                    self.watch(db)
+
+                else:
+
+                    self.tail(client, db)
+
+            except OperationFailure as e:
+
+                if self.mode != "oplog" and e.code in CHANGE_STREAM_UNSUPPORTED:
+
+                    logger.WARNING(f"Change Streams Unavailable, Tailing The Oplog - {e}")
+
+                    self.mode = "oplog"
+
+                    continue
+
+                if e.code in RESUME_TOKEN_LOST:
+
+                    logger.WARNING(f"Change Stream Can't Resume, Restarting From Now - {e}")
+
+                    self.resume_token = None
+
+                logger.ERROR(f"Stream Hub Failed - MODE:{self.mode}")
+
+            except Exception:
+
+                # ALSO BUGS IN dispatch OR A SUBSCRIBER, THE HUB MUST OUTLIVE THEM OR EVERY CLIENT HANGS ON HEARTBEATS.
+                # watch RESUMES AFTER self.resume_token, WHICH IS SET BEFORE dispatch, SO A CHANGE THAT BREAKS dispatch IS SKIPPED
+                # INSTEAD OF FAILING THE STREAM FOREVER, AND EVERY CHANGE AFTER IT IS STILL DELIVERED
+                logger.ERROR(f"Stream Hub Failed - MODE:{self.mode}")
+
+            time.sleep(self.backoff)
+
+            self.backoff = min(self.backoff * 2, 60)
+
+    def watch(self, db):
+        """ METHOD FOLLOWS THE CHANGE STREAM UNTIL IT FAILS. IT STARTS AFTER self.resume_token AND KEEPS IT CURRENT,
+            SO A RECONNECT PICKS UP THE CHANGES MADE WHILE THE STREAM WAS DOWN
+        """
+
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(STREAMED_COLLECTIONS)},
+            "operationType": {"$in": list(OPERATIONS)}
+        }}]
+
+        with db.watch(pipeline, full_document="updateLookup", full_document_before_change="whenAvailable",
+                      resume_after=self.resume_token) as stream:
+
+            self.mode = "change_stream"
+
+            self.backoff = 1
+
+            logger.INFO("Stream Hub Watching - MODE:change_stream")
+
+            for change in stream:
+
+                self.resume_token = stream.resume_token
+
+                self.dispatch(change["ns"]["coll"], change["operationType"], change["documentKey"]["_id"],
+                              change.get("fullDocument") or change.get("fullDocumentBeforeChange"),
+                              change.get("updateDescription", {}).get("updatedFields"))
+
+    def tail(self, client, db):
+        """ METHOD FOLLOWS local.oplog.rs FROM NOW ON. UPDATES ONLY CARRY A DIFF, SO THE HUB LOADS THE DOCUMENT ONCE PER CHANGE. """
+
+        oplog = client.local["oplog.rs"]
+
+        namespaces = [f"{db.name}.{collection}" for collection in STREAMED_COLLECTIONS]
+
+        last = oplog.find().sort("$natural", -1).limit(1).next()["ts"]
+
+        cursor = oplog.find({"ts": {"$gt": last}, "ns": {"$in": namespaces}, "op": {"$in": list(OPLOG_OPERATIONS)}},
+                            cursor_type=CursorType.TAILABLE_AWAIT, oplog_replay=True)
+
+        self.backoff = 1
+
+        logger.INFO("Stream Hub Watching - MODE:oplog")
+
+        while cursor.alive:
+
+            for entry in cursor:
+
+                collection = entry["ns"].split(".", 1)[1]
+
+                operation = OPLOG_OPERATIONS[entry["op"]]
+
+                _id = (entry.get("o2") or entry["o"])["_id"]
+
+                document = entry["o"] if operation == "insert" else None
+
+                if operation == "update":
+
+                    document = db[collection].find_one({"_id": _id})
+
+                self.dispatch(collection, operation, _id, document, None)
+
+    def dispatch(self, collection, operation, _id, document, updated_fields):
+        """ METHOD ROUTES ONE CHANGE TO THE SUBSCRIBERS OF THE ACCOUNT(S) IT BELONGS TO """
+
+        event = STREAMED_COLLECTIONS[collection]
+
+        if collection == "users":
+
+            self.user_cache.pop(str(_id))
+
+            if not document:
+
+                return
+
+            accounts = document.get("Accounts", {})
+
+            changed = changedAccounts(updated_fields or {}) if operation == "update" and updated_fields is not None else None
+
+            for account_id in (changed if changed is not None else accounts):
+
+                if account_id in accounts:
+
+                    self.publish(account_id, event, {"op": operation, "account": accounts[account_id]})
+
+            return
+
+        if not document or "Account_ID" not in document:
+
+            return
+
+        data = {"op": operation, "_id": _id}
+
+        if operation != "delete":
+
+            data["document"] = {key: value for key, value in document.items()
+                                if key not in ("Trader", "Account_ID")}
+
+        self.publish(document["Account_ID"], event, data)
+
+    def messages(self, subscriber):
+        """ METHOD YIELDS SSE FRAMES FOR A SYNC SUBSCRIBER, WITH A HEARTBEAT COMMENT WHEN NOTHING HAPPENS """
+
+        yield frame("ready", {"account_id": subscriber.account_id, "mode": self.mode})
+
+        while not subscriber.overflowed:
+
+            try:
+
+                yield subscriber.queue.get(timeout=self.heartbeat)
+
+            except queue.Empty:
+
+                self.checkWatcher()
+
+                yield ": heartbeat\n\n"
+
+        yield frame("overflow", {"account_id": subscriber.account_id})
+
+    async def messagesAsync(self, subscriber):
+        """ METHOD YIELDS SSE FRAMES FOR AN ASYNCIO SUBSCRIBER, SEE messages """
+
+        yield frame("ready", {"account_id": subscriber.account_id, "mode": self.mode})
+
+        while not subscriber.overflowed:
+
+            try:
+
+                yield await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+
+            except asyncio.TimeoutError:
+
+                self.checkWatcher()
+
+                yield ": heartbeat\n\n"
+
+        yield frame("overflow", {"account_id": subscriber.account_id})
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+# LOGIN ABUSE CONTROLS, BOTH IN-PROCESS (EACH WORKER KEEPS ITS OWN COUNTERS):
+#   LoginThrottle  AFTER A FEW FREE FAILURES, A USERNAME OR CLIENT IP IS LOCKED OUT FOR base * 2^n SECONDS (CAPPED).
+#                  LOCKED OUT ATTEMPTS ARE REJECTED BEFORE ANY BCRYPT WORK.
+#   PasswordPool   BCRYPT RUNS ON A FIXED NUMBER OF THREADS (pyca/bcrypt RELEASES THE GIL) WITH A BOUNDED QUEUE,
+#                  SO A LOGIN BURST COSTS AT MOST BCRYPT_WORKERS CORES AND OVERFLOW IS REJECTED INSTEAD OF PILING UP.
+
+
+class PoolFull(Exception):
+    """ RAISED WHEN THE PASSWORD POOL'S QUEUE IS FULL """
+
+
+class LoginThrottle:
+    """ PER USERNAME AND PER IP FAILED LOGIN COUNTERS WITH EXPONENTIAL BACKOFF
+    Args:
+        maxsize ([int]): MAX NUMBER OF TRACKED KEYS, THE LEAST RECENTLY FAILED KEY IS DROPPED WHEN FULL
+    """
+
+    def __init__(self, maxsize=10000):
+
+        self.maxsize = maxsize
+
+        self.free_attempts = {"user": 3, "ip": 20}
+
+        self.base = 1
+
+        self.max_backoff = 300
+
+        self._data = OrderedDict()
+
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+
+        self.maxsize = app.config.get("LOGIN_THROTTLE_SIZE", self.maxsize)
+
+        self.free_attempts = {
+            "user": app.config.get("LOGIN_THROTTLE_USER_ATTEMPTS", self.free_attempts["user"]),
+            "ip": app.config.get("LOGIN_THROTTLE_IP_ATTEMPTS", self.free_attempts["ip"])
+        }
+
+        self.base = app.config.get("LOGIN_THROTTLE_BASE", self.base)
+
+        self.max_backoff = app.config.get("LOGIN_THROTTLE_MAX", self.max_backoff)
+
+    def keys(self, username, ip):
+
+        return [("user", str(username).lower()), ("ip", ip)]
+
+    def retryAfter(self, username, ip):
+        """ METHOD RETURNS THE SECONDS LEFT ON THE LONGEST LOCKOUT OF username OR ip, 0 IF NEITHER IS LOCKED OUT """
+
+        now = time.monotonic()
+
+        with self._lock:
+
+            waits = [entry[1] - now for entry in (self._data.get(key) for key in self.keys(username, ip))
+                     if entry and entry[1] > now]
+
+        return max(waits, default=0)
+
+    def failed(self, username, ip):
+        """ METHOD COUNTS A FAILED LOGIN AGAINST username AND ip, LOCKING EITHER OUT ONCE ITS FREE ATTEMPTS ARE USED UP """
+
+        now = time.monotonic()
+
+        with self._lock:
+
+            for key in self.keys(username, ip):
+
+                failures, locked_until = self._data.pop(key, (0, 0))
+
+                # A KEY THAT STAYED QUIET FOR A FULL MAX BACKOFF AFTER ITS LOCKOUT STARTS OVER
+                if locked_until and now - locked_until > self.max_backoff:
+
+                    failures = 0
+
+                failures += 1
+
+                excess = failures - self.free_attempts[key[0]]
+
+                if excess >= 0:
+
+                    locked_until = now + min(self.base * 2 ** excess, self.max_backoff)
+
+                self._data[key] = (failures, locked_until)
+
+            while len(self._data) > self.maxsize:
+
+                self._data.popitem(last=False)
+
+    def succeeded(self, username, ip):
+        """ METHOD CLEARS THE USERNAME'S COUNTER. THE IP'S IS KEPT, ONE GOOD LOGIN SHOULDN'T UNLOCK GUESSING OTHER ACCOUNTS. """
+
+        with self._lock:
+
+            self._data.pop(self.keys(username, ip)[0], None)
+
+    def clear(self):
+
+        with self._lock:
+
+            self._data.clear()
+
+
+class PasswordPool:
+    """ RUNS PASSWORD CHECKS ON A FIXED SIZE THREAD POOL WITH A BOUNDED QUEUE
+    Args:
+        workers ([int]): THREADS, I.E. MAX CORES SPENT ON BCRYPT
+        queue ([int]): CHECKS ALLOWED TO WAIT FOR A THREAD BEFORE NEW ONES ARE REJECTED
+    """
+
+    def __init__(self, workers=2, queue=16):
+
+        self.workers = workers
+
+        self.queue = queue
+
+        self.timeout = 10
+
+        self._executor = None
+
+        self._slots = None
+
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+
+        self.workers = app.config.get("BCRYPT_WORKERS", self.workers)
+
+        self.queue = app.config.get("BCRYPT_QUEUE", self.queue)
+
+        self.timeout = app.config.get("BCRYPT_TIMEOUT", self.timeout)
+
+    def start(self):
+
+        with self._lock:
+
+            if self._executor is None:
+
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt")
+
+                self._slots = threading.BoundedSemaphore(self.workers + self.queue)
+
+    def check(self, func, *args):
+        """ METHOD RUNS func(*args) ON THE POOL AND WAITS FOR ITS RESULT
+        Raises:
+            PoolFull: EVERY THREAD IS BUSY AND THE QUEUE IS FULL
+            concurrent.futures.TimeoutError: THE CHECK DIDN'T FINISH WITHIN BCRYPT_TIMEOUT
+        """
+
+        if self._executor is None:
+
+            self.start()
+
+        if not self._slots.acquire(blocking=False):
+
+            raise PoolFull()
+
+        try:
+
+            future = self._executor.submit(func, *args)
+
+        except Exception:
+
+            self._slots.release()
+
+            raise
+
+        # THE SLOT IS HELD UNTIL THE CHECK ACTUALLY FINISHES, EVEN IF THIS REQUEST STOPS WAITING FOR IT
+        future.add_done_callback(lambda _: self._slots.release())
+
+        return future.result(self.timeout)
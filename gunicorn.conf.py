@@ -0,0 +1,56 @@
+# PRODUCTION SERVER: gunicorn run:app   (PICKS UP THIS FILE FROM THE WORKING DIRECTORY)
+# EVERY SETTING CAN BE OVERRIDDEN FROM THE ENVIRONMENT:
+#   GUNICORN_BIND       DEFAULT 0.0.0.0:8000 (OR $PORT)
+#   GUNICORN_WORKERS    DEFAULT 2 x CPUs + 1
+#   GUNICORN_THREADS    THREADS PER WORKER, DEFAULT 4. EACH WORKER'S MONGO POOL SHOULD BE >= THREADS (MONGO_MAX_POOL_SIZE)
+#                       AN OPEN /api/stream HOLDS ONE THREAD, AT MOST STREAM_SYNC_LIMIT (DEFAULT 1) PER WORKER. SERVE STREAMS FROM asgi.py
+#   GUNICORN_PRELOAD    true LOADS THE APP ONCE IN THE MASTER AND FORKS IT (FAST, SHARED MEMORY), DEFAULT true
+#   GUNICORN_TIMEOUT    DEFAULT 30
+# INDEXES ARE NOT BUILT ON STARTUP, RUN "flask --app run ensure-indexes" AS A DEPLOY STEP.
+# CONDITIONAL GETs (ETag/304) NEED ONE "flask --app run watch-versions" PROCESS RUNNING NEXT TO THE WORKERS (SEE api/versions.py).
+# KEEP THE HISTORY ROLLUPS CURRENT WITH "flask --app run refresh-history-rollups --every 300" (OR THE SAME WITHOUT --every FROM CRON).
+# SAME FOR THE STRATEGY STATS WITH "flask --app run refresh-strategy-stats --every 300", IT ALSO SEEDS NEW ACCOUNTS.
+# WITH SEVERAL WORKERS SET PROMETHEUS_MULTIPROC_DIR SO /metrics COVERS ALL OF THEM (SEE extensions/metrics.py).
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 8000)}")
+
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+worker_class = "gthread"
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
+
+errorlog = "-"
+
+
+def post_fork(server, worker):
+
+    if not server.cfg.preload_app:
+
+        return
+
+    # THE MASTER'S CLIENT IS NEVER CONNECTED (connect=False, NO QUERIES AT IMPORT), BUT EACH WORKER STILL GETS ITS OWN POOL
+    from run import app, connectMongo
+
+    connectMongo(app)
+
+
+def child_exit(server, worker):
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,38 @@
+from flask import Blueprint, current_app, jsonify
+import pymongo
+
+from assets.logger import Logger
+from extensions import mongo, secret_key
+
+logger = Logger()
+
+health = Blueprint("health", __name__)
+
+# /healthz  LIVENESS, THE PROCESS IS UP AND SERVING. NEVER TOUCHES MONGO, SO A DATABASE OUTAGE DOESN'T GET WORKERS RESTARTED.
+# /readyz   READINESS, MONGO ANSWERS A ping AND THE SECRET KEY IS LOADED. 503 UNTIL BOTH HOLD.
+
+
+@health.route("/healthz", methods=["GET"])
+def healthz():
+
+    return jsonify({"status": "ok"}), 200
+
+
+@health.route("/readyz", methods=["GET"])
+def readyz():
+
+    try:
+
+        with pymongo.timeout(current_app.config["READINESS_TIMEOUT"]):
+
+            mongo.cx.admin.command("ping")
+
+            secret_key.load()
+
+    except Exception as e:
+
+        logger.WARNING(f"Not Ready - {type(e).__name__}: {e}")
+
+        return jsonify({"status": "unavailable", "error": type(e).__name__}), 503
+
+    return jsonify({"status": "ready"}), 200
@@ -1,12 +1,19 @@
 from flask import Flask
 from datetime import datetime, timedelta
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 import os
 
 from auth.routes import auth
 from api.routes import api
-from extensions import mongo, bcrypt
+from health.routes import health
+from api.strategy_stats import rebuild_strategy_stats_command, refresh_strategy_stats_command
+from api.rollups import rebuild_history_rollups_command, refresh_history_rollups_command
+from api.versions import watch_versions_command
+from extensions import mongo, bcrypt, user_cache, equity_cache, token_cache, seen_versions, metrics, profiler, secret_key, login_throttle, password_pool, stream_hub, compress
+from extensions.json_provider import OrjsonProvider
+from extensions.indexes import ensureIndexes, ensure_indexes_command, check_query_plans_command
 
 THIS_FOLDER = os.path.dirname(os.path.abspath(__file__))
 
@@ -14,26 +21,180 @@ load_dotenv(dotenv_path=f"{THIS_FOLDER}/assets/.env")
 
 MONGO_URI = os.getenv('MONGO_URI')
 
+SECRET_KEY = os.getenv('SECRET_KEY')
 
-def create_app():
+SECRET_KEY_FILE = os.getenv('SECRET_KEY_FILE')
+
+# LEGACY: SIGN TOKENS WITH THIS USER'S PASSWORD HASH WHEN NO KEY IS CONFIGURED, LOADED ON THE FIRST REQUEST
+SECRET_KEY_USER = os.getenv('SECRET_KEY_USER', 'Trey Thomas')
+
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+
+READINESS_TIMEOUT = float(os.getenv('READINESS_TIMEOUT', 2))
+
+# 24 HOURS LIKE THE TOKENS ISSUED BEFORE /refresh EXISTED, CLIENTS THAT REFRESH CAN RUN WITH A SHORTER LIFETIME (E.G. 15)
+ACCESS_TOKEN_MINUTES = int(os.getenv('ACCESS_TOKEN_MINUTES', 1440))
+
+REFRESH_TOKEN_DAYS = int(os.getenv('REFRESH_TOKEN_DAYS', 30))
+
+# THREADS (CORES) AND QUEUE SLOTS FOR PASSWORD CHECKS IN /login, PER WORKER
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 2))
+
+BCRYPT_QUEUE = int(os.getenv('BCRYPT_QUEUE', 16))
+
+# NUMBER OF REVERSE PROXIES IN FRONT OF THE APP, SO request.remote_addr (USED BY THE LOGIN THROTTLE) IS THE CLIENT
+TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 0))
+
+# SSE STREAMS (api/routes.py stream_account): FRAMES A SLOW CLIENT MAY FALL BEHIND BEFORE IT IS CUT OFF, SECONDS BETWEEN HEARTBEATS
+STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', 256))
+
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', 15))
+
+# SSE STREAMS EACH WORKER SERVES AT ONCE, EVERY ONE HOLDS ONE OF ITS GUNICORN_THREADS. 0 LEAVES /api/stream TO asgi.py
+STREAM_SYNC_LIMIT = int(os.getenv('STREAM_SYNC_LIMIT', 1))
+
+# CONDITIONAL GETs (api/versions.py): ETAGS ARE ONLY ISSUED WHILE THE watch-versions HEARTBEAT IS NEWER THAN VERSION_STALE_SECONDS
+VERSION_STALE_SECONDS = float(os.getenv('VERSION_STALE_SECONDS', 30))
+
+VERSION_HEARTBEAT_SECONDS = float(os.getenv('VERSION_HEARTBEAT_SECONDS', 10))
+
+# RESPONSE COMPRESSION (extensions/compress.py), SET COMPRESS_ENABLED=false WHEN THE PROXY ALREADY COMPRESSES
+COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+
+# INDEXES ARE BUILT BY "flask --app run ensure-indexes" AS A DEPLOY STEP, SET true TO ALSO BUILD THEM IN create_app
+MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', 'false').lower() == 'true'
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')
+
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+
+
+def connectMongo(app):
+    """ METHOD CREATES THE MONGO CLIENT. CALLED AGAIN IN EVERY FORKED WORKER (SEE gunicorn.conf.py), A POOL MUST NOT BE SHARED ACROSS fork()
+    Args:
+        app ([Flask]): APP TO READ MONGO_URI AND MONGO_MAX_POOL_SIZE FROM
+    """
+
+    mongo.init_app(app, event_listeners=[metrics.command_listener],
+                   maxPoolSize=app.config["MONGO_MAX_POOL_SIZE"])
+
+    # flask_pymongo INSTALLS ITS BSONProvider ON EVERY init_app, SWAP IN THE orjson ONE (SAME OUTPUT, FASTER)
+    app.json = OrjsonProvider(app)
+
+
+def create_app(config=None):
 
     app = Flask(__name__)
 
     CORS(app)
 
+    if TRUSTED_PROXIES:
+
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
     app.config["MONGO_URI"] = MONGO_URI
 
-    mongo.init_app(app)
+    app.config["MONGO_MAX_POOL_SIZE"] = MONGO_MAX_POOL_SIZE
+
+    app.config["MONGO_ENSURE_INDEXES"] = MONGO_ENSURE_INDEXES
+
+    app.config["SECRET_KEY"] = SECRET_KEY
+
+    app.config["SECRET_KEY_FILE"] = SECRET_KEY_FILE
+
+    app.config["SECRET_KEY_USER"] = SECRET_KEY_USER
+
+    app.config["READINESS_TIMEOUT"] = READINESS_TIMEOUT
+
+    app.config["ACCESS_TOKEN_MINUTES"] = ACCESS_TOKEN_MINUTES
+
+    app.config["REFRESH_TOKEN_DAYS"] = REFRESH_TOKEN_DAYS
+
+    app.config["BCRYPT_WORKERS"] = BCRYPT_WORKERS
+
+    app.config["BCRYPT_QUEUE"] = BCRYPT_QUEUE
+
+    app.config["STREAM_QUEUE_SIZE"] = STREAM_QUEUE_SIZE
+
+    app.config["STREAM_HEARTBEAT"] = STREAM_HEARTBEAT
+
+    app.config["STREAM_SYNC_LIMIT"] = STREAM_SYNC_LIMIT
+
+    app.config["VERSION_STALE_SECONDS"] = VERSION_STALE_SECONDS
+
+    app.config["VERSION_HEARTBEAT_SECONDS"] = VERSION_HEARTBEAT_SECONDS
+
+    app.config["COMPRESS_ENABLED"] = COMPRESS_ENABLED
+
+    app.config["COMPRESS_MIN_SIZE"] = COMPRESS_MIN_SIZE
+
+    app.config["COMPRESS_LEVEL"] = COMPRESS_LEVEL
+
+    app.config["PROFILING_ENABLED"] = PROFILING_ENABLED
+
+    app.config["PROFILING_TOKEN"] = PROFILING_TOKEN
+
+    app.config["PROFILING_SAMPLE_RATE"] = PROFILING_SAMPLE_RATE
+
+    # OVERRIDES FROM THE CALLER (BENCHMARKS, SCRIPTS) WIN OVER THE ENVIRONMENT
+    app.config.update(config or {})
+
+    metrics.init_app(app)
+
+    profiler.init_app(app)
+
+    connectMongo(app)
+
+    if app.config["MONGO_ENSURE_INDEXES"]:
+
+        ensureIndexes(mongo.db)
 
     bcrypt.init_app(app)
 
-    app.config["SECRET_KEY"] = (mongo.db.users.find_one(
-        {"Name": "Trey Thomas"}))["Password"]
+    login_throttle.init_app(app)
+
+    password_pool.init_app(app)
+
+    user_cache.init_app(app)
+
+    equity_cache.init_app(app)
+
+    token_cache.init_app(app)
+
+    seen_versions.init_app(app)
+
+    secret_key.init_app(app)
+
+    stream_hub.init_app(app)
+
+    compress.init_app(app)
+
+    app.register_blueprint(health)
 
     app.register_blueprint(auth)
 
     app.register_blueprint(api)
 
+    app.cli.add_command(rebuild_strategy_stats_command)
+
+    app.cli.add_command(refresh_strategy_stats_command)
+
+    app.cli.add_command(rebuild_history_rollups_command)
+
+    app.cli.add_command(refresh_history_rollups_command)
+
+    app.cli.add_command(watch_versions_command)
+
+    app.cli.add_command(ensure_indexes_command)
+
+    app.cli.add_command(check_query_plans_command)
+
     return app
 
 
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+import os
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+
+# THE APP IS BUILT AGAINST A URI IT NEVER CONNECTS TO, EVERY TEST GETS A FRESH mongomock DATABASE INSTEAD (SEE benchmarks/bench_routes.py)
+TEST_URI = "mongodb://localhost:27017/tos_test"
+
+# run BUILDS ITS MODULE LEVEL app AT IMPORT TIME
+os.environ.setdefault("MONGO_URI", TEST_URI)
+
+from auth.tokens import accessToken  # noqa: E402
+from extensions import mongo, user_cache, equity_cache, token_cache, seen_versions  # noqa: E402
+from run import create_app  # noqa: E402
+
+ACCOUNT_ID = "1"
+
+
+def bulkWrite(self, requests, ordered=True, **kwargs):
+    """ METHOD REPLAYS A bulk_write ONE OPERATION AT A TIME, mongomock'S OWN bulk_write REJECTS THE CURRENT pymongo OPERATIONS """
+
+    for request in requests:
+
+        if isinstance(request, InsertOne):
+
+            self.insert_one(request._doc)
+
+        elif isinstance(request, ReplaceOne):
+
+            self.replace_one(request._filter, request._doc, upsert=request._upsert)
+
+        elif isinstance(request, UpdateOne):
+
+            self.update_one(request._filter, request._doc, upsert=request._upsert)
+
+
+@pytest.fixture(scope="session")
+def app():
+
+    return create_app({"TESTING": True, "MONGO_URI": TEST_URI, "SECRET_KEY": "test-secret-key-at-least-32-bytes-long"})
+
+
+@pytest.fixture
+def db(app, monkeypatch):
+
+    monkeypatch.setattr(mongomock.Collection, "bulk_write", bulkWrite)
+
+    monkeypatch.setattr(mongo, "cx", mongomock.MongoClient())
+
+    monkeypatch.setattr(mongo, "db", mongo.cx.get_database("tos_test"))
+
+    for cache in (user_cache, equity_cache, token_cache, seen_versions):
+
+        cache.clear()
+
+    return mongo.db
+
+
+@pytest.fixture
+def context(app, db):
+    """ AN APP CONTEXT FOR CALLING HELPERS DIRECTLY, NOT FOR THE TEST CLIENT (ITS REQUESTS WOULD SHARE THE CONTEXT'S g) """
+
+    with app.app_context():
+
+        yield
+
+
+@pytest.fixture
+def client(app, db):
+
+    return app.test_client()
+
+
+@pytest.fixture
+def user(db):
+
+    user_id = ObjectId()
+
+    db.users.insert_one({
+        "_id": user_id,
+        "Name": "Tester",
+        "Username": "tester",
+        "Accounts": {ACCOUNT_ID: {
+            "Active": True,
+            "Account_Balance": 1000.0,
+            "forbidden_symbols": ["XYZ"],
+            "Strategies": {"S1": {"Active": True, "Shares": 10}}
+        }}
+    })
+
+    return {"_id": user_id, "Name": "Tester"}
+
+
+def tokenHeaders(app, user_id, name):
+
+    with app.app_context():
+
+        return {"x-access-token": accessToken(user_id, name)}
+
+
+@pytest.fixture
+def headers(app, user):
+
+    return tokenHeaders(app, user["_id"], user["Name"])
+
+
+@pytest.fixture
+def heartbeat(db):
+    """ A RUNNING watch-versions PROCESS, WITHOUT IT THE ROUTES ANSWER WITHOUT ETAGS """
+
+    db.account_versions.insert_one({"_id": "global", "Epoch": "test", "Heartbeat": datetime.utcnow() + timedelta(hours=1)})
@@ -0,0 +1,238 @@
+import math
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from api import analytics
+
+
+def referenceMetrics(returns):
+    """ PLAIN PYTHON VERSION OF THE METRICS THE VECTORIZED CODE MUST MATCH """
+
+    if len(returns) < 2:
+
+        mean = std = downside = 0.0
+
+    else:
+
+        mean = statistics.mean(returns)
+
+        std = statistics.stdev(returns)
+
+        downside = math.sqrt(sum(min(r, 0) ** 2 for r in returns) / len(returns))
+
+    gains = sum(r for r in returns if r > 0)
+
+    losses = -sum(r for r in returns if r < 0)
+
+    wins = sum(1 for r in returns if r > 0)
+
+    decided = wins + sum(1 for r in returns if r < 0)
+
+    peak = -math.inf
+
+    mdd = 0.0
+
+    for value in returns:
+
+        peak = max(peak, value)
+
+        mdd = max(mdd, peak - value)
+
+    return {
+        "SR": mean / std if std else 0.0,
+        "Sortino": mean / downside if downside else 0.0,
+        "PF": gains / losses if losses else 0.0,
+        "Win_Rate": wins / decided if decided else 0.0,
+        "MDD": mdd
+    }
+
+
+def singleMetrics(returns):
+
+    return {
+        "SR": analytics.sharpeRatio(returns),
+        "Sortino": analytics.sortinoRatio(returns),
+        "PF": analytics.profitFactor(returns),
+        "Win_Rate": analytics.winRate(returns),
+        "MDD": analytics.maxDrawdown(returns)
+    }
+
+
+ZERO_METRICS = {"SR": 0.0, "Sortino": 0.0, "PF": 0.0, "Win_Rate": 0.0, "MDD": 0.0}
+
+
+def test_random_series_match_reference():
+
+    rng = random.Random(42)
+
+    series = {f"STRATEGY_{i}": [rng.gauss(0.2, 2.5) for _ in range(rng.randint(50, 200))] for i in range(5)}
+
+    batched = analytics.strategyMetrics(series)
+
+    for name, returns in series.items():
+
+        expected = referenceMetrics(returns)
+
+        assert singleMetrics(returns) == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+        assert {metric: batched[name][metric] for metric in expected} == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_drawdown_before_global_peak():
+
+    # THE 5 -> 0 DROP COMES BEFORE THE GLOBAL MAX, THE OLD HELPER REPORTED 1
+    assert analytics.maxDrawdown([5, 0, 6, 5]) == 5
+
+
+def test_empty_series():
+
+    assert singleMetrics([]) == ZERO_METRICS
+
+    assert analytics.strategyMetrics({}) == {}
+
+    metrics = analytics.strategyMetrics({"A": []})["A"]
+
+    assert metrics["Count"] == 0
+
+    assert metrics["Mean"] == 0.0
+
+    assert metrics["Std"] == 0.0
+
+    assert metrics["Peak"] is None
+
+    assert {metric: metrics[metric] for metric in ZERO_METRICS} == ZERO_METRICS
+
+
+def test_single_point():
+
+    assert singleMetrics([3.0]) == {**ZERO_METRICS, "PF": 0.0, "Win_Rate": 1.0}
+
+    metrics = analytics.strategyMetrics({"A": [3.0]})["A"]
+
+    assert metrics["Count"] == 1
+
+    assert metrics["Mean"] == 3.0
+
+    assert metrics["Std"] == 0.0
+
+    assert metrics["SR"] == 0.0
+
+    assert metrics["Sortino"] == 0.0
+
+    assert metrics["MDD"] == 0.0
+
+    assert metrics["Peak"] == 3.0
+
+
+def test_padded_rows_do_not_leak_between_strategies():
+
+    series = {"EMPTY": [], "SHORT": [1.0, -2.0], "LONG": [4.0, -1.0, 2.0, -3.0, 5.0, 0.5]}
+
+    batched = analytics.strategyMetrics(series)
+
+    # A ROW THAT IS ALL NaN PADDING IS ALL ZEROS, THE OTHERS MATCH THEIR OWN SERIES
+    assert batched["EMPTY"]["Count"] == 0
+
+    assert batched["EMPTY"]["Peak"] is None
+
+    assert {metric: batched["EMPTY"][metric] for metric in ZERO_METRICS} == ZERO_METRICS
+
+    for name in ("SHORT", "LONG"):
+
+        expected = referenceMetrics(series[name])
+
+        assert batched[name]["Count"] == len(series[name])
+
+        assert {metric: batched[name][metric] for metric in expected} == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+    assert batched["SHORT"]["Peak"] == 1.0
+
+    assert batched["LONG"]["Peak"] == 5.0
+
+
+def test_drawdowns_series_overrides_returns():
+
+    metrics = analytics.strategyMetrics({"A": [1.0, 1.0]}, drawdowns={"A": [10.0, 4.0, 7.0]})["A"]
+
+    assert metrics["MDD"] == 6.0
+
+    assert metrics["Peak"] == 10.0
+
+
+def test_zero_std():
+
+    assert analytics.sharpeRatio([2.0, 2.0, 2.0]) == 0.0
+
+    metrics = analytics.strategyMetrics({"A": [2.0, 2.0, 2.0]})["A"]
+
+    assert metrics["Std"] == 0.0
+
+    assert metrics["SR"] == 0.0
+
+    # NO DOWNSIDE EITHER
+    assert metrics["Sortino"] == 0.0
+
+
+def test_no_losses():
+
+    assert analytics.profitFactor([1.0, 2.0, 0.0]) == 0.0
+
+    assert analytics.winRate([1.0, 2.0, 0.0]) == 1.0
+
+    metrics = analytics.strategyMetrics({"A": [1.0, 2.0, 0.0]})["A"]
+
+    assert metrics["PF"] == 0.0
+
+    assert metrics["Win_Rate"] == 1.0
+
+
+def test_flat_trades_only():
+
+    assert analytics.winRate([0.0, 0.0]) == 0.0
+
+    assert analytics.strategyMetrics({"A": [0.0, 0.0]})["A"]["Win_Rate"] == 0.0
+
+
+@pytest.mark.parametrize("threshold", [5, 6, 100])
+def test_lttb_keeps_everything_when_threshold_covers_series(threshold):
+
+    assert analytics.lttbIndices(range(5), [1, 3, 2, 5, 4], threshold).tolist() == list(range(5))
+
+
+@pytest.mark.parametrize("threshold, expected", [(2, [0, 9]), (1, [0]), (0, []), (-1, [])])
+def test_lttb_below_three_points(threshold, expected):
+
+    indices = analytics.lttbIndices(range(10), range(10), threshold)
+
+    assert indices.tolist() == expected
+
+    assert indices.dtype == np.intp
+
+
+def test_lttb_empty_series():
+
+    assert analytics.lttbIndices([], [], 10).tolist() == []
+
+
+def test_lttb_keeps_ends_and_spikes():
+
+    y = [0.0] * 100
+
+    y[37] = 50.0
+
+    y[71] = -50.0
+
+    indices = analytics.lttbIndices(range(100), y, 10)
+
+    assert len(indices) == 10
+
+    assert indices[0] == 0
+
+    assert indices[-1] == 99
+
+    assert (np.diff(indices) > 0).all()
+
+    assert 37 in indices and 71 in indices
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson.objectid import ObjectId
+
+from api.listings import decodeCursor, encodeCursor, listingPage, parseListingArgs
+from tests.conftest import ACCOUNT_ID
+
+START = datetime(2026, 3, 1)
+
+
+@pytest.fixture
+def closed(db):
+    """ 25 POSITIONS OVER 10 DAYS, SEVERAL SHARE A Sell_Date SO THE _id TIE BREAK IS EXERCISED """
+
+    positions = [{"_id": ObjectId(), "Account_ID": 1, "Symbol": f"S{index}", "Sell_Date": START + timedelta(days=index % 10)}
+                 for index in range(25)]
+
+    db.closed_positions.insert_many(positions + [{"Account_ID": 2, "Symbol": "OTHER", "Sell_Date": START}])
+
+    return sorted(positions, key=lambda position: (position["Sell_Date"], position["_id"]), reverse=True)
+
+
+def pages(listing, args):
+
+    params = parseListingArgs(args)
+
+    while True:
+
+        docs, cursor = listingPage(listing, ACCOUNT_ID, params)
+
+        yield docs
+
+        if cursor is None:
+
+            return
+
+        params["after"] = cursor
+
+
+@pytest.mark.parametrize("limit", ["1", "4", "7", "25", "100"])
+def test_closed_positions_pages_cover_everything_once(closed, limit):
+
+    seen = [doc["_id"] for docs in pages("closed_positions", {"limit": limit}) for doc in docs]
+
+    assert seen == [position["_id"] for position in closed]
+
+
+def test_closed_positions_pages_within_dates(closed):
+
+    args = {"limit": "3", "start": "2026-03-02", "end": "2026-03-04"}
+
+    seen = [doc["_id"] for docs in pages("closed_positions", args) for doc in docs]
+
+    assert seen == [position["_id"] for position in closed if START + timedelta(days=1) <= position["Sell_Date"] < START + timedelta(days=4)]
+
+
+def test_last_page_has_no_cursor(closed):
+
+    docs, cursor = listingPage("closed_positions", ACCOUNT_ID, parseListingArgs({"limit": "25"}))
+
+    assert len(docs) == 25
+
+    assert cursor is None
+
+
+def test_queued_pages_in_insert_order(db):
+
+    ids = db.queue.insert_many([{"Account_ID": 1, "Symbol": f"S{index}"} for index in range(9)]).inserted_ids
+
+    assert [doc["_id"] for docs in pages("queued", {"limit": "2"}) for doc in docs] == ids
+
+
+def test_cursor_round_trip(closed):
+
+    assert decodeCursor("closed_positions", encodeCursor("closed_positions", closed[3])) == [closed[3]["Sell_Date"], closed[3]["_id"]]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encodeCursor("queued", {"_id": ObjectId()})])
+def test_malformed_cursor(cursor):
+
+    with pytest.raises(ValueError):
+
+        decodeCursor("closed_positions", cursor)
+
+
+def test_route_pages_and_rejects_bad_cursors(client, headers, closed):
+
+    seen = []
+
+    url = f"/api/closed_positions/{ACCOUNT_ID}?limit=10"
+
+    while url:
+
+        body = client.get(url, headers=headers).get_json()
+
+        seen += [str(doc["_id"]) for doc in body["closed_positions"]]
+
+        url = f"/api/closed_positions/{ACCOUNT_ID}?limit=10&after={body['next']}" if body["next"] else None
+
+    assert seen == [str(position["_id"]) for position in closed]
+
+    response = client.get(f"/api/closed_positions/{ACCOUNT_ID}?after=garbage", headers=headers)
+
+    assert response.status_code == 400
@@ -0,0 +1,105 @@
+import pytest
+
+from api import sections
+from tests.conftest import ACCOUNT_ID
+
+POSITIONS = [
+    {"Account_ID": 1, "Strategy": "S1", "Symbol": "AAA", "Qty": 10, "Buy_Price": 10.0},
+    {"Account_ID": 1, "Strategy": "S1", "Symbol": "BBB", "Qty": 5, "Buy_Price": 20.0},
+    {"Account_ID": 1, "Strategy": "S2", "Symbol": "CCC", "Qty": 2, "Buy_Price": 50.0},
+    # ANOTHER ACCOUNT, NEVER PART OF THE BOOK
+    {"Account_ID": 2, "Strategy": "S1", "Symbol": "AAA", "Qty": 100, "Buy_Price": 1.0}
+]
+
+# CCC HAS NO QUOTE AND IS VALUED AT ITS Buy_Price
+QUOTES = [
+    {"Symbol": "AAA", "Last_Price": 12.0},
+    {"Symbol": "BBB", "Last_Price": 18.0},
+    {"Symbol": "ZZZ", "Last_Price": 99.0}
+]
+
+
+@pytest.fixture
+def quotes(db):
+
+    db.quotes.insert_many([dict(quote) for quote in QUOTES])
+
+    return {quote["Symbol"]: quote["Last_Price"] for quote in QUOTES}
+
+
+@pytest.fixture
+def positions(db):
+
+    db.open_positions.insert_many([dict(position) for position in POSITIONS])
+
+    return [{field: position[field] for field in ("Strategy", "Symbol", "Qty", "Buy_Price")}
+            for position in POSITIONS if position["Account_ID"] == 1]
+
+
+def test_book_values_positions_against_quotes(positions, quotes):
+
+    book = {row["Strategy"]: row for row in sections.positionsBook(positions, quotes)}
+
+    # GROSS EXPOSURE: 10 * 12 + 5 * 18 + 2 * 50 = 310
+    assert book["S1"]["Symbols"] == ["AAA", "BBB"]
+
+    assert book["S1"]["Exposure"] == 210.0
+
+    assert book["S1"]["Cost"] == 200.0
+
+    assert book["S1"]["Unrealized_PL"] == 10.0
+
+    assert book["S1"]["Weight"] == pytest.approx(210 / 310, abs=1e-4)
+
+    aaa, bbb = book["S1"]["Positions"]
+
+    assert aaa == {"Symbol": "AAA", "Qty": 10, "Buy_Price": 10.0, "Last_Price": 12.0,
+                   "Exposure": 120.0, "Unrealized_PL": 20.0, "Weight": round(120 / 310, 4)}
+
+    assert bbb["Unrealized_PL"] == -10.0
+
+
+def test_book_values_unquoted_positions_at_entry(positions, quotes):
+
+    book = {row["Strategy"]: row for row in sections.positionsBook(positions, quotes)}
+
+    ccc = book["S2"]["Positions"][0]
+
+    assert ccc["Last_Price"] is None
+
+    assert ccc["Exposure"] == 100.0
+
+    assert ccc["Unrealized_PL"] == 0.0
+
+    assert book["S2"]["Unrealized_PL"] == 0.0
+
+
+def test_book_weights_sum_to_one(positions, quotes):
+
+    book = sections.positionsBook(positions, quotes)
+
+    assert sum(row["Weight"] for row in book) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_empty_book():
+
+    assert sections.positionsBook([], {}) == []
+
+
+def test_open_positions_reads_the_account_and_its_quotes(positions, quotes):
+
+    assert sections.open_positions(None, ACCOUNT_ID, {}) == sections.positionsBook(positions, quotes)
+
+
+def test_open_positions_without_positions(db, quotes):
+
+    assert sections.open_positions(None, ACCOUNT_ID, {}) == []
+
+
+def test_open_positions_route(client, headers, positions, quotes):
+
+    response = client.get(f"/api/open_positions/{ACCOUNT_ID}", headers=headers)
+
+    assert response.status_code == 200
+
+    assert response.get_json()["open_positions"] == sections.positionsBook(positions, quotes)
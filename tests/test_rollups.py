@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+import random
+
+import pytest
+
+from api import sections
+from api.rollups import PERIODS, bucketRow, capRows, fetchRollups, foldBuckets, periodStart, refreshRollups, rollupCollection
+from tests.conftest import ACCOUNT_ID
+
+DAYS = [(date(2026, 1, 1) + timedelta(days=day)).isoformat() for day in range(150)]
+
+
+@pytest.fixture
+def history():
+
+    rng = random.Random(11)
+
+    return [{"Account_ID": 1, "Date": day, "Balance": round(rng.uniform(900, 1100), 2)} for day in DAYS]
+
+
+def expectedRows(history, period, start=None, end=None):
+    """ METHOD FOLDS THE WHOLE DAILY HISTORY AT ONCE, WHAT EVERY READ MUST RETURN HOWEVER IT IS SPLIT """
+
+    buckets = foldBuckets([doc for doc in history if not end or doc["Date"] <= end], period, "Balance")
+
+    rows = [bucketRow({**bucket, "Period": key}) for key, bucket in sorted(buckets.items())]
+
+    return [row for row in rows if not start or row["Date"] >= periodStart(start, period)]
+
+
+def storedRows(period):
+
+    return [bucketRow(bucket) for bucket in rollupCollection("balance_history", period).find({}, {"_id": 0}).sort("Period", 1)]
+
+
+@pytest.mark.parametrize("period", list(PERIODS))
+def test_read_without_rollups(db, history, period):
+
+    db.balance_history.insert_many([dict(doc) for doc in history])
+
+    assert fetchRollups("balance_history", period, 1, None, None) == expectedRows(history, period)
+
+    assert rollupCollection("balance_history", period).count_documents({}) == 0
+
+
+@pytest.mark.parametrize("period", list(PERIODS))
+def test_read_merges_pending_days_into_the_rollup(db, history, period):
+
+    # THE LAST ROLLED UP BUCKET IS LEFT HALF FULL, THE PENDING DAYS HAVE TO EXTEND IT, NOT START A NEW ONE
+    db.balance_history.insert_many([dict(doc) for doc in history[:66]])
+
+    refreshRollups("balance_history", 1)
+
+    stored = storedRows(period)
+
+    assert stored == expectedRows(history[:66], period)
+
+    db.balance_history.insert_many([dict(doc) for doc in history[66:]])
+
+    assert fetchRollups("balance_history", period, 1, None, None) == expectedRows(history, period)
+
+    assert fetchRollups("balance_history", period, 1, DAYS[40], DAYS[100]) == expectedRows(history, period, DAYS[40], DAYS[100])
+
+    # READS NEVER WRITE
+    assert storedRows(period) == stored
+
+
+@pytest.mark.parametrize("period", list(PERIODS))
+def test_replayed_refresh_converges(db, history, period):
+
+    db.balance_history.insert_many([dict(doc) for doc in history[:80]])
+
+    refreshRollups("balance_history", 1)
+
+    db.balance_history.insert_many([dict(doc) for doc in history[80:]])
+
+    refreshRollups("balance_history", 1)
+
+    refreshRollups("balance_history", 1)
+
+    assert storedRows(period) == expectedRows(history, period)
+
+
+def test_cap_merges_adjacent_rows():
+
+    rows = [{"Date": DAYS[day], "Open": day, "High": day + 5, "Low": day - 5, "Close": day + 1} for day in range(10)]
+
+    capped = capRows(rows, 3)
+
+    assert [row["Date"] for row in capped] == [DAYS[0], DAYS[4], DAYS[8]]
+
+    assert capped[0] == {"Date": DAYS[0], "Open": 0, "High": 8, "Low": -5, "Close": 4}
+
+    assert capped[-1] == {"Date": DAYS[8], "Open": 8, "High": 14, "Low": 3, "Close": 10}
+
+
+@pytest.mark.parametrize("points", [None, 10, 50])
+def test_cap_keeps_rows_that_fit(points):
+
+    rows = [{"Date": DAYS[day], "Open": 1, "High": 1, "Low": 1, "Close": 1} for day in range(10)]
+
+    assert capRows(rows, points) == rows
+
+
+def test_capped_history_covers_the_whole_range(db, history):
+
+    db.balance_history.insert_many([dict(doc) for doc in history])
+
+    weeks = expectedRows(history, "week")
+
+    capped = sections.history("balance_history", ACCOUNT_ID, {"start": DAYS[0], "mode": "week", "points": "5"})
+
+    assert len(capped) == 5
+
+    assert capped[0]["Date"] == weeks[0]["Date"]
+
+    assert capped[0]["Open"] == weeks[0]["Open"]
+
+    assert capped[-1]["Close"] == weeks[-1]["Close"]
+
+    assert max(row["High"] for row in capped) == max(row["High"] for row in weeks)
+
+    assert min(row["Low"] for row in capped) == min(row["Low"] for row in weeks)
@@ -0,0 +1,223 @@
+from datetime import datetime, timedelta
+import os
+import random
+import statistics
+
+import pytest
+from bson.objectid import ObjectId
+
+from api import strategy_stats
+from api.strategy_stats import (aggregatedStats, fetchStrategyStats, foldPosition, newStats, rebuildStrategyStats,
+                                refreshStrategyStats, summarize)
+
+
+def positionId(seconds_ago):
+    """ METHOD RETURNS A UNIQUE _id CREATED seconds_ago SECONDS AGO (ObjectId.from_datetime ALONE ISN'T UNIQUE) """
+
+    stamp = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=seconds_ago))
+
+    return ObjectId(stamp.binary[:4] + os.urandom(8))
+
+
+def randomPositions(rng, count, strategies=("S1", "S2", "S3"), seconds_ago=600):
+
+    positions = []
+
+    for index in range(count):
+
+        buy = rng.uniform(10, 20)
+
+        sell = buy + rng.choice([0, rng.uniform(-3, 3)])
+
+        positions.append({
+            "_id": positionId(seconds_ago - index),
+            "Account_ID": 1,
+            "Strategy": rng.choice(strategies),
+            "Symbol": rng.choice(["AAA", "BBB", "CCC"]),
+            "Buy_Price": buy,
+            "Sell_Price": sell,
+            "Qty": rng.randint(1, 10),
+            "ROV": round((sell - buy) / buy * 100, 2)
+        })
+
+    return positions
+
+
+def referenceAggregates(positions):
+    """ METHOD GROUPS POSITIONS THE WAY strategyPipeline DOES, mongomock HAS NO $stdDevSamp """
+
+    rows = {}
+
+    for position in sorted(positions, key=lambda position: position["_id"]):
+
+        if position["ROV"] == 0:
+
+            continue
+
+        rows.setdefault(position["Strategy"], []).append(position)
+
+    return {strategy: {
+        "Wins": sum(1 for position in group if position["ROV"] > 0),
+        "Loss": sum(1 for position in group if position["ROV"] < 0),
+        "Count": len(group),
+        "Profit_Loss": sum(position["Sell_Price"] * position["Qty"] - position["Buy_Price"] * position["Qty"] for position in group),
+        "Avg_ROV": statistics.mean(position["ROV"] for position in group),
+        "Std_ROV": statistics.stdev(position["ROV"] for position in group) if len(group) > 1 else None,
+        "Drawdowns": [position["Sell_Price"] - position["Buy_Price"] for position in group]
+    } for strategy, group in rows.items()}
+
+
+def summaries(stats):
+
+    return {strategy: summarize(doc) for strategy, doc in stats.items() if doc["Count"]}
+
+
+def assertSameStats(stats, expected):
+
+    assert set(summaries(stats)) == set(summaries(expected))
+
+    for strategy, summary in summaries(expected).items():
+
+        assert summaries(stats)[strategy] == pytest.approx(summary, rel=1e-9, abs=1e-9)
+
+
+@pytest.fixture
+def aggregates(db, monkeypatch):
+
+    def strategyAggregates(account_id, before=None):
+
+        query = {"Account_ID": account_id}
+
+        if before is not None:
+
+            query["_id"] = {"$lt": before}
+
+        return referenceAggregates(db.closed_positions.find(query))
+
+    monkeypatch.setattr(strategy_stats, "strategyAggregates", strategyAggregates)
+
+
+def test_fold_matches_aggregate():
+
+    rng = random.Random(7)
+
+    positions = randomPositions(rng, 300)
+
+    folded = {}
+
+    for position in positions:
+
+        folded.setdefault(position["Strategy"], newStats(1, position["Strategy"]))
+
+        foldPosition(folded[position["Strategy"]], position)
+
+    rebuilt = aggregatedStats(1, referenceAggregates(positions))
+
+    assertSameStats(folded, rebuilt)
+
+    for strategy, doc in rebuilt.items():
+
+        # THE DRAWDOWN STATE HAS TO MATCH TOO, LATER FOLDS CONTINUE FROM IT
+        assert doc["DD_Peak"] == pytest.approx(folded[strategy]["DD_Peak"])
+
+        assert doc["DD_Max"] == pytest.approx(folded[strategy]["DD_Max"])
+
+        assert doc["ROV_M2"] == pytest.approx(folded[strategy]["ROV_M2"], rel=1e-9, abs=1e-9)
+
+
+def test_single_trade_strategy():
+
+    position = {"_id": positionId(0), "Strategy": "S1", "ROV": 5.0, "Sell_Price": 21.0, "Buy_Price": 20.0, "Qty": 2}
+
+    folded = newStats(1, "S1")
+
+    foldPosition(folded, position)
+
+    assertSameStats({"S1": folded}, aggregatedStats(1, referenceAggregates([position])))
+
+    assert summarize(folded)["Std_ROV"] is None
+
+
+def test_unseeded_account_is_answered_without_writing(db, aggregates):
+
+    positions = randomPositions(random.Random(1), 50)
+
+    db.closed_positions.insert_many(positions)
+
+    assertSameStats(fetchStrategyStats("1"), aggregatedStats(1, referenceAggregates(positions)))
+
+    assert db.strategy_stats.count_documents({}) == 0
+
+
+def test_read_folds_positions_past_the_mark_without_writing(db, aggregates):
+
+    rng = random.Random(2)
+
+    settled = randomPositions(rng, 60, strategies=("S1", "S2"))
+
+    db.closed_positions.insert_many(settled)
+
+    assert rebuildStrategyStats(1) == 2
+
+    # NEWER THAN THE MARK, ONE OF THEM FROM A STRATEGY THE ROLLUP DOESN'T HAVE YET
+    recent = randomPositions(rng, 20, strategies=("S1", "S2", "S3"), seconds_ago=10)
+
+    db.closed_positions.insert_many(recent)
+
+    stored = list(db.strategy_stats.find())
+
+    closed = list(db.closed_positions.find())
+
+    assertSameStats(fetchStrategyStats("1"), aggregatedStats(1, referenceAggregates(settled + recent)))
+
+    assert list(db.strategy_stats.find()) == stored
+
+    assert list(db.closed_positions.find()) == closed
+
+
+def test_refresh_folds_settled_positions_once(db, aggregates, monkeypatch):
+
+    rng = random.Random(3)
+
+    settled = randomPositions(rng, 40, strategies=("S1", "S2"))
+
+    db.closed_positions.insert_many(settled)
+
+    rebuildStrategyStats(1)
+
+    recent = randomPositions(rng, 30, strategies=("S2", "S3"), seconds_ago=10)
+
+    db.closed_positions.insert_many(recent)
+
+    # NOT SETTLED YET, THE REFRESH LEAVES THEM TO THE READS
+    assert refreshStrategyStats(1) == 0
+
+    monkeypatch.setattr(strategy_stats, "STATS_SETTLE_SECONDS", -60)
+
+    assert refreshStrategyStats(1) == len({position["Strategy"] for position in recent})
+
+    expected = aggregatedStats(1, referenceAggregates(settled + recent))
+
+    assertSameStats({doc["Strategy"]: doc for doc in db.strategy_stats.find()}, expected)
+
+    # THE MARKS MOVED PAST EVERY FOLDED POSITION, NOTHING IS COUNTED TWICE
+    assertSameStats(fetchStrategyStats("1"), expected)
+
+
+def test_rebuild_replaces_documents_in_place(db, aggregates):
+
+    db.closed_positions.insert_many(randomPositions(random.Random(4), 30, strategies=("S1", "S2")))
+
+    rebuildStrategyStats(1)
+
+    before = {doc["Strategy"]: doc for doc in db.strategy_stats.find()}
+
+    rebuildStrategyStats(1)
+
+    after = {doc["Strategy"]: doc for doc in db.strategy_stats.find()}
+
+    assert {strategy: doc["_id"] for strategy, doc in after.items()} == {strategy: doc["_id"] for strategy, doc in before.items()}
+
+    assert all(after[strategy]["Version"] != before[strategy]["Version"] for strategy in before)
+
+    assertSameStats(after, before)
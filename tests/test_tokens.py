@@ -0,0 +1,92 @@
+import pytest
+
+from auth.tokens import RefreshError, issueRefreshToken, rotateRefreshToken, tokenHash
+from tests.conftest import ACCOUNT_ID
+
+
+@pytest.fixture
+def refresh_token(app, user):
+
+    with app.app_context():
+
+        return issueRefreshToken(user["_id"], user["Name"])
+
+
+def test_only_the_hash_is_stored(context, db, refresh_token):
+
+    assert db.refresh_tokens.count_documents({"Token_Hash": tokenHash(refresh_token)}) == 1
+
+    assert db.refresh_tokens.count_documents({"Token_Hash": refresh_token}) == 0
+
+
+def test_rotation_spends_the_token(context, db, refresh_token):
+
+    pair = rotateRefreshToken(refresh_token)
+
+    assert pair["refresh_token"] != refresh_token
+
+    spent = db.refresh_tokens.find_one({"Token_Hash": tokenHash(refresh_token)})
+
+    issued = db.refresh_tokens.find_one({"Token_Hash": tokenHash(pair["refresh_token"])})
+
+    assert spent["Revoked"] is True
+
+    assert issued["Revoked"] is False
+
+    assert issued["Family"] == spent["Family"]
+
+    # AND THE NEW ONE ROTATES IN TURN
+    rotateRefreshToken(pair["refresh_token"])
+
+
+def test_reuse_revokes_the_family(context, db, refresh_token):
+
+    pair = rotateRefreshToken(refresh_token)
+
+    with pytest.raises(RefreshError, match="Reused"):
+
+        rotateRefreshToken(refresh_token)
+
+    # THE TOKEN ROTATED FROM THE STOLEN ONE IS DEAD TOO
+    with pytest.raises(RefreshError, match="Reused"):
+
+        rotateRefreshToken(pair["refresh_token"])
+
+    assert db.refresh_tokens.count_documents({"Revoked": False}) == 0
+
+
+def test_other_families_survive_a_reuse(context, user, refresh_token):
+
+    other = issueRefreshToken(user["_id"], user["Name"])
+
+    rotateRefreshToken(refresh_token)
+
+    with pytest.raises(RefreshError):
+
+        rotateRefreshToken(refresh_token)
+
+    rotateRefreshToken(other)
+
+
+def test_unknown_token(context):
+
+    with pytest.raises(RefreshError, match="Invalid"):
+
+        rotateRefreshToken("unknown")
+
+
+def test_refresh_route(client, refresh_token):
+
+    response = client.post("/refresh", json={"refresh_token": refresh_token})
+
+    assert response.status_code == 200
+
+    pair = response.get_json()
+
+    assert client.get(f"/api/account_status/{ACCOUNT_ID}", headers={"x-access-token": pair["token"]}).status_code == 200
+
+    assert client.post("/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+    assert client.post("/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+
+    assert client.post("/refresh", json={}).status_code == 401
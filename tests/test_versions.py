@@ -0,0 +1,113 @@
+import pytest
+from bson.objectid import ObjectId
+
+from api.versions import changeTargets, flushBumps
+from tests.conftest import ACCOUNT_ID, tokenHeaders
+
+STATUS_URL = f"/api/account_status/{ACCOUNT_ID}"
+
+
+def fetch(client, headers, url=STATUS_URL, etag=None):
+
+    return client.get(url, headers={**headers, "If-None-Match": f'W/"{etag}"'} if etag else headers)
+
+
+def test_no_etag_without_a_heartbeat(client, headers):
+
+    response = fetch(client, headers)
+
+    assert response.status_code == 200
+
+    assert response.headers.get("ETag") is None
+
+
+def test_matching_etag_answers_304(client, headers, heartbeat):
+
+    response = fetch(client, headers)
+
+    etag, weak = response.get_etag()
+
+    assert response.status_code == 200
+
+    assert weak
+
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    cached = fetch(client, headers, etag=etag)
+
+    assert cached.status_code == 304
+
+    assert cached.get_data() == b""
+
+    assert cached.get_etag() == (etag, True)
+
+    assert fetch(client, headers, etag="stale").status_code == 200
+
+
+def test_query_string_is_part_of_the_etag(client, headers, heartbeat):
+
+    url = f"/api/account_balance_history/{ACCOUNT_ID}"
+
+    etag, _ = fetch(client, headers, url + "?range=7d").get_etag()
+
+    assert fetch(client, headers, url + "?range=30d", etag=etag).status_code == 200
+
+    assert fetch(client, headers, url + "?range=7d", etag=etag).status_code == 304
+
+
+def test_write_route_moves_the_etag(client, headers, heartbeat):
+
+    etag, _ = fetch(client, headers).get_etag()
+
+    assert fetch(client, headers).get_json()["account_status"] is True
+
+    assert client.put(f"/api/change_account_status/{ACCOUNT_ID}", headers=headers,
+                      json={"account_status": "Active"}).status_code == 201
+
+    response = fetch(client, headers, etag=etag)
+
+    assert response.status_code == 200
+
+    assert response.get_json()["account_status"] is False
+
+    assert response.get_etag()[0] != etag
+
+
+def test_watched_write_drops_the_cached_user(client, db, headers, heartbeat, user):
+
+    etag, _ = fetch(client, headers).get_etag()
+
+    # THE TRADING BOT'S WRITE, COUNTED BY watch-versions
+    db.users.update_one({"_id": user["_id"]}, {"$set": {f"Accounts.{ACCOUNT_ID}.Active": False}})
+
+    flushBumps(db, {target: 1 for target in changeTargets({
+        "ns": {"coll": "users"},
+        "documentKey": {"_id": user["_id"]},
+        "updateDescription": {"updatedFields": {f"Accounts.{ACCOUNT_ID}.Active": False}, "removedFields": []}})})
+
+    response = fetch(client, headers, etag=etag)
+
+    assert response.status_code == 200
+
+    assert response.get_json()["account_status"] is False
+
+
+def test_etag_of_another_users_account(app, client, db, headers, heartbeat):
+
+    etag, _ = fetch(client, headers).get_etag()
+
+    other = ObjectId()
+
+    db.users.insert_one({"_id": other, "Name": "Other", "Accounts": {}})
+
+    response = fetch(client, tokenHeaders(app, other, "Other"), etag=etag)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sections, tagged", [("account_status,forbidden_symbols", True), ("account_status,unknown", False)])
+def test_dashboard_etag(client, headers, heartbeat, sections, tagged):
+
+    response = fetch(client, headers, f"/api/dashboard/{ACCOUNT_ID}?sections={sections}")
+
+    assert (response.headers.get("ETag") is not None) == tagged